@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Жараён бўйича умумий ресурслар: муҳит созламалари ва @st.cache_resource омборлари
+(аудит, навбат, QC, синхронизация, хабарлар). Скриптдан ташқарида - ҳар бир
+rerun'да қайта аниқланмайди.
+"""
+
+import os
+import tempfile
+
+import streamlit as st
+
+from audit_log import AuditLogWriter
+from assay_qc import QCStore
+from critical_notify import DEFAULT_NOTIFY_CONFIG_PATH, NotificationDispatcher, load_notify_config
+from lab_profiles import default_lab_id, get_lab_profiles, partition_path
+from patient_store import MemoryPatientStore, SQLitePatientStore
+from session_memory import SessionRegistry
+from tenant_cache import TenantCache
+
+# ==================== ҲОЛАТ ОМБОРИ СОЗЛАМАЛАРИ ====================
+# "session" - ҳар бир сессия ўз хотирасида (стандарт)
+# "sqlite"  - бир нечта жараёнлар учун умумий SQLite файли
+STATE_BACKEND = os.environ.get("SCREENING_STATE_BACKEND", "session").lower()
+STATE_DB_PATH = os.environ.get(
+    "SCREENING_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "screening.db")
+)
+
+# Лабораториялар: ҳар бирининг нормалари, омборлари, кешлари ва навбати алоҳида.
+# Қуйидаги йўллар асосий лаборатория учун; бошқалари partition_path орқали <папка>/labs/<ID>/ да
+def current_lab_id():
+    """Сессияда танланган лаборатория (номаълум бўлса - асосий)"""
+    lab_id = st.session_state.get('lab_id')
+    return lab_id if lab_id in get_lab_profiles()[0] else default_lab_id()
+
+def record_lab_id(record):
+    """Ёзув ҳисобланган лаборатория (эски ёзувлар - жорий)"""
+    lab_id = record.get('lab_id')
+    return lab_id if lab_id in get_lab_profiles()[0] else current_lab_id()
+
+def lab_path(path, lab_id=None):
+    """Жорий (ёки берилган) лаборатория маълумотлари йўли"""
+    return partition_path(path, lab_id or current_lab_id())
+
+# Аудит журнали папкаси (бўш қиймат - журнал ўчирилган)
+AUDIT_LOG_DIR = os.environ.get(
+    "SCREENING_AUDIT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "audit")
+)
+
+@st.cache_resource
+def get_audit_log(audit_dir):
+    """Жараён бўйича битта аудит журнали ёзувчиси"""
+    return AuditLogWriter(audit_dir)
+
+# Оммавий ҳисоблаш вазифалари папкаси (навбат жадвали ва натижалар)
+BULK_JOBS_DIR = os.environ.get(
+    "SCREENING_JOBS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jobs")
+)
+# Фаол вазифа жараёнини янгилаш оралиғи (сония)
+BULK_REFRESH_SECONDS = float(os.environ.get("SCREENING_BULK_REFRESH", "1.0"))
+
+@st.cache_resource
+def get_bulk_queue(jobs_dir, lab_id):
+    """Лаборатория бўйича битта оммавий ҳисоблаш навбати (ўз фон оқими ва жараёнлар ҳовузи)"""
+    from bulk_scoring import BulkScoringQueue
+    
+    # Процессорлар лабораториялар орасида тенг бўлинади
+    lab_count = len(get_lab_profiles()[0])
+    workers = None if lab_count == 1 else max(1, (os.cpu_count() or 1) // lab_count)
+    return BulkScoringQueue(lab_path(jobs_dir, lab_id), workers=workers, qc_db=lab_path(QC_DB_PATH, lab_id),
+                            patients_db=lab_path(STATE_DB_PATH, lab_id) if STATE_BACKEND == "sqlite" else None,
+                            lab_id=lab_id, notifier=get_notifier(lab_id),
+                            audit_log=get_audit_log(lab_path(AUDIT_LOG_DIR, lab_id)) if AUDIT_LOG_DIR else None)
+
+# Сессия тарихидан чиқарилган ёзувлар папкаси (сессия ёпилганда файллар ўчирилади)
+SESSION_SPILL_DIR = os.environ.get(
+    "SCREENING_SPILL_DIR",
+    os.path.join(tempfile.gettempdir(), "screening-spill")
+)
+
+@st.cache_resource
+def get_session_registry():
+    """Жараён бўйича сессиялар рўйхати (фаолсиз сессиялар хотирасини бўшатиш)"""
+    return SessionRegistry()
+
+# Устунли натижалар кеши папкаси - фақат "sqlite" режимида (бўш қиймат - ўчирилган)
+RESULT_COLUMNS_DIR = os.environ.get(
+    "SCREENING_COLUMNS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "columns")
+)
+
+@st.cache_resource
+def get_shared_patient_store(lab_id):
+    """Лаборатория бўйича битта умумий SQLite омбори"""
+    return SQLitePatientStore(lab_path(STATE_DB_PATH, lab_id), columns_dir=lab_path(RESULT_COLUMNS_DIR, lab_id) or None)
+
+# Марказий лабораторияга синхронизация - фақат "sqlite" режимида (бўш манзил - ўчирилган)
+SYNC_URL = os.environ.get("SCREENING_SYNC_URL", "")
+SYNC_SITE_ID = os.environ.get("SCREENING_SITE_ID", "")
+
+def lab_sync_site(lab_id):
+    """Марказий омбордаги клиника ID си: асосий лаборатория - SCREENING_SITE_ID, бошқалари - <ID>-<лаборатория>"""
+    return SYNC_SITE_ID if lab_id == get_lab_profiles()[1] else f"{SYNC_SITE_ID}-{lab_id}"
+
+@st.cache_resource
+def get_sync_agent(lab_id, sync_url, site_id):
+    """Лаборатория бўйича битта фон синхронизацияси (маҳаллий омбор -> марказий омбор)"""
+    from clinic_sync import SyncAgent
+    
+    return SyncAgent(get_shared_patient_store(lab_id), sync_url, site_id)
+
+# Реагентлар сифат назорати омбори (назорат намуналари ва Westgard ҳолати)
+QC_DB_PATH = os.environ.get(
+    "SCREENING_QC_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "qc.db")
+)
+
+@st.cache_resource
+def get_qc_store(db_path):
+    """Жараён бўйича битта QC омбори"""
+    return QCStore(db_path)
+
+# QC серияси танлови: маркерларни назорат қилган серия йўқ / QC сиз ҳисоблаш (аниқ истисно)
+QC_MISSING_LABEL = "— Серия йўқ —"
+QC_OVERRIDE_LABEL = "⚠️ QC сиз (истисно, масъулият оператор зиммасида)"
+
+# Лабораториялар бўйича ҳисоблаш кешлари: бир лаборатория бошқасининг натижаларини сиқиб чиқармайди
+TENANT_CACHE_ENTRIES = int(os.environ.get("SCREENING_TENANT_CACHE_ENTRIES", "512"))
+
+@st.cache_resource
+def get_tenant_cache(name, capacity):
+    """Жараён бўйича номланган лабораториялар кеши"""
+    return TenantCache(capacity)
+
+# Критик натижалар хабарлари: notify.json (ёки SCREENING_NOTIFY_CONFIG) бўлмаса - ўчирилган
+NOTIFY_CONFIG_PATH = os.environ.get("SCREENING_NOTIFY_CONFIG", DEFAULT_NOTIFY_CONFIG_PATH)
+NOTIFY_DB_PATH = os.environ.get(
+    "SCREENING_NOTIFY_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "notify.db")
+)
+
+@st.cache_resource
+def get_notifier(lab_id):
+    """Лаборатория бўйича битта хабарлар навбати ва фон юборувчиси (конфигурация бўлмаса None)"""
+    config = load_notify_config(NOTIFY_CONFIG_PATH)
+    if config is None:
+        return None
+    return NotificationDispatcher(lab_path(NOTIFY_DB_PATH, lab_id), config)
+
+def sync_enabled():
+    return STATE_BACKEND == "sqlite" and bool(SYNC_URL) and bool(SYNC_SITE_ID)
+
+def get_patient_store():
+    """Жорий режим ва лабораторияга мос беморлар омборини олиш"""
+    lab_id = current_lab_id()
+    if STATE_BACKEND == "sqlite":
+        return get_shared_patient_store(lab_id)
+    
+    stores = st.session_state.setdefault('patient_stores', {})
+    if lab_id not in stores:
+        stores[lab_id] = MemoryPatientStore(spill_dir=SESSION_SPILL_DIR)
+    return stores[lab_id]
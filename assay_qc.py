@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+РЕАГЕНТЛАР СИФАТ НАЗОРАТИ (QC)
+Ҳар бир анализатор серияси (run) учун назорат намуналари натижалари
+сақланади ва Westgard мультиқоидалари (1-2s огоҳлантириш; 1-3s, 2-2s, R-4s,
+10x рад этиш) бўйича баҳоланади. Ҳар бир назорат даражаси учун ҳолат
+O(1): ишлаётган ўртача/дисперсия (Welford), олдинги z ва бир томондаги
+кетма-кет натижалар сони - янги серия тарихни ўқимасдан баҳоланади.
+Levey-Jennings графиклари сақланган z қатори бўйича чизилади.
+
+Рад этилган ёки маркерни назорат қилмаган серия бўйича бемор натижалари
+хавф ҳисоблашига ўтказилмайди (require_accepted). Серия кўрсатилмаса,
+маркерларни назорат қилган охирги серия олинади (latest_run); QC сиз
+ҳисоблаш фақат аниқ истисно (QC_OVERRIDE) билан.
+
+    python assay_qc.py target --db data/qc.db --analyzer DELFIA-1 --marker AFP --level 1 --mean 30 --sd 2.5
+    python assay_qc.py record --db data/qc.db --analyzer DELFIA-1 AFP:1=31.2 AFP:2=79.5
+    python assay_qc.py runs --db data/qc.db
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import uuid
+from datetime import datetime
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Назорат қилинадиган маркерлар (нормалар параметри -> кўрсатиладиган ном)
+QC_MARKERS = {
+    'PAPP_A': "PAPP-A",
+    'FREE_BETA_HCG': "Free β-hCG",
+    'AFP': "AFP",
+    'TOTAL_HCG': "Total hCG",
+    'UE3': "uE3",
+}
+
+# Скрининг турида бемор натижаси учун ўлчанадиган маркерлар (NT - УТТ ўлчови)
+SCREENING_QC_MARKERS = {
+    'first': ('PAPP_A', 'FREE_BETA_HCG'),
+    'second': ('AFP', 'TOTAL_HCG', 'UE3'),
+}
+
+WESTGARD_RULES = {
+    '1-2s': "Битта натижа ±2SD дан ташқарида (огоҳлантириш)",
+    '1-3s': "Битта натижа ±3SD дан ташқарида",
+    '2-2s': "Кетма-кет иккита натижа бир томонда 2SD дан ташқарида",
+    'R-4s': "Серия ичида бир натижа +2SD дан, бошқаси -2SD дан ташқарида",
+    '10x': "Кетма-кет 10 та натижа ўртачанинг бир томонида",
+}
+WARNING_RULES = ('1-2s',)
+SHIFT_RUN_LENGTH = 10
+
+# Оммавий ҳисоблашдаги qc_run қиймати: серия текширилмайди (масъулият оператор зиммасида)
+QC_OVERRIDE = "override"
+
+QC_SCHEMA = """
+CREATE TABLE IF NOT EXISTS qc_levels (
+    analyzer TEXT NOT NULL,
+    marker TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    lot TEXT NOT NULL DEFAULT '',
+    target_mean REAL NOT NULL,
+    target_sd REAL NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    mean REAL NOT NULL DEFAULT 0,
+    m2 REAL NOT NULL DEFAULT 0,
+    last_z REAL,
+    side INTEGER NOT NULL DEFAULT 0,
+    side_run INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (analyzer, marker, level)
+);
+CREATE TABLE IF NOT EXISTS qc_runs (
+    run_id TEXT PRIMARY KEY,
+    analyzer TEXT NOT NULL,
+    created TEXT NOT NULL,
+    status TEXT NOT NULL,
+    rejected_markers TEXT NOT NULL,
+    violations TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_qc_runs_created ON qc_runs (created);
+CREATE TABLE IF NOT EXISTS qc_results (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    analyzer TEXT NOT NULL,
+    marker TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    lot TEXT NOT NULL,
+    created TEXT NOT NULL,
+    value REAL NOT NULL,
+    z REAL NOT NULL,
+    rules TEXT NOT NULL,
+    accepted INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_qc_series ON qc_results (analyzer, marker, level, lot, seq);
+CREATE INDEX IF NOT EXISTS idx_qc_results_run ON qc_results (run_id, marker);
+"""
+
+class QCRejectedError(Exception):
+    """Бемор натижаси рад этилган QC сериясига тегишли"""
+
+# ==================== WESTGARD ҚОИДАЛАРИ ====================
+
+def _side(z):
+    return (z > 0) - (z < 0)
+
+def evaluate_marker(states, values):
+    """
+    Битта маркер сериясини баҳолаш.
+    states - {даража: ҳолат луғати}, values - {даража: қиймат}.
+    Натижа: ({даража: z}, [(қоида, [даражалар])], {даража: янги ҳолат}).
+    """
+    z_values = {level: (values[level] - states[level]['target_mean']) / states[level]['target_sd'] for level in values}
+    findings = []
+
+    for level, z in z_values.items():
+        if abs(z) > 3:
+            findings.append(('1-3s', [level]))
+        elif abs(z) > 2:
+            findings.append(('1-2s', [level]))
+
+    # 2-2s: серия ичида иккита даража ёки шу даражанинг олдинги сериясида
+    for side in (1, -1):
+        beyond = [level for level, z in z_values.items() if side * z > 2]
+        repeated = [level for level in beyond
+                    if states[level]['last_z'] is not None and side * states[level]['last_z'] > 2]
+        if len(beyond) >= 2 or repeated:
+            findings.append(('2-2s', beyond))
+
+    high = [level for level, z in z_values.items() if z > 2]
+    low = [level for level, z in z_values.items() if z < -2]
+    if high and low:
+        findings.append(('R-4s', high + low))
+
+    new_states = {}
+    for level, z in z_values.items():
+        state = states[level]
+        side = _side(z)
+        side_run = state['side_run'] + 1 if side and side == state['side'] else (1 if side else 0)
+        if side_run >= SHIFT_RUN_LENGTH:
+            findings.append(('10x', [level]))
+
+        # Welford: ишлаётган ўртача ва дисперсия
+        n = state['n'] + 1
+        delta = values[level] - state['mean']
+        mean = state['mean'] + delta / n
+        new_states[level] = dict(state, n=n, mean=mean, m2=state['m2'] + delta * (values[level] - mean),
+                                 last_z=z, side=side, side_run=side_run)
+
+    return z_values, findings, new_states
+
+def level_statistics(state):
+    """Даража бўйича кузатилган n, ўртача, SD ва CV (%)"""
+    n = state['n']
+    sd = math.sqrt(state['m2'] / (n - 1)) if n > 1 else None
+    cv = sd / state['mean'] * 100 if sd is not None and state['mean'] else None
+    return {'n': n, 'mean': state['mean'] if n else None, 'sd': sd, 'cv': cv}
+
+# ==================== QC ОМБОРИ ====================
+
+LEVEL_COLUMNS = ('analyzer', 'marker', 'level', 'lot', 'target_mean', 'target_sd',
+                 'n', 'mean', 'm2', 'last_z', 'side', 'side_run')
+
+class QCStore:
+    """
+    Назорат натижалари ва даражалар ҳолати SQLite файлида (бир нечта жараёнлар
+    учун умумий). Серия битта транзакцияда ёзилади (BEGIN IMMEDIATE) - бир
+    вақтда келган иккита серия ҳолатни бир-бирининг устидан ёзмайди.
+    Саҳифада ҳар ишга туширишда ўқиладиган рўйхатлар омбор ўзгармагунча
+    (PRAGMA data_version) қайта сўралмайди.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(QC_SCHEMA)
+        self._cache = {}
+        self._cache_version = None
+
+    def _data_version(self):
+        """Бошқа уланишлар ёзганда ўзгарадиган рақам"""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _cached(self, key, load):
+        """load() натижаси (қулф остида) омбор ўзгармагунча сақланади"""
+        with self._lock:
+            version = self._data_version()
+            if self._cache_version != version:
+                self._cache = {}
+                self._cache_version = version
+            if key not in self._cache:
+                self._cache[key] = load()
+            return self._cache[key]
+
+    def _levels(self, where="", params=()):
+        rows = self._conn.execute(
+            f"SELECT {', '.join(LEVEL_COLUMNS)} FROM qc_levels {where} ORDER BY analyzer, marker, level", params
+        ).fetchall()
+        return [dict(zip(LEVEL_COLUMNS, row)) for row in rows]
+
+    def set_target(self, analyzer, marker, level, target_mean, target_sd, lot=""):
+        """Назорат материали мақсадли қиймати; лот ёки мақсад ўзгарса, ҳолат янгидан бошланади"""
+        if marker not in QC_MARKERS:
+            raise ValueError(f"Номаълум маркер: {marker}")
+        if target_sd <= 0:
+            raise ValueError("SD мусбат бўлиши керак")
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO qc_levels (analyzer, marker, level, lot, target_mean, target_sd) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(analyzer, marker, level) DO UPDATE SET lot = excluded.lot, "
+                "target_mean = excluded.target_mean, target_sd = excluded.target_sd, "
+                "n = 0, mean = 0, m2 = 0, last_z = NULL, side = 0, side_run = 0",
+                (analyzer, marker, int(level), lot, float(target_mean), float(target_sd)),
+            )
+            self._cache_version = None
+
+    def targets(self, analyzer=None):
+        """Даражалар: мақсадли қийматлар ва кузатилган статистика"""
+        def load():
+            levels = self._levels("WHERE analyzer = ?", (analyzer,)) if analyzer else self._levels()
+            return [dict(state, **{f"observed_{key}": value for key, value in level_statistics(state).items()})
+                    for state in levels]
+
+        return self._cached(('targets', analyzer), load)
+
+    def analyzers(self):
+        return self._cached(('analyzers',), lambda: [
+            row[0] for row in self._conn.execute("SELECT DISTINCT analyzer FROM qc_levels ORDER BY analyzer")
+        ])
+
+    def record_run(self, analyzer, results, run_id=None):
+        """
+        Серия натижаларини қайд қилиш ва баҳолаш.
+        results - {(маркер, даража): қиймат}. Рад этилган маркер натижалари
+        ҳолатни ўзгартирмайди (тузатишдан кейин баҳолаш охирги қабул
+        қилинган сериядан давом этади).
+        """
+        now = datetime.now()
+        run_id = run_id or f"RUN-{now.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
+        created = now.strftime(TIMESTAMP_FORMAT)
+        by_marker = {}
+        for (marker, level), value in results.items():
+            by_marker.setdefault(marker, {})[int(level)] = float(value)
+
+        violations, warnings, rejected = [], [], []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for marker, values in sorted(by_marker.items()):
+                    states = {
+                        state['level']: state for state in self._levels(
+                            f"WHERE analyzer = ? AND marker = ? AND level IN ({', '.join('?' * len(values))})",
+                            (analyzer, marker, *values),
+                        )
+                    }
+                    missing = sorted(set(values) - set(states))
+                    if missing:
+                        raise ValueError(f"{analyzer}/{QC_MARKERS.get(marker, marker)}: даража {missing} учун мақсад йўқ")
+
+                    z_values, findings, new_states = evaluate_marker(states, values)
+                    marker_findings = [{'marker': marker, 'rule': rule, 'levels': levels} for rule, levels in findings]
+                    accepted = not any(rule not in WARNING_RULES for rule, _ in findings)
+                    for finding in marker_findings:
+                        (warnings if finding['rule'] in WARNING_RULES else violations).append(finding)
+                    if not accepted:
+                        rejected.append(marker)
+
+                    for level, value in values.items():
+                        rules = sorted({rule for rule, levels in findings if level in levels})
+                        self._conn.execute(
+                            "INSERT INTO qc_results (run_id, analyzer, marker, level, lot, created, value, z, rules, accepted) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (run_id, analyzer, marker, level, states[level]['lot'], created, value,
+                             z_values[level], ",".join(rules), int(accepted)),
+                        )
+                        if accepted:
+                            state = new_states[level]
+                            self._conn.execute(
+                                "UPDATE qc_levels SET n = ?, mean = ?, m2 = ?, last_z = ?, side = ?, side_run = ? "
+                                "WHERE analyzer = ? AND marker = ? AND level = ?",
+                                (state['n'], state['mean'], state['m2'], state['last_z'], state['side'],
+                                 state['side_run'], analyzer, marker, level),
+                            )
+
+                status = 'rejected' if rejected else 'accepted'
+                self._conn.execute(
+                    "INSERT INTO qc_runs (run_id, analyzer, created, status, rejected_markers, violations) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, analyzer, created, status, json.dumps(rejected), json.dumps(violations + warnings)),
+                )
+                self._conn.execute("COMMIT")
+                self._cache_version = None
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return {'run_id': run_id, 'analyzer': analyzer, 'created': created, 'status': status,
+                'rejected_markers': rejected, 'violations': violations, 'warnings': warnings}
+
+    def _run_from_row(self, row):
+        run_id, analyzer, created, status, rejected, findings = row
+        findings = json.loads(findings)
+        return {'run_id': run_id, 'analyzer': analyzer, 'created': created, 'status': status,
+                'rejected_markers': json.loads(rejected),
+                'violations': [finding for finding in findings if finding['rule'] not in WARNING_RULES],
+                'warnings': [finding for finding in findings if finding['rule'] in WARNING_RULES]}
+
+    def run(self, run_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, analyzer, created, status, rejected_markers, violations FROM qc_runs WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+        return self._run_from_row(row) if row else None
+
+    def recent_runs(self, limit=20):
+        return self._cached(('recent_runs', limit), lambda: [
+            self._run_from_row(row) for row in self._conn.execute(
+                "SELECT run_id, analyzer, created, status, rejected_markers, violations FROM qc_runs "
+                "ORDER BY created DESC, rowid DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        ])
+
+    def run_markers(self, run_id):
+        """Серияда назорат намуналари ўлчанган маркерлар"""
+        with self._lock:
+            return {row[0] for row in self._conn.execute(
+                "SELECT DISTINCT marker FROM qc_results WHERE run_id = ?", (run_id,)
+            )}
+
+    def latest_run(self, markers):
+        """Шу маркерларнинг барчасини назорат қилган энг охирги серия (йўқ бўлса None)"""
+        markers = sorted(set(markers))
+
+        def load():
+            row = self._conn.execute(
+                "SELECT run_id, analyzer, created, status, rejected_markers, violations FROM qc_runs AS runs "
+                "WHERE (SELECT COUNT(DISTINCT marker) FROM qc_results WHERE qc_results.run_id = runs.run_id "
+                f"AND marker IN ({', '.join('?' * len(markers))})) = ? "
+                "ORDER BY created DESC, rowid DESC LIMIT 1",
+                (*markers, len(markers)),
+            ).fetchone()
+            return self._run_from_row(row) if row else None
+
+        return self._cached(('latest_run', tuple(markers)), load)
+
+    def require_accepted(self, run_id, markers):
+        """Серияда шу маркерлар рад этилган ёки назорат қилинмаган бўлса, QCRejectedError"""
+        run = self.run(run_id)
+        if run is None:
+            raise QCRejectedError(f"QC серияси топилмади: {run_id}")
+        blocked = [marker for marker in markers if marker in run['rejected_markers']]
+        if blocked:
+            rules = sorted({finding['rule'] for finding in run['violations'] if finding['marker'] in blocked})
+            raise QCRejectedError(
+                f"{run_id} серияси рад этилган ({', '.join(QC_MARKERS[marker] for marker in blocked)}: "
+                f"{', '.join(rules)}) - бемор натижалари ҳисобланмайди"
+            )
+        covered = self.run_markers(run_id)
+        uncovered = [marker for marker in markers if marker not in covered]
+        if uncovered:
+            raise QCRejectedError(
+                f"{run_id} сериясида {', '.join(QC_MARKERS[marker] for marker in uncovered)} назорат қилинмаган "
+                f"- бемор натижалари ҳисобланмайди"
+            )
+        return run
+
+    def series(self, analyzer, marker, level, limit=60):
+        """Levey-Jennings қатори (жорий лот): вақт, қиймат, z, қоидалар ва мақсад"""
+        def load():
+            levels = self._levels("WHERE analyzer = ? AND marker = ? AND level = ?", (analyzer, marker, int(level)))
+            if not levels:
+                return None
+            rows = self._conn.execute(
+                "SELECT created, value, z, rules, accepted, run_id FROM qc_results "
+                "WHERE analyzer = ? AND marker = ? AND level = ? AND lot = ? ORDER BY seq DESC LIMIT ?",
+                (analyzer, marker, int(level), levels[0]['lot'], limit),
+            ).fetchall()
+            rows.reverse()
+            return {
+                'target_mean': levels[0]['target_mean'],
+                'target_sd': levels[0]['target_sd'],
+                'lot': levels[0]['lot'],
+                'created': tuple(row[0] for row in rows),
+                'value': tuple(row[1] for row in rows),
+                'z': tuple(row[2] for row in rows),
+                'rules': tuple(row[3] for row in rows),
+                'accepted': tuple(bool(row[4]) for row in rows),
+                'run_id': tuple(row[5] for row in rows),
+            }
+
+        return self._cached(('series', analyzer, marker, int(level), limit), load)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Реагентлар сифат назорати (Westgard)")
+    parser.add_argument('--db', default=os.path.join("data", "qc.db"), help="QC омбори (SCREENING_QC_DB)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    target_parser = subparsers.add_parser('target', help="Назорат даражаси мақсадли қиймати")
+    target_parser.add_argument('--analyzer', required=True)
+    target_parser.add_argument('--marker', required=True, choices=list(QC_MARKERS))
+    target_parser.add_argument('--level', type=int, required=True)
+    target_parser.add_argument('--mean', type=float, required=True)
+    target_parser.add_argument('--sd', type=float, required=True)
+    target_parser.add_argument('--lot', default="")
+
+    record_parser = subparsers.add_parser('record', help="Серия натижаларини қайд қилиш")
+    record_parser.add_argument('--analyzer', required=True)
+    record_parser.add_argument('results', nargs='+', help="МАРКЕР:ДАРАЖА=ҚИЙМАТ")
+
+    subparsers.add_parser('runs', help="Охирги сериялар")
+    args = parser.parse_args()
+
+    store = QCStore(args.db)
+    try:
+        if args.command == 'target':
+            store.set_target(args.analyzer, args.marker, args.level, args.mean, args.sd, args.lot)
+        elif args.command == 'record':
+            results = {}
+            for item in args.results:
+                key, value = item.split('=')
+                marker, level = key.split(':')
+                results[(marker, int(level))] = float(value)
+            run = store.record_run(args.analyzer, results)
+            print(f"{run['run_id']}: {run['status']}")
+            for finding in run['violations'] + run['warnings']:
+                print(f"  {finding['rule']:<5} {QC_MARKERS[finding['marker']]} даража {finding['levels']}")
+            return 1 if run['status'] == 'rejected' else 0
+        else:
+            for run in store.recent_runs():
+                rejected = ", ".join(QC_MARKERS[marker] for marker in run['rejected_markers'])
+                print(f"{run['run_id']:<32} {run['analyzer']:<16} {run['created']}  {run['status']}  {rejected}")
+    finally:
+        store.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+АУДИТ ЖУРНАЛИ
+Ҳар бир ҳисоблашнинг киришлари, нормалар ва дастур версияси ҳамда натижалари
+фақат қўшиладиган (append-only) JSON Lines сегментларига ёзилади.
+
+Ёзиш фон оқимида гуруҳлаб бажарилади: бир пакетдаги барча ёзувлар учун битта
+fsync, шунинг учун интерактив ҳисоблаш журнал кутмайди ва оммавий импорт
+тезлигида ҳам ишлайди. Ҳар бир сегмент ҳажм бўйича алмаштирилади ва ёпилганда
+SHA-256 назорат йиғиндиси ёнма-ён .sha256 файлга ёзилади; сегмент сарлавҳаси
+олдинги сегмент йиғиндисини сақлайди (занжир). Диска ёзиб бўлмаса пакет
+хотирада сақланиб, кутиш вақти ошган ҳолда қайта ёзилади; хатолик status()
+орқали кўрсатилади, навбат тўлса append() хато беради.
+
+    python audit_log.py verify data/audit
+"""
+
+import argparse
+import atexit
+import glob
+import hashlib
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Сегмент ҳажми чегараси ва гуруҳлаб ёзиш параметрлари
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+BATCH_SIZE = 512
+FLUSH_INTERVAL = 0.2   # сония - пакет тўлмаса ҳам шунча кутгандан кейин ёзилади
+
+# Ёзиш хатолигидан кейин қайта уриниш: FLUSH_INTERVAL * 2^уриниш (MAX_RETRY_DELAY гача)
+MAX_RETRY_DELAY = 30.0
+# Навбат тўла бўлса append() шунча кутади, кейин AuditLogError
+APPEND_TIMEOUT = 5.0
+
+SEGMENT_PATTERN = "audit-*.jsonl"
+_STOP = object()
+
+class AuditLogError(RuntimeError):
+    """Аудит ҳодисасини журналга қабул қилиб бўлмади"""
+
+def _json_value(value):
+    """NaN -> None (JSON да NaN йўқ)"""
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+def build_screening_event(record, operator=None):
+    """Сақланган ёзувдан аудит ҳодисасини тузиш (киришлар, версиялар, натижалар)"""
+    from risk_engine import ENGINE_VERSION, NORMS_VERSION
+
+    parameters = record.get('parameters', {})
+    return {
+        'event': 'screening',
+        'patient_id': record.get('patient_id'),
+        'operator': operator or record.get('operator') or '',
+        'engine_version': ENGINE_VERSION,
+        'lab_id': record.get('lab_id'),
+        'norms_version': record.get('norms_version', NORMS_VERSION),
+        'inputs': {
+            'name': record.get('name'),
+            'age': record.get('age'),
+            'screening_type': record.get('screening_type'),
+            'gestational_age': record.get('gestational_age'),
+            'gestational_days': record.get('gestational_days'),
+            'dating': record.get('dating'),
+            'height': record.get('height'),
+            'weight': record.get('weight'),
+            'covariates': record.get('covariates'),
+            'markers': {key: value for key, value in parameters.items() if not key.endswith('_mom')},
+            'linked_first_trimester_id': record.get('linked_first_trimester_id'),
+            'qc_run_id': record.get('qc_run_id'),
+            'qc_override': record.get('qc_override', False)
+        },
+        'outputs': {
+            'screening_mode': record.get('screening_mode', record.get('screening_type')),
+            'moms': {key: value for key, value in parameters.items() if key.endswith('_mom')},
+            'risks': record.get('risks', {})
+        }
+    }
+
+def build_plate_event(row, job_id, row_number, lab_id=None, norms_version=None):
+    """Оммавий ҳисоблаш қатори учун аудит ҳодисаси (планшет устунларидан)"""
+    from risk_engine import ENGINE_VERSION, MARKER_RECORD_KEYS, NORMS_VERSION
+
+    syndromes = ('downs', 'edwards', 'patau', 'turner', 'ntd')
+    return {
+        'event': 'bulk_screening',
+        'job_id': job_id,
+        'row': row_number,
+        'engine_version': ENGINE_VERSION,
+        'lab_id': lab_id,
+        'norms_version': norms_version or NORMS_VERSION,
+        'inputs': {
+            **{key: _json_value(row.get(key)) for key in (
+                'name', 'age', 'screening_type', 'gestational_age', 'gestational_days', 'weight', 'covariate_code',
+                'qc_run', 'first_trimester_id', 'clinician',
+            ) if key in row},
+            'markers': {key: _json_value(row[key]) for key in MARKER_RECORD_KEYS.values() if key in row},
+        },
+        'outputs': {
+            'screening_mode': _json_value(row.get('screening_mode')),
+            'moms': {key: _json_value(value) for key, value in row.items() if str(key).endswith('_mom')},
+            'risks': {syndrome: _json_value(row.get(f"{syndrome}_risk")) for syndrome in syndromes},
+            'category': _json_value(row.get('category')),
+            'error': _json_value(row.get('error')) or "",
+        }
+    }
+
+def _segment_digest_path(segment_path):
+    return segment_path + ".sha256"
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class AuditLogWriter:
+    """
+    Гуруҳлаб ёзувчи аудит журнали.
+
+    append() ҳодисани навбатга қўяди ва дарҳол қайтади; фон оқими навбатни
+    пакетлаб сегментга ёзади ва ҳар бир пакетдан кейин битта fsync қилади.
+    Ҳар бир жараён ўз сегментларига ёзади (номда PID), шунинг учун бир нечта
+    Streamlit жараёнлари бир папкани ишлатиши мумкин.
+    """
+
+    def __init__(self, directory, max_segment_bytes=MAX_SEGMENT_BYTES, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+
+        os.makedirs(directory, exist_ok=True)
+        self._queue = queue.Queue(maxsize=batch_size * 64)
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._segment_index = 0
+        self._segment = None
+        self._segment_path = None
+        self._segment_hash = None
+        self._segment_bytes = 0
+        self._previous_digest = None
+        self._closed = False
+        self.error = None
+        self.unwritten = 0
+
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------- Ёзувчи томони ----------
+
+    def append(self, event):
+        """
+        Ҳодисани навбатга қўйиш (ёзилишини кутмайди), тартиб рақамини қайтаради.
+        Журнал узоқ вақт ёзилмай навбат тўлса - AuditLogError (ҳодиса қабул қилинмаган).
+        """
+        with self._lock:
+            if self._closed:
+                raise AuditLogError("Аудит журнали ёпилган")
+            entry = dict(event, seq=self._sequence + 1, ts=datetime.now().strftime(TIMESTAMP_FORMAT),
+                         host=self.host, pid=self.pid)
+            try:
+                self._queue.put(entry, timeout=APPEND_TIMEOUT)
+            except queue.Full:
+                raise AuditLogError(f"Аудит журнали навбати тўла, диска ёзилмаяпти: {self.error}") from None
+            self._sequence += 1
+            return self._sequence
+
+    def flush(self, timeout=None):
+        """Навбатдаги барча ҳодисалар диска ёзилишини кутиш; timeout ўтса False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def status(self):
+        """Журнал ҳолати: охирги ёзиш хатоси (ёки None) ва ҳали диска ёзилмаган ҳодисалар"""
+        error = self.error
+        return {'error': None if error is None else f"{type(error).__name__}: {error}",
+                'unwritten': self.unwritten + self._queue.qsize()}
+
+    def close(self):
+        """Қолган ҳодисаларни ёзиб, жорий сегментни ёпиш"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=APPEND_TIMEOUT)
+        except queue.Full:
+            pass   # журнал ёзилмаяпти - фон оқими _closed ни кўриб тугайди
+        self._thread.join(timeout=MAX_RETRY_DELAY + APPEND_TIMEOUT)
+
+    # ---------- Фон оқими ----------
+
+    def _next_batch(self, first_timeout, limit):
+        """Навбатдан limit тагача ҳодиса: (ҳодисалар, тўхташ сўралдими)"""
+        batch = []
+        timeout = first_timeout
+        while len(batch) < limit:
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.task_done()
+                return batch, True
+            batch.append(item)
+            timeout = self.flush_interval
+        return batch, False
+
+    def _run(self):
+        # Ёзилмаган ҳодисалар (хатоликдан кейин) тартиби сақланган ҳолда қайта уринилади
+        pending = []
+        failures = 0
+        while True:
+            retry_delay = min(self.flush_interval * 2 ** failures, MAX_RETRY_DELAY) if pending else None
+            if len(pending) < self._queue.maxsize:
+                batch, stop = self._next_batch(retry_delay, self.batch_size)
+            else:
+                # Қайта уриниш кутаётган ҳодисалар чегарада - янгилари навбатда қолади (append кутади)
+                time.sleep(retry_delay)
+                batch, stop = [], self._closed
+
+            events = pending + batch
+            try:
+                if events:
+                    self._write_batch(events)
+                if stop:
+                    self._seal_segment()
+            except Exception as e:
+                # Ҳисоблаш тўхтамайди: хато status() да, ҳодисалар хотирада - кейинроқ қайта ёзилади
+                self.error = e
+                pending = events
+                failures += 1
+            else:
+                pending = []
+                failures = 0
+                self.error = None
+            self.unwritten = len(pending)
+            if not pending or stop:
+                # Ёзилган (ёки ёпилишда ёзиб бўлмаган) ҳодисалар навбатдан чиқарилади
+                for _ in events:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, events):
+        data = b"".join(
+            json.dumps(event, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8') + b"\n"
+            for event in events
+        )
+        if self._segment is None or self._segment_bytes + len(data) > self.max_segment_bytes:
+            self._seal_segment()
+            self._open_segment()
+
+        try:
+            self._segment.write(data)
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+        except Exception:
+            # Чала ёзилган пакет олиб ташланади - қайта уринишда такрорланмасин
+            self._rollback_segment()
+            raise
+        self._segment_hash.update(data)
+        self._segment_bytes += len(data)
+
+    def _rollback_segment(self):
+        """Сегментни охирги муваффақиятли пакетгача қисқартириш; бўлмаса сегмент ташланади (ёпилмаган)"""
+        try:
+            self._segment.truncate(self._segment_bytes)
+            self._segment.seek(self._segment_bytes)
+        except (OSError, ValueError):
+            try:
+                self._segment.close()
+            except OSError:
+                pass
+            self._segment = None
+
+    def _open_segment(self):
+        self._segment_index += 1
+        name = f"audit-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{self.pid}-{self._segment_index:04d}.jsonl"
+        self._segment_path = os.path.join(self.directory, name)
+        self._segment = open(self._segment_path, 'ab')
+        self._segment_hash = hashlib.sha256()
+        self._segment_bytes = 0
+
+        header = json.dumps({
+            'event': 'segment_start',
+            'host': self.host,
+            'pid': self.pid,
+            'created': datetime.now().strftime(TIMESTAMP_FORMAT),
+            'previous_sha256': self._previous_digest
+        }, ensure_ascii=False, sort_keys=True).encode('utf-8') + b"\n"
+        self._segment.write(header)
+        self._segment_hash.update(header)
+        self._segment_bytes += len(header)
+        _fsync_directory(self.directory)
+
+    def _seal_segment(self):
+        """Сегментни ёпиш ва назорат йиғиндисини ёзиш"""
+        if self._segment is None:
+            return
+
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self._segment.close()
+
+        digest = self._segment_hash.hexdigest()
+        with open(_segment_digest_path(self._segment_path), 'w', encoding='utf-8') as digest_file:
+            digest_file.write(f"{digest}  {os.path.basename(self._segment_path)}\n")
+            digest_file.flush()
+            os.fsync(digest_file.fileno())
+        _fsync_directory(self.directory)
+
+        self._previous_digest = digest
+        self._segment = None
+
+# ==================== ТЕКШИРИШ ====================
+
+def verify_segment(segment_path):
+    """
+    Сегментни текшириш: назорат йиғиндиси, JSON қаторлар ва тартиб рақамлари.
+    Натижа: {'segment', 'records', 'sealed', 'sha256', 'errors'}
+    """
+    result = {'segment': os.path.basename(segment_path), 'records': 0, 'sealed': False, 'errors': []}
+    digest = hashlib.sha256()
+    previous_seq = None
+
+    with open(segment_path, 'rb') as segment:
+        for line_number, line in enumerate(segment, start=1):
+            digest.update(line)
+            try:
+                event = json.loads(line)
+            except ValueError:
+                result['errors'].append(f"{line_number}-қатор: JSON эмас")
+                continue
+            if event.get('event') == 'segment_start':
+                result['previous_sha256'] = event.get('previous_sha256')
+                continue
+            seq = event.get('seq')
+            if previous_seq is not None and seq != previous_seq + 1:
+                result['errors'].append(f"{line_number}-қатор: тартиб рақами {previous_seq} дан кейин {seq}")
+            previous_seq = seq
+            result['records'] += 1
+
+    result['sha256'] = digest.hexdigest()
+    digest_path = _segment_digest_path(segment_path)
+    if os.path.exists(digest_path):
+        result['sealed'] = True
+        with open(digest_path, encoding='utf-8') as digest_file:
+            result['sealed_sha256'] = digest_file.read().split()[0]
+        if result['sealed_sha256'] != result['sha256']:
+            result['errors'].append("назорат йиғиндиси мос эмас")
+
+    return result
+
+def verify_directory(directory):
+    """Папкадаги барча сегментларни ва улар орасидаги занжирни текшириш"""
+    results = [verify_segment(path) for path in sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))]
+
+    # Занжир: бир жараённинг кейинги сегменти олдингисининг йиғиндисига ишора қилади
+    last_digest = {}
+    for result in results:
+        _, _, _, pid, index = result['segment'][:-len(".jsonl")].split('-')
+        if int(index) > 1 and last_digest.get(pid) != result.get('previous_sha256'):
+            result['errors'].append("олдинги сегмент йиғиндиси мос эмас")
+        last_digest[pid] = result.get('sealed_sha256')
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Аудит журнали")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    verify_parser = subparsers.add_parser('verify', help="Сегментлар яхлитлигини текшириш")
+    verify_parser.add_argument('directory', help="Аудит папкаси (SCREENING_AUDIT_DIR)")
+    args = parser.parse_args()
+
+    results = verify_directory(args.directory)
+    failed = 0
+    for result in results:
+        status = "ОК" if not result['errors'] else "; ".join(result['errors'])
+        sealed = "ёпилган" if result['sealed'] else "очиқ"
+        print(f"{result['segment']:<48} {result['records']:>8} {sealed:<8} {status}")
+        failed += bool(result['errors'])
+
+    print(f"Сегментлар: {len(results)}, хатолик: {failed}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ЮКЛАМА СИНОВИ (бир нечта параллел сессиялар)
+
+Маҳаллий `streamlit run app.py` серверини ишга тушириб, унга Streamlit
+websocket протоколи (/_stcore/stream, BackMsg/ForwardMsg) орқали N та
+параллел "лаборант" сессиясини улайди. Ҳар бир сессия реал иш жараёнини
+такрорлайди:
+  - switch     - скрининг турини алмаштириш (биринчи/иккиламчи)
+  - fill       - исм, ёш ва маркерларни киритиш (ҳар бир ўзгариш - алоҳида rerun)
+  - calculate  - ҳисоблаш тугмаси (сақлаш, натижа саҳифаси)
+  - history    - натижа саҳифасини қайта чизиш (беморлар тарихи панели билан;
+                 экспандерни очиш браузер томонида, серверда rerun'нинг ўзи)
+
+Ҳар бир босқич (параллел сессиялар сони) учун: ўтказувчанлик (амал/с,
+ҳисоблаш/с), p50/p95/p99 кечикиш ва сервер RSS (Linux, /proc).
+
+Ишлатиш:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --levels 1,4,16,32 --duration 60 --think 1.0 --backend sqlite
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from tornado.httpclient import AsyncHTTPClient
+from tornado.websocket import websocket_connect
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ACTIONS = ('open', 'switch', 'fill', 'calculate', 'history')
+
+# ==================== СЕРВЕР ====================
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def server_rss_kb(pid):
+    """Жараённинг жорий ва энг юқори RSS (КБ), /proc мавжуд бўлмаса (None, None)"""
+    try:
+        with open(f"/proc/{pid}/status", encoding='utf-8') as status:
+            fields = dict(line.split(':', 1) for line in status if ':' in line)
+        return int(fields['VmRSS'].split()[0]), int(fields['VmHWM'].split()[0])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def start_server(app_path, port, data_dir, backend):
+    """streamlit run - маълумотлар вақтинчалик папкада, тайёр бўлгунча кутилади"""
+    env = dict(os.environ)
+    env.update({
+        'SCREENING_STATE_BACKEND': backend,
+        'SCREENING_DB_PATH': os.path.join(data_dir, 'screening.db'),
+        'SCREENING_AUDIT_DIR': os.path.join(data_dir, 'audit'),
+        'SCREENING_JOBS_DIR': os.path.join(data_dir, 'jobs'),
+        'SCREENING_COLUMNS_DIR': os.path.join(data_dir, 'columns'),
+        'SCREENING_SPILL_DIR': os.path.join(data_dir, 'spill'),
+    })
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', app_path,
+         '--server.headless', 'true', '--server.port', str(port), '--server.address', '127.0.0.1',
+         '--server.enableXsrfProtection', 'false', '--server.enableCORS', 'false',
+         '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+        env=env, cwd=os.path.dirname(os.path.abspath(app_path)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    return process
+
+async def wait_ready(port, process, timeout=60):
+    client = AsyncHTTPClient()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Сервер тўхтади: {process.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            response = await client.fetch(f"http://127.0.0.1:{port}/_stcore/health", raise_error=False)
+            if response.code == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Сервер вақтида ишга тушмади")
+
+# ==================== ВИРТУАЛ ЛАБОРАНТ ====================
+
+class VirtualSession:
+    """Битта браузер сессияси: виджетлар ҳолати ва скрипт ишга туширишлари"""
+
+    def __init__(self, port, rng):
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.rng = rng
+        self.connection = None
+        self.widgets = {}     # сарлавҳа -> (тур, proto), охирги ишга туширишдан
+        self.values = {}      # widget id -> WidgetState (фойдаланувчи ўрнатган қийматлар)
+        self.cache = {}       # кешланадиган ForwardMsg лар (hash -> ForwardMsg), браузердаги каби
+        self.errors = 0
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, subprotocols=['streamlit'])
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    async def rerun(self, trigger=None):
+        """Виджетлар ҳолати билан скриптни ишга тушириш ва тугашини кутиш"""
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = ""
+        states = message.rerun_script.widget_states.widgets
+        for state in self.values.values():
+            states.add().CopyFrom(state)
+        if trigger is not None:
+            states.add(id=trigger, trigger_value=True)
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+
+        self.widgets = {}
+        while True:
+            payload = await self.connection.read_message()
+            if payload is None:
+                raise ConnectionError("websocket ёпилди")
+            forward = ForwardMsg()
+            forward.ParseFromString(payload)
+            kind = forward.WhichOneof('type')
+            if kind == 'ref_hash':
+                forward = self.cache.get(forward.ref_hash, forward)
+                kind = forward.WhichOneof('type')
+            elif forward.metadata.cacheable:
+                self.cache[forward.hash] = forward
+
+            if kind == 'new_session':
+                # Ҳар бир ишга тушириш (st.rerun дан кейингиси ҳам) шу хабардан бошланади
+                self.widgets = {}
+            elif kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type == 'exception':
+                    self.errors += 1
+                widget = getattr(element, element_type)
+                if hasattr(widget, 'id') and hasattr(widget, 'label'):
+                    self.widgets[widget.label] = (element_type, widget)
+            elif kind == 'script_finished':
+                if forward.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    return
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    self.errors += 1
+                    return
+
+    def _find(self, label_part, buttons):
+        # Тугма сарлавҳаларида ҳам маркер номлари бор ("NT, PAPP-A, ...") - тур бўйича ажратилади
+        for label, (element_type, widget) in self.widgets.items():
+            if label_part in label and (element_type == 'button') == buttons:
+                return element_type, widget
+        raise KeyError(f"Виджет топилмади: {label_part}")
+
+    async def click(self, label_part):
+        _, widget = self._find(label_part, buttons=True)
+        await self.rerun(trigger=widget.id)
+
+    async def set_value(self, label_part, value):
+        """Виджет қийматини ўзгартириш (браузердаги каби - битта rerun)"""
+        element_type, widget = self._find(label_part, buttons=False)
+        state = WidgetState(id=widget.id)
+        self.values[widget.id] = state
+        if element_type == 'text_input':
+            state.string_value = value
+        elif element_type == 'number_input':
+            if widget.data_type == widget.INT:
+                state.int_value = int(value)
+            else:
+                state.double_value = float(value)
+        elif element_type == 'slider':
+            state.double_array_value.data.append(float(value))
+        elif element_type == 'checkbox':
+            state.bool_value = bool(value)
+        else:
+            state.int_value = int(value)   # radio/selectbox - вариант индекси
+        await self.rerun()
+
+async def technician(index, port, deadline, think, latencies, counters):
+    """Битта лаборант: вақт тугагунча скрининг жараёнларини такрорлаш"""
+    rng = random.Random(index)
+    session = VirtualSession(port, rng)
+
+    async def timed(action, coroutine):
+        start = time.perf_counter()
+        await coroutine
+        latencies[action].append(time.perf_counter() - start)
+        counters['actions'] += 1
+        if think:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * think)
+
+    try:
+        await session.connect()
+        await timed('open', session.rerun())
+        flow = 0
+        while time.monotonic() < deadline:
+            first = rng.random() < 0.7
+            await timed('switch', session.click("БИРИНЧИ СКРИНИНГ" if first else "ИККИЛАМЧИ СКРИНИНГ"))
+
+            inputs = [("Фамилия Исм Шариф", f"Бемор {index}-{flow}"), ("Ёши", rng.randint(18, 44))]
+            if first:
+                inputs += [
+                    ("NT қалинлиги", round(rng.lognormvariate(0.55, 0.25), 1)),
+                    ("PAPP-A", round(min(max(rng.lognormvariate(0.3, 0.5), 0.1), 10.0), 1)),
+                    ("Free β-hCG", float(round(min(max(rng.lognormvariate(4.2, 0.5), 1.0), 300.0)))),
+                ]
+            else:
+                inputs += [
+                    ("AFP", float(round(min(max(rng.lognormvariate(3.8, 0.35), 1.0), 200.0)))),
+                    ("Total hCG", int(round(min(max(rng.lognormvariate(10.0, 0.45), 1000), 100000), -3))),
+                    ("uE3", round(min(max(rng.lognormvariate(1.4, 0.3), 0.1), 20.0), 1)),
+                ]
+            for label, value in inputs:
+                await timed('fill', session.set_value(label, value))
+
+            await timed('calculate', session.click("ҲИСОБЛАШ"))
+            # Натижа саҳифаси чизилганини текшириш ("агар ... бўлса" панели фақат унда бор)
+            if not any(label == "Синдром" for label in session.widgets):
+                counters['errors'] += 1
+            counters['calculations'] += 1
+            await timed('history', session.rerun())
+            flow += 1
+    except Exception as error:
+        counters['failures'] += 1
+        counters.setdefault('failure_examples', []).append(f"{type(error).__name__}: {error}")
+    finally:
+        counters['errors'] += session.errors
+        session.close()
+
+# ==================== БОСҚИЧЛАР ====================
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return float('nan')
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+async def run_level(port, server_pid, sessions, duration, think):
+    """Битта параллеллик даражаси: N сессия, duration сония"""
+    latencies = {action: [] for action in ACTIONS}
+    counters = {'actions': 0, 'calculations': 0, 'errors': 0, 'failures': 0}
+    rss_samples = []
+
+    async def sample_rss():
+        while True:
+            rss, _ = server_rss_kb(server_pid)
+            if rss is not None:
+                rss_samples.append(rss)
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.ensure_future(sample_rss())
+    start = time.monotonic()
+    deadline = start + duration
+    await asyncio.gather(*(
+        technician(index, port, deadline, think, latencies, counters) for index in range(sessions)
+    ))
+    elapsed = time.monotonic() - start
+    sampler.cancel()
+
+    every = [value for values in latencies.values() for value in values]
+    return {
+        'sessions': sessions,
+        'elapsed_s': elapsed,
+        'actions_per_s': counters['actions'] / elapsed,
+        'calculations_per_s': counters['calculations'] / elapsed,
+        'p50_ms': percentile(every, 0.50) * 1000,
+        'p95_ms': percentile(every, 0.95) * 1000,
+        'p99_ms': percentile(every, 0.99) * 1000,
+        'calculate_p95_ms': percentile(latencies['calculate'], 0.95) * 1000,
+        'rss_mb': rss_samples[-1] / 1024 if rss_samples else None,
+        'rss_peak_mb': max(rss_samples) / 1024 if rss_samples else None,
+        'errors': counters['errors'],
+        'failures': counters['failures'],
+        'failure_examples': counters.get('failure_examples', [])[:3],
+        'latency_ms': {
+            action: {'count': len(values), 'p50': percentile(values, 0.5) * 1000,
+                     'p95': percentile(values, 0.95) * 1000, 'p99': percentile(values, 0.99) * 1000}
+            for action, values in latencies.items()
+        },
+    }
+
+def _format_mb(value):
+    return f"{value:8.0f}" if value is not None else "       -"
+
+async def run(args):
+    data_dir = tempfile.mkdtemp(prefix="screening-load-")
+    port = args.port or _free_port()
+    process = start_server(args.app, port, data_dir, args.backend)
+    results = []
+    try:
+        await wait_ready(port, process)
+        idle_rss, _ = server_rss_kb(process.pid)
+        print(f"app: {args.app}   backend: {args.backend}   сервер RSS (бўш): "
+              f"{idle_rss / 1024 if idle_rss else float('nan'):.0f} MB")
+        print(f"{'сессия':>7} {'амал/с':>8} {'ҳисоб/с':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'calc p95':>9} {'RSS MB':>8} {'пик MB':>8} {'хато':>5}")
+        for sessions in args.levels:
+            result = await run_level(port, process.pid, sessions, args.duration, args.think)
+            results.append(result)
+            print(f"{sessions:>7} {result['actions_per_s']:8.1f} {result['calculations_per_s']:8.2f} "
+                  f"{result['p50_ms']:8.0f} {result['p95_ms']:8.0f} {result['p99_ms']:8.0f} "
+                  f"{result['calculate_p95_ms']:9.0f} {_format_mb(result['rss_mb'])} "
+                  f"{_format_mb(result['rss_peak_mb'])} {result['errors'] + result['failures']:5d}")
+            for example in result['failure_examples']:
+                print(f"        ! {example}", file=sys.stderr)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as report_file:
+            json.dump(results, report_file, ensure_ascii=False, indent=1)
+    return 1 if any(result['errors'] or result['failures'] for result in results) else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py юклама синови (параллел websocket сессиялар)")
+    parser.add_argument('--app', default=os.path.join(REPO_DIR, 'app.py'), help="Синаладиган app.py йўли")
+    parser.add_argument('--levels', default="1,2,4,8,16",
+                        type=lambda text: [int(part) for part in text.split(',')],
+                        help="Параллел сессиялар сони босқичлари (вергул билан)")
+    parser.add_argument('--duration', type=float, default=30, help="Ҳар бир босқич давомийлиги (сония)")
+    parser.add_argument('--think', type=float, default=0.0,
+                        help="Амаллар орасидаги ўртача ўйлаш вақти (сония); 0 - максимал юклама")
+    parser.add_argument('--backend', choices=['session', 'sqlite'], default='session', help="Ҳолат омбори")
+    parser.add_argument('--port', type=int, help="Сервер порти (стандарт: бўш порт)")
+    parser.add_argument('--json', help="Натижаларни JSON файлга ёзиш")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+if __name__ == '__main__':
+    sys.exit(main())
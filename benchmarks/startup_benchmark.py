@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ИШГА ТУШИШ ВАҚТИ БЕНЧМАРКИ
+
+Ҳар бир ўлчов янги Python жараёнида бажарилади:
+  - cold_ms   - app.py нинг биринчи ишга тушиши (кириш саҳифаси, биринчи кўриниш)
+  - rerun_ms  - кейинги қайта ишлашлар (rerun) ўртача вақти
+  - heavy     - кириш саҳифасидан кейин юкланган оғир модуллар
+
+Ишлатиш:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --app /path/to/old/app.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Фақат натижа саҳифасида керак бўлган модуллар
+HEAVY_MODULES = ['plotly.express', 'plotly.graph_objects']
+
+CHILD_CODE = r"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+app_path, reruns, heavy = sys.argv[1], int(sys.argv[2]), sys.argv[3].split(',')
+before = set(sys.modules)
+
+at = AppTest.from_file(app_path, default_timeout=120)
+start = time.perf_counter()
+at.run()
+cold = time.perf_counter() - start
+
+rerun_times = []
+for _ in range(reruns):
+    start = time.perf_counter()
+    at.run()
+    rerun_times.append(time.perf_counter() - start)
+
+print(json.dumps({
+    'cold_ms': cold * 1000,
+    'rerun_ms': sum(rerun_times) / len(rerun_times) * 1000 if rerun_times else 0.0,
+    'heavy': [m for m in heavy if m in sys.modules and m not in before],
+    'error': [str(e.message) for e in at.exception],
+}))
+"""
+
+def run_once(app_path, reruns):
+    """Битта янги жараёнда ўлчаш"""
+    env = dict(os.environ)
+    app_dir = os.path.dirname(os.path.abspath(app_path))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [app_dir, env.get('PYTHONPATH')]))
+
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_CODE, app_path, str(reruns), ','.join(HEAVY_MODULES)],
+        check=True, capture_output=True, text=True, env=env, cwd=app_dir
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py ишга тушиш вақтини ўлчаш")
+    parser.add_argument('--app', default=os.path.join(REPO_DIR, 'app.py'), help="Ўлчанадиган app.py йўли")
+    parser.add_argument('--runs', type=int, default=5, help="Янги жараёнлар сони")
+    parser.add_argument('--reruns', type=int, default=10, help="Ҳар бир жараёнда rerun сони")
+    args = parser.parse_args()
+
+    results = [run_once(args.app, args.reruns) for _ in range(args.runs)]
+
+    errors = [e for r in results for e in r['error']]
+    if errors:
+        print(f"Хатолик: {errors[0]}", file=sys.stderr)
+        return 1
+
+    cold = [r['cold_ms'] for r in results]
+    rerun = [r['rerun_ms'] for r in results]
+    print(f"app:        {args.app}")
+    print(f"cold start: median {statistics.median(cold):8.1f} ms   min {min(cold):8.1f} ms")
+    print(f"rerun:      median {statistics.median(rerun):8.1f} ms   min {min(rerun):8.1f} ms")
+    print(f"heavy modules loaded on landing page: {results[0]['heavy'] or 'йўқ'}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ОММАВИЙ ҲИСОБЛАШ НАВБАТИ
+Юкланган CSV файл (планшет) сақланади ва SQLite жадвалидаги навбатга
+қўйилади. Фон оқими навбатдан вазифани олиб, қаторларни бўлакларга бўлади ва
+жараёнлар ҳовузида MoM ва хавфларни векторлаштирилган ҳолда ҳисоблайди.
+Ҳар бир тайёр бўлак алоҳида файлга ёзилади - жараён ва оралиқ натижалар
+интерфейсда кўрсатилади, бекор қилинган ёки хато берган вазифа қайта
+ишга туширилганда тайёр бўлаклар такрорланмайди.
+
+Навбат жадвали бир нечта Streamlit жараёнлари орасида умумий: вазифани фақат
+битта жараён олади (BEGIN IMMEDIATE). Ҳар бир лаборатория ўз папкасидаги
+алоҳида навбат ва жараёнлар ҳовузига эга - бир лабораториянинг катта
+планшети бошқасининг вазифаларини кутдирмайди.
+"""
+
+import glob
+import io
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+import numpy as np
+
+from audit_log import build_plate_event
+from dedup_index import flag_duplicates, store_index
+from gestational_dating import WEEK_ANCHOR_DAY
+from lab_profiles import get_lab
+from marker_flags import get_flag_rules
+from maternal_covariates import BINARY_COVARIATES, ETHNICITIES, covariate_code
+from patient_store import link_first_trimester_records, load_first_trimester_records
+from risk_engine import (
+    MARKER_RECORD_KEYS, calculate_mom_array, calculate_syndrome_risks_array, combine_trimester_moms,
+    format_risk_display, get_risk_category, gestational_days_range
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+CHUNK_SIZE = 500
+POLL_INTERVAL = 0.5
+# Навбат жадвали хатосида (масалан, "database is locked") кутиш MAX_BACKOFF гача икки баравар ортади
+MAX_BACKOFF = 30.0
+# Бўлак аудит ҳодисалари диска ёзилишини кутиш (сония)
+AUDIT_FLUSH_TIMEOUT = 30.0
+
+JOB_STATUSES = {
+    'queued': "Навбатда",
+    'running': "Ҳисобланмоқда",
+    'done': "Тайёр",
+    'failed': "Хатолик",
+    'cancelled': "Бекор қилинган"
+}
+
+# Триместр маркерлари: (норма параметри, MoM калити calculate_syndrome_risks учун)
+TRIMESTER_MARKERS = {
+    'first': [('NT', 'nt_mom'), ('PAPP_A', 'papp_mom'), ('FREE_BETA_HCG', 'hcg_mom')],
+    'second': [('AFP', 'afp_mom'), ('TOTAL_HCG', 'total_hcg_mom'), ('UE3', 'ue3_mom')]
+}
+
+REQUIRED_COLUMNS = ['name', 'age', 'weight']
+SYNDROMES = ['downs', 'edwards', 'patau', 'turner', 'ntd']
+
+# Интеграл скрининг: биринчи скрининг MoM устунлари -> calculate_syndrome_risks калитлари
+FIRST_TRIMESTER_MOM_COLUMNS = {'first_nt_mom': 'nt_mom', 'first_papp_a_mom': 'papp_mom', 'first_free_beta_hcg_mom': 'hcg_mom'}
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    screening_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total_chunks INTEGER NOT NULL DEFAULT 0,
+    done_chunks INTEGER NOT NULL DEFAULT 0,
+    total_rows INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    error TEXT,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created);
+"""
+
+# ==================== ҲИСОБЛАШ ====================
+
+def _flag(value):
+    """Иккилик омил қиймати (1, true, ҳа, ...)"""
+    return str(value).strip().lower() in ('1', '1.0', 'true', 'yes', 'ha', 'ҳа', 'x', '+')
+
+def _row_covariate_code(row):
+    ethnicity = row.get('ethnicity')
+    covariates = {name: _flag(row.get(name)) for name in BINARY_COVARIATES}
+    covariates['ethnicity'] = ethnicity if ethnicity in ETHNICITIES else None
+    return covariate_code(covariates)
+
+def prepare_plate(frame, screening_type="first"):
+    """
+    Юкланган жадвални нормаллаштириш: устун номлари, сонли қийматлар,
+    гестацион кунлар ва омиллар коди. Етишмаган устунлар учун ValueError.
+    """
+    import pandas as pd
+
+    frame = frame.rename(columns=lambda column: str(column).strip().lower())
+    if 'screening_type' not in frame:
+        frame['screening_type'] = screening_type
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame]
+    if 'gestational_age' not in frame and 'gestational_days' not in frame:
+        missing.append('gestational_age')
+    for trimester in frame['screening_type'].unique():
+        if trimester not in TRIMESTER_MARKERS:
+            raise ValueError(f"Номаълум скрининг тури: {trimester}")
+        for parameter, _ in TRIMESTER_MARKERS[trimester]:
+            if MARKER_RECORD_KEYS[parameter] not in frame and MARKER_RECORD_KEYS[parameter] not in missing:
+                missing.append(MARKER_RECORD_KEYS[parameter])
+    if missing:
+        raise ValueError(f"Файлда устунлар йўқ: {', '.join(missing)}")
+
+    numeric_columns = ['age', 'weight', 'gestational_age', 'gestational_days', *MARKER_RECORD_KEYS.values()]
+    for column in numeric_columns:
+        if column in frame:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+
+    # Ҳафта бўйича медиана кунлик жадвалда шу ҳафта ўртасига тенг
+    week_days = frame['gestational_age'] * 7 + WEEK_ANCHOR_DAY if 'gestational_age' in frame else np.nan
+    if 'gestational_days' in frame:
+        frame['gestational_days'] = frame['gestational_days'].fillna(week_days)
+    else:
+        frame['gestational_days'] = week_days
+
+    if 'covariate_code' not in frame:
+        frame['covariate_code'] = [_row_covariate_code(row) for row in frame.to_dict('records')]
+
+    return frame.reset_index(drop=True)
+
+def plate_qc_errors(frame, qc_db):
+    """
+    Планшетдаги qc_run устуни бўйича: ҳар қатор учун текширилган серия ва хато
+    матни (бўш сатр - рухсат). Серия кўрсатилмаса - маркерларни назорат қилган
+    охирги серия; QC_OVERRIDE - текширилмайди. Лабораторияда QC юритилмаса
+    (назорат даражалари йўқ) - барча қаторлар рухсат. Ҳар бир (серия, скрининг тури)
+    жуфти бир марта текширилади.
+    """
+    from assay_qc import QC_OVERRIDE, SCREENING_QC_MARKERS, QCRejectedError, QCStore
+
+    run_ids = frame['qc_run'].fillna("").astype(str).str.strip() if 'qc_run' in frame else [""] * len(frame)
+    pairs = list(zip(run_ids, frame['screening_type']))
+    store = QCStore(qc_db)
+    try:
+        if not store.analyzers():
+            return [run_id for run_id, _ in pairs], [""] * len(pairs)
+        latest = {}
+        for trimester in set(frame['screening_type']):
+            run = store.latest_run(SCREENING_QC_MARKERS[trimester])
+            latest[trimester] = run['run_id'] if run else ""
+        resolved = [(run_id or latest[trimester], trimester) for run_id, trimester in pairs]
+
+        messages = {}
+        for run_id, trimester in set(resolved):
+            if run_id == QC_OVERRIDE:
+                messages[(run_id, trimester)] = ""
+                continue
+            if not run_id:
+                messages[(run_id, trimester)] = "QC серияси йўқ - бемор натижалари ҳисобланмайди"
+                continue
+            try:
+                store.require_accepted(run_id, SCREENING_QC_MARKERS[trimester])
+                messages[(run_id, trimester)] = ""
+            except QCRejectedError as e:
+                messages[(run_id, trimester)] = str(e)
+    finally:
+        store.close()
+    return [run_id for run_id, _ in resolved], [messages[pair] for pair in resolved]
+
+def plate_first_trimester_links(frame, patients_db):
+    """
+    Планшетдаги first_trimester_id устуни бўйича иккинчи скрининг қаторларини
+    биринчи скрининг билан боғлаш: барча ID лар бир неча сўровда юкланади, боғлаш
+    индекс орқали (ID ва исм текширилади, исм бўйича танланмайди). first_*_mom ва
+    link_error устунлари қўшилади; боғланмаган қатор ҳисобланмайди.
+    """
+    ids = frame['first_trimester_id'].fillna("").astype(str).str.strip()
+    second = (frame['screening_type'] == "second") & (ids != "")
+    rows = [{'name': name, 'linked_first_trimester_id': patient_id}
+            for name, patient_id in zip(frame.loc[second, 'name'], ids[second])]
+    first_records = load_first_trimester_records(patients_db, ids[second])
+
+    for column in FIRST_TRIMESTER_MOM_COLUMNS:
+        frame[column] = np.nan
+    frame['link_error'] = ""
+    for index, (_, first_record, error) in zip(frame.index[second], link_first_trimester_records(rows, first_records)):
+        if first_record is None:
+            frame.at[index, 'link_error'] = error
+            continue
+        moms = combine_trimester_moms({}, first_record)
+        for column, mom_key in FIRST_TRIMESTER_MOM_COLUMNS.items():
+            frame.at[index, column] = moms[mom_key]
+    frame['first_trimester_id'] = ids
+    return frame
+
+def score_plate(frame, lab=None):
+    """Бўлак учун MoM ва хавфлар (calculate_mom_value/calculate_syndrome_risks билан бир хил, lab нормалари)"""
+    result = frame.copy()
+    result['error'] = ""
+    for syndrome in SYNDROMES:
+        result[f"{syndrome}_risk"] = np.nan
+
+    for trimester, markers in TRIMESTER_MARKERS.items():
+        rows = result['screening_type'] == trimester
+        if not rows.any():
+            continue
+        raw_keys = [MARKER_RECORD_KEYS[parameter] for parameter, _ in markers]
+        values = result.loc[rows, ['age', 'weight', 'gestational_days', *raw_keys]].astype(float)
+        invalid = values.isna().any(axis=1) | (values[['weight', *raw_keys]] <= 0).any(axis=1)
+        result.loc[invalid[invalid].index, 'error'] = "Маълумот етишмайди ёки нотўғри"
+        # Норма жадвалидан ташқари муддат четки ҳафта медианаси билан ҳисобланмайди
+        first_day, last_day = gestational_days_range(trimester, lab)
+        days = np.rint(values['gestational_days'])
+        out_of_range = ~invalid & ((days < first_day) | (days > last_day))
+        result.loc[out_of_range[out_of_range].index, 'error'] = "Гестацион муддат норма жадвалидан ташқарида"
+        invalid |= out_of_range
+        for error_column in ('qc_error', 'link_error'):
+            if error_column in result:
+                blocked = result.loc[rows, error_column].fillna("") != ""
+                result.loc[blocked[blocked].index, 'error'] = result.loc[blocked[blocked].index, error_column]
+                invalid |= blocked
+
+        valid = values[~invalid]
+        if valid.empty:
+            continue
+        codes = result.loc[valid.index, 'covariate_code'].to_numpy(dtype=np.int64)
+        marker_moms = {}
+        for parameter, mom_key in markers:
+            raw_key = MARKER_RECORD_KEYS[parameter]
+            moms = calculate_mom_array(valid[raw_key].to_numpy(), parameter, valid['gestational_days'].to_numpy(),
+                                       valid['weight'].to_numpy(), trimester, codes, lab)
+            marker_moms[mom_key] = moms
+            result.loc[valid.index, f"{raw_key}_mom"] = moms
+        result.loc[valid.index, 'screening_mode'] = trimester
+        if trimester == "second" and 'first_nt_mom' in result:
+            # Интеграл скрининг: боғланган қаторларда биринчи скрининг MoM лари, қолганларида 1.0
+            for column, mom_key in FIRST_TRIMESTER_MOM_COLUMNS.items():
+                marker_moms[mom_key] = result.loc[valid.index, column].fillna(1.0).to_numpy(dtype=float)
+            linked = result.loc[valid.index, 'first_nt_mom'].notna()
+            result.loc[linked[linked].index, 'screening_mode'] = "integrated"
+
+        risks = calculate_syndrome_risks_array(valid['age'].to_numpy(), marker_moms, trimester, lab)
+        for syndrome in SYNDROMES:
+            result.loc[valid.index, f"{syndrome}_risk"] = risks[syndrome]
+
+    max_risk = result[[f"{syndrome}_risk" for syndrome in SYNDROMES]].max(axis=1)
+    result['max_risk'] = max_risk
+    result['risk_display'] = [format_risk_display(value) if value == value else "" for value in max_risk]
+    result['category'] = [get_risk_category(value)[0] if value == value else "" for value in max_risk]
+    return get_flag_rules().flag_frame(result)
+
+def score_chunk_task(task):
+    """Жараён ишчиси: бўлакни ҳисоблаб, натижани файлга ёзиш"""
+    import pandas as pd
+
+    records, out_path, lab_id = task
+    # Профиллар ишчи жараёнда ҳам бир марта юкланади (SCREENING_LABS_FILE мерос олинади)
+    lab = get_lab(lab_id) if lab_id else None
+    result = score_plate(pd.DataFrame.from_records(records), lab)
+    temporary_path = out_path + ".tmp"
+    result.to_csv(temporary_path, index=False)
+    os.replace(temporary_path, out_path)
+    return len(result)
+
+# ==================== ВАЗИФАЛАР НАВБАТИ ====================
+
+class BulkScoringQueue:
+    """
+    SQLite жадвалидаги вазифалар навбати ва уларни бажарувчи фон оқими.
+
+    submit() файлни сақлаб, вазифани навбатга қўяди ва дарҳол қайтади.
+    Ҳисоблаш жараёнлар ҳовузида бажарилади; Streamlit сессияси фақат
+    жадвалдан ҳолатни ўқийди. Тайёр бўлакнинг ҳар бир қатори аудит журналига
+    (audit_log берилса) ёзилади, критик натижалари хабарлар навбатига
+    (notifier берилса) қўйилади. Фон оқими хатода тўхтамайди: охирги хато
+    status да кўрсатилади, вазифани "failed" деб белгилаш ёзилмаса кейинги
+    айланишда қайта уринилади.
+    """
+
+    def __init__(self, directory, workers=None, chunk_size=CHUNK_SIZE, poll_interval=POLL_INTERVAL, qc_db=None,
+                 patients_db=None, lab_id=None, notifier=None, audit_log=None):
+        self.directory = directory
+        self.lab_id = lab_id
+        self.notifier = notifier
+        self.audit_log = audit_log
+        self.qc_db = qc_db
+        self.patients_db = patients_db
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "jobs.db"), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(JOBS_SCHEMA)
+        self._recover_orphans()
+
+        self.status = {'last_error': None, 'failures': 0}
+        # "failed" ҳолати жадвалга ёзилмаган вазифалар (job_id -> хато матни)
+        self._unrecorded_failures = {}
+        self._pool = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bulk-scoring-dispatcher", daemon=True)
+        self._thread.start()
+
+    # ---------- Интерфейс томони ----------
+
+    def submit(self, filename, data, screening_type="first"):
+        """CSV файлни навбатга қўйиш, вазифа ID сини қайтаради"""
+        now = datetime.now()
+        job_id = f"JOB-{now.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        with open(os.path.join(job_dir, "input.csv"), 'wb') as input_file:
+            input_file.write(data)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, filename, screening_type, status, created, updated) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, filename, screening_type, now.strftime(TIMESTAMP_FORMAT), now.strftime(TIMESTAMP_FORMAT)),
+            )
+        self._wakeup.set()
+        return job_id
+
+    def job(self, job_id):
+        """Вазифа ҳолати (луғат) ёки None"""
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+            row = cursor.fetchone()
+            return dict(zip([column[0] for column in cursor.description], row)) if row else None
+
+    def jobs(self, limit=10):
+        """Охирги вазифалар (янгидан эскига)"""
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def cancel(self, job_id):
+        """Бекор қилиш: навбатдаги вазифа дарҳол, бажарилаётгани кейинги бўлакда тўхтайди"""
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated = ? WHERE job_id = ? AND status = 'queued'",
+                (now, job_id),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated = ? WHERE job_id = ? AND status = 'running'",
+                (now, job_id),
+            )
+
+    def retry(self, job_id):
+        """Хато берган ёки бекор қилинган вазифани қайта навбатга қўйиш (тайёр бўлаклар сақланади)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', cancel_requested = 0, error = NULL, updated = ? "
+                "WHERE job_id = ? AND status IN ('failed', 'cancelled')",
+                (datetime.now().strftime(TIMESTAMP_FORMAT), job_id),
+            )
+        self._wakeup.set()
+        return cursor.rowcount > 0
+
+    def partial_results(self, job_id, limit=None):
+        """Тайёр бўлаклар натижалари (pandas DataFrame)"""
+        import pandas as pd
+
+        paths = sorted(glob.glob(os.path.join(self._job_dir(job_id), "chunk-*.csv")))
+        frames = []
+        rows = 0
+        for path in paths:
+            frames.append(pd.read_csv(path, keep_default_na=False, na_values=['']))
+            rows += len(frames[-1])
+            if limit is not None and rows >= limit:
+                break
+        if not frames:
+            return pd.DataFrame()
+        result = pd.concat(frames, ignore_index=True)
+        return result.head(limit) if limit is not None else result
+
+    def result_csv(self, job_id):
+        """Тайёр вазифанинг тўлиқ натижаси (CSV байтлари)"""
+        buffer = io.StringIO()
+        self.partial_results(job_id).to_csv(buffer, index=False)
+        return buffer.getvalue().encode('utf-8-sig')
+
+    def close(self):
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+        with self._lock:
+            self._conn.close()
+
+    # ---------- Фон оқими ----------
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.directory, job_id)
+
+    def _update(self, job_id, **fields):
+        fields['updated'] = datetime.now().strftime(TIMESTAMP_FORMAT)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def _claim_next(self):
+        """Навбатдаги вазифани олиш (бир нечта жараёндан фақат биттаси олади)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, updated = ? WHERE job_id = ?",
+                        (self.worker_name, datetime.now().strftime(TIMESTAMP_FORMAT), row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[0] if row else None
+
+    def _recover_orphans(self):
+        """Шу серверда тўхтаб қолган жараёнлар вазифаларини хато деб белгилаш (қайта ишга тушириш мумкин)"""
+        host = self.worker_name.rsplit(':', 1)[0]
+        with self._lock:
+            rows = self._conn.execute("SELECT job_id, worker FROM jobs WHERE status = 'running'").fetchall()
+        for job_id, worker in rows:
+            worker_host, _, pid = (worker or '').rpartition(':')
+            if worker_host != host or not pid.isdigit():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                self._update(job_id, status='failed', error="Жараён тўхтаб қолди")
+            except PermissionError:
+                pass
+
+    def _cancel_requested(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def _get_pool(self):
+        # spawn - Streamlit сервери кўп оқимли, fork хавфсиз эмас
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                for job_id, error in list(self._unrecorded_failures.items()):
+                    self._update(job_id, status='failed', error=error)
+                    del self._unrecorded_failures[job_id]
+                job_id = self._claim_next()
+                if self.status['failures']:
+                    self.status.update(last_error=None, failures=0)
+                if job_id is None:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+                try:
+                    self._run_job(job_id)
+                except Exception as e:
+                    self._unrecorded_failures[job_id] = str(e)
+                    self._update(job_id, status='failed', error=str(e))
+                    del self._unrecorded_failures[job_id]
+            except Exception as e:
+                # Оқим тўхтамайди: хато ҳолатда кўрсатилади, кейинги уриниш кутишдан сўнг
+                self.status['failures'] += 1
+                self.status['last_error'] = f"{type(e).__name__}: {e}"
+                self._stopped.wait(min(self.poll_interval * 2 ** self.status['failures'], MAX_BACKOFF))
+
+    def _record_chunk(self, job_id, number, out_path):
+        """
+        Тайёр бўлак: ҳар бир қатор аудит журналига (бир марта - диска ёзилгандан кейин
+        .audited белгиси) ва критик натижалар хабарлар навбатига. Журнал ҳодисаларни
+        қабул қилмаса (AuditLogError) вазифа хато билан тугайди.
+        """
+        if self.notifier is None and self.audit_log is None:
+            return
+        import pandas as pd
+
+        frame = pd.read_csv(out_path)
+        first_row = number * self.chunk_size
+        audited_path = out_path + ".audited"
+        if self.audit_log is not None and not os.path.exists(audited_path):
+            norms_version = get_lab(self.lab_id).norms_version if self.lab_id else None
+            for offset, row in enumerate(frame.to_dict('records')):
+                self.audit_log.append(build_plate_event(row, job_id, first_row + offset + 1, self.lab_id, norms_version))
+            # Белги фақат ҳодисалар диска ёзилгандан кейин - акс ҳолда қайта ишга туширилганда яна ёзилади
+            if self.audit_log.flush(timeout=AUDIT_FLUSH_TIMEOUT):
+                open(audited_path, 'w').close()
+
+        if self.notifier is not None:
+            try:
+                self.notifier.enqueue_frame(frame, job_id, first_row, self.lab_id)
+            except (OSError, sqlite3.Error, ValueError) as e:
+                # Ҳисоблаш тўхтамайди - хато хабарлар ҳолатида кўрсатилади
+                self.notifier.status['last_error'] = f"{job_id} бўлак {number}: {e}"
+
+    def _run_job(self, job_id):
+        import pandas as pd
+
+        job = self.job(job_id)
+        job_dir = self._job_dir(job_id)
+        frame = prepare_plate(pd.read_csv(os.path.join(job_dir, "input.csv"), encoding='utf-8-sig'),
+                              job['screening_type'])
+        if self.qc_db:
+            frame['qc_run'], frame['qc_error'] = plate_qc_errors(frame, self.qc_db)
+        # Интеграл скрининг: биринчи скрининг ёзувлари (sqlite режимида) ID бўйича
+        if 'first_trimester_id' in frame:
+            frame = plate_first_trimester_links(frame, self.patients_db)
+        # Такрорийлар: файлнинг олдинги қаторлари ва (sqlite режимида) сақланган ёзувлар бўйича
+        frame = flag_duplicates(frame, store_index(self.patients_db) if self.patients_db else None,
+                                job['screening_type'])
+
+        starts = range(0, len(frame), self.chunk_size)
+        pending = {}
+        done_chunks = 0
+        for number, start in enumerate(starts):
+            out_path = os.path.join(job_dir, f"chunk-{number:05d}.csv")
+            if os.path.exists(out_path):
+                # Қайта ишга туширилган вазифа: хабарлар калит бўйича, аудит белги бўйича такрорланмайди
+                self._record_chunk(job_id, number, out_path)
+                done_chunks += 1
+                continue
+            records = frame.iloc[start:start + self.chunk_size].to_dict('records')
+            pending[self._get_pool().submit(score_chunk_task, (records, out_path, self.lab_id))] = (number, out_path)
+        self._update(job_id, total_chunks=len(starts), done_chunks=done_chunks, total_rows=len(frame))
+
+        while pending:
+            finished, _ = wait(pending, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+            for future in finished:
+                number, out_path = pending.pop(future)
+                future.result()
+                self._record_chunk(job_id, number, out_path)
+                done_chunks += 1
+            if finished:
+                self._update(job_id, done_chunks=done_chunks)
+
+            if self._cancel_requested(job_id) or self._stopped.is_set():
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+                self._update(job_id, status='cancelled', cancel_requested=0)
+                return
+
+        self._update(job_id, status='done')
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+КЛИНИКАЛАР СИНХРОНИЗАЦИЯСИ
+Туман клиникаси ўз маҳаллий SQLite омборида ишлайди (алоқа бўлмаса ҳам),
+фон оқими эса янги скрининглар вилоят лабораториясининг марказий омборига
+юборади. Ўзгаришлар омборнинг монотон кетма-кетлик рақами (patients.seq)
+бўйича олинади: клиника марказий омбордан ўз курсорини сўрайди ва ундан
+кейинги ёзувларни gzip билан сиқилган пакетларда юборади. Марказий омбор
+пакетни битта транзакцияда қабул қилади ва курсорни шу транзакцияда
+янгилайди - узилган юбориш кейинги уринишда курсордан давом этади,
+такрорий пакет иккинчи марта сақланмайди. Синхронизация нархи омбор ҳажмига
+эмас, янги ёзувлар сонига боғлиқ.
+
+    python clinic_sync.py serve --db data/central.db --port 8765
+    python clinic_sync.py push --db data/screening.db --site tuman-3 --url http://127.0.0.1:8765
+    python clinic_sync.py status --db data/central.db
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Пакет чегаралари: ёзувлар сони ва сиқилмаган ҳажм
+BATCH_RECORDS = 500
+BATCH_BYTES = 2 * 1024 * 1024
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+# Фон синхронизацияси: оддий интервал ва хатоликдан кейинги энг узун кутиш (сония)
+SYNC_INTERVAL = 30
+MAX_BACKOFF = 600
+REQUEST_TIMEOUT = 30
+
+SITE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+class SyncError(Exception):
+    """Марказий омбор пакетни рад этди ёки жавоб нотўғри"""
+
+# ==================== ПАКЕТ ФОРМАТИ ====================
+
+def encode_batch(changes):
+    """
+    [(seq, JSON матн)] -> (gzip маълумот, SHA-256). Ҳар бир қатор битта
+    {"seq": ..., "record": ...} объекти; ёзув матни омбордан қайта
+    кодланмасдан олинади.
+    """
+    payload = "\n".join(f'{{"seq": {seq}, "record": {record}}}' for seq, record in changes).encode('utf-8')
+    return gzip.compress(payload, compresslevel=6), hashlib.sha256(payload).hexdigest()
+
+def decode_batch(body, digest):
+    """gzip маълумотни текшириб очиш: [(seq, ёзув)] ўсиш тартибида"""
+    payload = gzip.decompress(body)
+    if hashlib.sha256(payload).hexdigest() != digest:
+        raise SyncError("Пакет назорат йиғиндиси мос эмас")
+    changes = []
+    for line in payload.decode('utf-8').splitlines():
+        item = json.loads(line)
+        changes.append((int(item['seq']), item['record']))
+    if any(later[0] <= earlier[0] for earlier, later in zip(changes, changes[1:])):
+        raise SyncError("Пакетдаги кетма-кетлик рақамлари ўсиш тартибида эмас")
+    return changes
+
+def next_batch(store, after_seq, max_records=BATCH_RECORDS, max_bytes=BATCH_BYTES):
+    """Курсордан кейинги ёзувлар - сони ва ҳажми чегараланган (камида битта ёзув)"""
+    rows = store.changes_since(after_seq, max_records)
+    size = 0
+    for index, (_, record) in enumerate(rows):
+        size += len(record)
+        if size > max_bytes and index:
+            return rows[:index]
+    return rows
+
+# ==================== КЛИНИКА ТОМОНИ ====================
+
+class SyncClient:
+    """Марказий омбор HTTP мижози"""
+
+    def __init__(self, base_url, site_id, timeout=REQUEST_TIMEOUT):
+        if not SITE_ID_PATTERN.match(site_id):
+            raise ValueError(f"Клиника идентификатори нотўғри: {site_id!r}")
+        self.base_url = base_url.rstrip('/')
+        self.site_id = site_id
+        self.timeout = timeout
+
+    def _request(self, path, body=None, headers=None):
+        request = urllib.request.Request(
+            f"{self.base_url}/sync/{self.site_id}/{path}", data=body, headers=headers or {},
+            method='POST' if body is not None else 'GET'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            raise SyncError(f"HTTP {e.code}: {e.read().decode('utf-8', errors='replace')}") from e
+
+    def cursor(self):
+        """Марказий омборда қабул қилинган охирги кетма-кетлик рақами"""
+        return int(self._request('cursor')['acked_seq'])
+
+    def send(self, body, digest):
+        return self._request('changes', body, {
+            'Content-Type': 'application/x-ndjson',
+            'Content-Encoding': 'gzip',
+            'X-Batch-SHA256': digest,
+        })
+
+def push_changes(store, client, max_records=BATCH_RECORDS, max_bytes=BATCH_BYTES):
+    """
+    Курсордан кейинги барча ёзувларни пакетлаб юбориш.
+    Натижа: юборилган/қабул қилинган ёзувлар, зиддиятлар, пакетлар, байтлар ва курсор.
+    """
+    summary = {'sent': 0, 'applied': 0, 'duplicates': 0, 'conflicts': 0, 'batches': 0, 'bytes': 0}
+    acked_seq = client.cursor()
+    while True:
+        rows = next_batch(store, acked_seq, max_records, max_bytes)
+        if not rows:
+            break
+        body, digest = encode_batch(rows)
+        result = client.send(body, digest)
+        if result['acked_seq'] < rows[-1][0]:
+            raise SyncError(f"Марказий курсор ({result['acked_seq']}) пакет охиригача етмади ({rows[-1][0]})")
+        acked_seq = result['acked_seq']
+        summary['sent'] += len(rows)
+        summary['batches'] += 1
+        summary['bytes'] += len(body)
+        for key in ('applied', 'duplicates', 'conflicts'):
+            summary[key] += result[key]
+    summary['acked_seq'] = acked_seq
+    return summary
+
+class SyncAgent:
+    """
+    Фон синхронизацияси: интервал бўйича (ёки trigger() дан кейин дарҳол)
+    push_changes. Алоқа йўқ бўлса, кутиш вақти MAX_BACKOFF гача икки
+    баравар оширилади (исталган хатода ҳам); скрининг ва сақлаш
+    синхронизацияни кутмайди.
+    """
+
+    def __init__(self, store, base_url, site_id, interval=SYNC_INTERVAL):
+        self.store = store
+        self.client = SyncClient(base_url, site_id)
+        self.interval = interval
+        self.status = {'acked_seq': None, 'last_sync': None, 'last_error': None, 'failures': 0, 'sent': 0}
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="clinic-sync", daemon=True)
+        self._thread.start()
+
+    def trigger(self):
+        """Янги ёзув сақланди - кейинги юборишни кутмасдан бошлаш"""
+        self._wake.set()
+
+    def pending(self):
+        """Марказий омборга ҳали юборилмаган ёзувлар сони (курсор маълум бўлса)"""
+        acked_seq = self.status['acked_seq']
+        return None if acked_seq is None else max(self.store.max_sequence() - acked_seq, 0)
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        delay = 0
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                summary = push_changes(self.store, self.client)
+            except Exception as e:
+                # Кутилмаган хато ҳам оқимни тўхтатмайди - ҳолатда кўрсатилиб, кейинроқ қайта уринилади
+                self.status['failures'] += 1
+                self.status['last_error'] = (
+                    str(e) if isinstance(e, (OSError, SyncError, ValueError)) else f"{type(e).__name__}: {e}"
+                )
+                delay = min(self.interval * 2 ** self.status['failures'], MAX_BACKOFF)
+                continue
+            self.status.update(
+                acked_seq=summary['acked_seq'], last_sync=datetime.now().strftime(TIMESTAMP_FORMAT),
+                last_error=None, failures=0, sent=self.status['sent'] + summary['sent']
+            )
+            delay = self.interval
+
+# ==================== МАРКАЗИЙ ОМБОР (СЕРВЕР) ====================
+
+class SyncRequestHandler(BaseHTTPRequestHandler):
+    """GET /sync/<клиника>/cursor, POST /sync/<клиника>/changes"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _route(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 3 or parts[0] != 'sync' or not SITE_ID_PATTERN.match(parts[1]):
+            return None, None
+        return parts[1], parts[2]
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        site_id, action = self._route()
+        if action != 'cursor':
+            return self._reply(404, {'error': "Номаълум манзил"})
+        self._reply(200, {'acked_seq': self.server.store.sync_cursor(site_id)})
+
+    def do_POST(self):
+        site_id, action = self._route()
+        if action != 'changes':
+            return self._reply(404, {'error': "Номаълум манзил"})
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > MAX_REQUEST_BYTES:
+            return self._reply(413, {'error': "Пакет ҳажми нотўғри"})
+        body = self.rfile.read(length)
+        try:
+            changes = decode_batch(body, self.headers.get('X-Batch-SHA256', ''))
+        except (OSError, ValueError, KeyError, SyncError) as e:
+            return self._reply(400, {'error': str(e)})
+        self._reply(200, self.server.store.apply_remote_changes(site_id, changes))
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def make_server(store, host='127.0.0.1', port=8765, verbose=False):
+    """Марказий омбор сервери (серверни ишга тушириш - serve_forever())"""
+    server = ThreadingHTTPServer((host, port), SyncRequestHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.verbose = verbose
+    return server
+
+def main():
+    from patient_store import SQLitePatientStore
+
+    parser = argparse.ArgumentParser(description="Клиникалар ва марказий лаборатория синхронизацияси")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Марказий омбор серверини ишга тушириш")
+    serve_parser.add_argument('--db', required=True, help="Марказий SQLite омбори")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+
+    push_parser = subparsers.add_parser('push', help="Маҳаллий ўзгаришларни бир марта юбориш")
+    push_parser.add_argument('--db', required=True, help="Клиника SQLite омбори (SCREENING_DB_PATH)")
+    push_parser.add_argument('--site', required=True, help="Клиника идентификатори")
+    push_parser.add_argument('--url', required=True, help="Марказий омбор манзили")
+    push_parser.add_argument('--batch', type=int, default=BATCH_RECORDS, help="Пакетдаги ёзувлар сони")
+
+    status_parser = subparsers.add_parser('status', help="Марказий омбордаги клиникалар курсорлари")
+    status_parser.add_argument('--db', required=True, help="Марказий SQLite омбори")
+    args = parser.parse_args()
+
+    store = SQLitePatientStore(args.db)
+    try:
+        if args.command == 'serve':
+            server = make_server(store, args.host, args.port, verbose=True)
+            print(f"Марказий омбор: http://{args.host}:{args.port} ({args.db})")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            server.server_close()
+        elif args.command == 'push':
+            started = time.perf_counter()
+            summary = push_changes(store, SyncClient(args.url, args.site), max_records=args.batch)
+            print(f"Юборилди: {summary['sent']} ёзув, {summary['batches']} пакет, {summary['bytes'] / 1024:.1f} КБ "
+                  f"({time.perf_counter() - started:.2f} с); қабул қилинди: {summary['applied']}, "
+                  f"такрорий: {summary['duplicates']}, зиддият: {summary['conflicts']}; курсор: {summary['acked_seq']}")
+        else:
+            for site in store.sync_sites():
+                print(f"{site['site_id']:<32} {site['acked_seq']:>10} {site['last_sync']}  зиддият: {site['conflicts']}")
+    finally:
+        store.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
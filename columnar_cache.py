@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+УСТУНЛИ НАТИЖАЛАР КЕШИ (memory-mapped)
+Сақланган натижалар (ёш, муддат, барча MoM ва хавфлар) ҳар бир устун учун
+алоҳида NumPy файлига ёзилади. Файллар memmap орқали очилади - сифат назорати
+сўровлари JSON ёзувларни ўқимасдан, бир нечта жараёнда нусхасиз ишлайди:
+
+    cache = ColumnarResults("data/columns")
+    columns = cache.columns()
+    mask = cohort_mask(columns, week=12, month="2026-10", papp_a_mom=(None, 0.4))
+
+Ёзувчи (SQLitePatientStore) ҳар бир сақлашдан кейин қатор қўшади; қаторлар
+сони алоҳида сарлавҳа файлида маълумотлардан кейин янгиланади, шунинг учун
+ўқувчилар доим тўлиқ ёзилган қаторларни кўради.
+
+    python columnar_cache.py rebuild --db data/screening.db --dir data/columns
+    python columnar_cache.py query --dir data/columns --week 12 --month 2026-10 --max papp_a_mom=0.4
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows - фақат жараён ичидаги қулф
+    fcntl = None
+
+SCHEMA_VERSION = 1
+INITIAL_CAPACITY = 4096
+
+SCREENING_MODES = ('first', 'second', 'integrated')
+MOM_COLUMNS = ('nt_mom', 'papp_a_mom', 'free_beta_hcg_mom', 'afp_mom', 'total_hcg_mom', 'ue3_mom')
+RISK_COLUMNS = ('downs', 'edwards', 'patau', 'turner', 'ntd')
+
+COLUMNS = [
+    ('seq', 'i8'),
+    ('patient_id', 'S24'),
+    ('timestamp', 'M8[s]'),
+    ('screening_mode', 'i1'),
+    ('age', 'f8'),
+    ('gestational_age', 'i2'),
+    ('gestational_days', 'f8'),
+    ('weight', 'f8'),
+    ('covariate_code', 'i2'),
+    *[(name, 'f8') for name in MOM_COLUMNS],
+    *[(name, 'f8') for name in RISK_COLUMNS],
+]
+
+def record_row(seq, record):
+    """Сақланган ёзувдан устунлар қатори (йўқ MoM лар - NaN)"""
+    parameters = record.get('parameters', {})
+    risks = record.get('risks', {})
+    mode = record.get('screening_mode', record.get('screening_type', 'first'))
+    gestational_days = record.get('gestational_days')
+    return {
+        'seq': seq,
+        'patient_id': str(record.get('patient_id', '')).encode('utf-8')[:24],
+        'timestamp': np.datetime64(datetime.strptime(record['timestamp'], "%Y-%m-%d %H:%M:%S"), 's'),
+        'screening_mode': SCREENING_MODES.index(mode) if mode in SCREENING_MODES else 0,
+        'age': record.get('age', np.nan),
+        'gestational_age': record.get('gestational_age', 0),
+        'gestational_days': np.nan if gestational_days is None else gestational_days,
+        'weight': record.get('weight') or np.nan,
+        'covariate_code': record.get('covariate_code', 0),
+        **{name: parameters.get(name, np.nan) for name in MOM_COLUMNS},
+        **{name: risks.get(name, np.nan) for name in RISK_COLUMNS},
+    }
+
+class ColumnarResults:
+    """
+    Устунли кеш папкаси: meta.json, count (int64 сарлавҳа) ва ҳар бир устун
+    учун <номи>.col файли. Ёзиш файл қулфи остида, ўқиш қулфсиз.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writer = None      # {устун: memmap r+}, ёзувчи учун
+        self._capacity = 0
+        self._readers = None     # (қаторлар сони, {устун: memmap r})
+        self._ensure_layout()
+
+    # ---------- Файллар ----------
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _ensure_layout(self):
+        meta_path = self._path("meta.json")
+        with self._file_lock():
+            if os.path.exists(meta_path):
+                with open(meta_path, encoding='utf-8') as meta_file:
+                    meta = json.load(meta_file)
+                if meta.get('schema_version') != SCHEMA_VERSION or meta.get('columns') != [list(c) for c in COLUMNS]:
+                    raise ValueError(f"Устунли кеш схемаси мос эмас: {self.directory} (rebuild керак)")
+                return
+
+            for name, dtype in COLUMNS:
+                with open(self._path(f"{name}.col"), 'wb') as column_file:
+                    column_file.truncate(INITIAL_CAPACITY * np.dtype(dtype).itemsize)
+            self._write_count(0)
+            with open(meta_path, 'w', encoding='utf-8') as meta_file:
+                json.dump({'schema_version': SCHEMA_VERSION, 'columns': COLUMNS}, meta_file)
+
+    def _file_lock(self):
+        return _FileLock(self._path("lock"))
+
+    def _write_count(self, count):
+        with open(self._path("count"), 'r+b' if os.path.exists(self._path("count")) else 'wb') as count_file:
+            count_file.write(np.int64(count).tobytes())
+
+    def count(self):
+        """Ёзилган қаторлар сони"""
+        with open(self._path("count"), 'rb') as count_file:
+            return int(np.frombuffer(count_file.read(8), dtype=np.int64)[0])
+
+    def _file_capacity(self):
+        name, dtype = COLUMNS[0]
+        return os.path.getsize(self._path(f"{name}.col")) // np.dtype(dtype).itemsize
+
+    def _open_writer(self, capacity):
+        self._writer = {
+            name: np.memmap(self._path(f"{name}.col"), dtype=dtype, mode='r+', shape=(capacity,))
+            for name, dtype in COLUMNS
+        }
+        self._capacity = capacity
+
+    def _grow(self, needed):
+        """Файлларни икки баравар катталаштириш (мавжуд ўқувчилар эски узунликда ишлайверади)"""
+        capacity = max(self._file_capacity(), INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        for name, dtype in COLUMNS:
+            with open(self._path(f"{name}.col"), 'r+b') as column_file:
+                column_file.truncate(capacity * np.dtype(dtype).itemsize)
+        self._open_writer(capacity)
+
+    # ---------- Ёзиш ----------
+
+    def last_seq(self):
+        """Охирги ёзилган ёзувнинг seq рақами (бўш бўлса 0)"""
+        count = self.count()
+        if not count:
+            return 0
+        name, dtype = COLUMNS[0]
+        return int(np.memmap(self._path(f"{name}.col"), dtype=dtype, mode='r', shape=(count,))[count - 1])
+
+    def append(self, rows):
+        """
+        Қаторларни қўшиш (seq бўйича ўсувчи). Аввал ёзилган seq лар ўтказиб
+        юборилади - бир хил ёзувни қайта қўшиш хавфсиз.
+        """
+        with self._lock, self._file_lock():
+            count = self.count()
+            last = self.last_seq()
+            rows = [row for row in rows if row['seq'] > last]
+            if not rows:
+                return 0
+
+            file_capacity = self._file_capacity()
+            if self._writer is None or self._capacity != file_capacity:
+                self._open_writer(file_capacity)
+            if count + len(rows) > self._capacity:
+                self._grow(count + len(rows))
+
+            for name, _ in COLUMNS:
+                self._writer[name][count:count + len(rows)] = [row[name] for row in rows]
+            # Қаторлар сони маълумотлардан кейин - ўқувчилар ярим ёзилган қаторни кўрмайди.
+            # memmap саҳифалари жараёнлар орасида умумий, msync/fsync қилинмайди:
+            # кеш SQLite дан тикланади (операцион тизим қулаганда - rebuild)
+            self._write_count(count + len(rows))
+            return len(rows)
+
+    def sync(self, conn, batch_size=5000):
+        """SQLite уланишидан кешда йўқ ёзувларни қўшиш (seq бўйича), қўшилганлар сони"""
+        cursor = conn.execute("SELECT seq, record FROM patients WHERE seq > ? ORDER BY seq", (self.last_seq(),))
+        added = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return added
+            added += self.append([record_row(seq, json.loads(record)) for seq, record in rows])
+
+    def sync_from_store(self, db_path, batch_size=5000):
+        """SQLite омбори файлидан кешни тўлдириш (rebuild)"""
+        import sqlite3
+
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+        try:
+            return self.sync(conn, batch_size)
+        finally:
+            conn.close()
+
+    # ---------- Ўқиш ----------
+
+    def columns(self):
+        """Барча устунлар (фақат ўқиш учун memmap, нусхасиз)"""
+        count = self.count()
+        cached = self._readers
+        if cached is None or cached[0] != count:
+            arrays = {
+                name: np.memmap(self._path(f"{name}.col"), dtype=dtype, mode='r', shape=(count,))
+                if count else np.empty(0, dtype=dtype)
+                for name, dtype in COLUMNS
+            }
+            self._readers = cached = (count, arrays)
+        return cached[1]
+
+class _FileLock:
+    """Жараёнлар орасидаги ёзиш қулфи (fcntl.flock)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+
+# ==================== СЎРОВЛАР ====================
+
+def cohort_mask(columns, screening_mode=None, week=None, month=None, since=None, until=None, **bounds):
+    """
+    Устунлар бўйича филтр маскаси.
+    month - "ЙЙЙЙ-ОО", since/until - "ЙЙЙЙ-ОО-КК"; bounds - устун=(энг кам, энг кўп),
+    чегаралар қатъий (энг кам < қиймат < энг кўп), None - чегарасиз.
+    """
+    mask = np.ones(len(columns['seq']), dtype=bool)
+    if screening_mode is not None:
+        mask &= columns['screening_mode'] == SCREENING_MODES.index(screening_mode)
+    if week is not None:
+        mask &= columns['gestational_age'] == week
+    if month is not None:
+        start = np.datetime64(month, 'M')
+        mask &= (columns['timestamp'] >= start.astype('M8[s]')) & (columns['timestamp'] < (start + 1).astype('M8[s]'))
+    if since is not None:
+        mask &= columns['timestamp'] >= np.datetime64(since, 's')
+    if until is not None:
+        mask &= columns['timestamp'] < np.datetime64(until, 'D').astype('M8[s]') + np.timedelta64(1, 'D')
+    for name, (low, high) in bounds.items():
+        if low is not None:
+            mask &= columns[name] > low
+        if high is not None:
+            mask &= columns[name] < high
+    return mask
+
+def cohort_summary(columns, mask):
+    """Танланган гуруҳ бўйича агрегатлар: сони, MoM медианалари, хавфлар ўртачаси"""
+    selected = int(np.count_nonzero(mask))
+    summary = {'count': selected}
+    if not selected:
+        return summary
+    for name in MOM_COLUMNS:
+        values = columns[name][mask]
+        values = values[~np.isnan(values)]
+        if len(values):
+            summary[f"{name}_median"] = float(np.median(values))
+    for name in RISK_COLUMNS:
+        summary[f"{name}_mean"] = float(np.nanmean(columns[name][mask]))
+    return summary
+
+def _parse_bounds(items, index):
+    bounds = {}
+    for item in items or []:
+        name, value = item.split('=', 1)
+        low, high = bounds.get(name, (None, None))
+        bounds[name] = (float(value), high) if index == 0 else (low, float(value))
+    return bounds
+
+def main():
+    parser = argparse.ArgumentParser(description="Устунли натижалар кеши")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rebuild_parser = subparsers.add_parser('rebuild', help="SQLite омборидан кешни тўлдириш")
+    rebuild_parser.add_argument('--db', required=True)
+    rebuild_parser.add_argument('--dir', required=True)
+
+    query_parser = subparsers.add_parser('query', help="Гуруҳ бўйича сўров")
+    query_parser.add_argument('--dir', required=True)
+    query_parser.add_argument('--mode', choices=SCREENING_MODES)
+    query_parser.add_argument('--week', type=int)
+    query_parser.add_argument('--month', help="ЙЙЙЙ-ОО")
+    query_parser.add_argument('--min', action='append', help="устун=қиймат (қиймат > чегара)")
+    query_parser.add_argument('--max', action='append', help="устун=қиймат (қиймат < чегара)")
+    args = parser.parse_args()
+
+    cache = ColumnarResults(args.dir)
+    if args.command == 'rebuild':
+        print(f"Қўшилди: {cache.sync_from_store(args.db)}, жами: {cache.count()}")
+        return 0
+
+    bounds = _parse_bounds(args.min, 0)
+    for name, (_, high) in _parse_bounds(args.max, 1).items():
+        bounds[name] = (bounds.get(name, (None, None))[0], high)
+    columns = cache.columns()
+    mask = cohort_mask(columns, args.mode, args.week, args.month, **bounds)
+    for key, value in cohort_summary(columns, mask).items():
+        print(f"{key:<24} {value}")
+    for patient_id in columns['patient_id'][mask][:20]:
+        print(patient_id.decode('utf-8'))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
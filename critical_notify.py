@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+КРИТИК НАТИЖАЛАР ҲАҚИДА ХАБАР ЮБОРИШ
+Сақланган натижа КРИТИК ёки ЖУДА ЮҚОРИ бўлса, йўлланма берган шифокорга
+email (SMTP) ёки webhook орқали хабар юборилади. Ҳисоблаш фақат SQLite
+навбатига (outbox) ёзади ва кутмайди; фон оқими навбатни қисқа ойна
+давомида йиғиб, бир шифокорга тегишли натижаларни битта хабарга
+бирлаштиради ва шифокорларга параллел юборади. SMTP ва HTTP уланишлари
+хабарлар орасида очиқ қолади (қайта ишлатилади); хатоликда хабар кутиш
+вақти икки баравар ошиб қайта юборилади.
+
+Қабул қилувчилар notify.json (ёки SCREENING_NOTIFY_CONFIG) да:
+
+    {"smtp": {"host": "localhost", "port": 8025, "sender": "screening@lab.uz"},
+     "default": "email:lab-critical@lab.uz",
+     "clinicians": {"Алиева Д.": "email:aliyeva@clinic.uz",
+                    "tuman-3": "webhook:http://clinic3.local/hooks/critical"}}
+
+    python critical_notify.py smtp-sink --port 8025            # маҳаллий SMTP ўрнини босувчи
+    python critical_notify.py scan --db data/screening.db      # сақланган ёзувлардан навбатга
+    python critical_notify.py send                             # навбатни юбориб тугатиш
+    python critical_notify.py status
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import smtplib
+import socketserver
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.message import EmailMessage
+
+from risk_engine import SYNDROME_DESCRIPTIONS, format_risk_display, get_highest_risk, get_risk_category
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+DEFAULT_NOTIFY_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "notify.json")
+DEFAULT_OUTBOX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "notify.db")
+
+# Хабар юбориладиган хавф категориялари (get_risk_category)
+CRITICAL_CATEGORIES = ("КРИТИК", "ЖУДА ЮҚОРИ")
+SYNDROMES = ['downs', 'edwards', 'patau', 'turner', 'ntd']
+
+# Биринчи натижадан кейин бир шифокорга натижаларни йиғиш ойнаси (сония) ва хабардаги энг кўп натижалар
+COALESCE_WINDOW = 2.0
+MAX_BATCH = 200
+# Бир шифокорга юбориш параллел, ҳар бир шифокорга - кетма-кет
+SEND_WORKERS = 4
+
+# Қайта юбориш: кутиш BASE_BACKOFF * 2^уриниш (MAX_BACKOFF гача), MAX_ATTEMPTS дан кейин - failed
+BASE_BACKOFF = 5.0
+MAX_BACKOFF = 900.0
+MAX_ATTEMPTS = 10
+
+# Жараён қулаб, 'sending' ҳолатида қолган хабарлар шу вақтдан кейин қайта навбатга
+CLAIM_TIMEOUT = 300.0
+
+# Ишлатилмаган уланишлар шу вақтдан кейин ёпилади (сония)
+IDLE_CONNECTION_TTL = 60.0
+
+HTTP_TIMEOUT = 10.0
+
+OUTBOX_STATUSES = {
+    'pending': "Навбатда",
+    'sending': "Юборилмоқда",
+    'sent': "Юборилди",
+    'failed': "Юборилмади",
+}
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedup_key TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    clinician TEXT NOT NULL DEFAULT '',
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT,
+    created TEXT NOT NULL,
+    sent TEXT,
+    UNIQUE (dedup_key, recipient)
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt);
+"""
+
+class NotifyError(Exception):
+    """Хабарни юбориб бўлмади (қайта уриниш мумкин)"""
+
+# ==================== ҚАБУЛ ҚИЛУВЧИЛАР ====================
+
+def parse_recipient(text):
+    """'email:манзил' ёки 'webhook:URL' -> (канал, манзил)"""
+    channel, _, address = str(text).partition(":")
+    channel = channel.strip().lower()
+    address = address.strip()
+    if channel == 'email' and "@" in address:
+        return channel, address
+    if channel == 'webhook' and urllib.parse.urlsplit(address).scheme in ('http', 'https'):
+        return channel, address
+    raise ValueError(f"Нотўғри қабул қилувчи: {text!r} ('email:манзил' ёки 'webhook:http://...')")
+
+def load_notify_config(path=None):
+    """Хабарлар конфигурацияси; файл бўлмаса None (хабарлар ўчирилган)"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as config_file:
+        config = json.load(config_file)
+
+    recipients = [config.get('default'), *config.get('clinicians', {}).values()]
+    for recipient in filter(None, recipients):
+        channel, _ = parse_recipient(recipient)
+        if channel == 'email' and not smtp_configured(config):
+            raise ValueError(f"{path}: email қабул қилувчилари учун smtp.host керак")
+    return config
+
+def smtp_configured(config):
+    return bool((config.get('smtp') or {}).get('host'))
+
+def resolve_recipient(config, clinician):
+    """
+    Шифокор учун қабул қилувчи: email манзили (фақат SMTP созланган бўлса),
+    конфигурациядаги ном ёки default (йўқ бўлса None)
+    """
+    clinician = (clinician or "").strip()
+    if "@" in clinician and ":" not in clinician and smtp_configured(config):
+        return f"email:{clinician}"
+    return config.get('clinicians', {}).get(clinician) or config.get('default')
+
+# ==================== КРИТИК НАТИЖАЛАР ====================
+
+def critical_item(record):
+    """Ёзув КРИТИК ёки ЖУДА ЮҚОРИ бўлса - хабар учун қисқа маълумот, акс ҳолда None"""
+    risks = record.get('risks') or {}
+    syndrome, risk = get_highest_risk(risks)
+    category = get_risk_category(risk)[0]
+    if category not in CRITICAL_CATEGORIES:
+        return None
+    return {
+        'patient_id': record.get('patient_id'),
+        'name': record.get('name'),
+        'age': record.get('age'),
+        'gestational_age': record.get('gestational_age'),
+        'screening_type': record.get('screening_mode', record.get('screening_type')),
+        'syndrome': SYNDROME_DESCRIPTIONS[syndrome]['name'],
+        'risk': risk,
+        'risk_display': format_risk_display(risk),
+        'category': category,
+        'lab_id': record.get('lab_id'),
+        'timestamp': record.get('timestamp'),
+    }
+
+def frame_critical_items(frame, source, first_row=0, lab_id=None):
+    """Оммавий ҳисоблаш натижалари (бўлак) дан критик қаторлар: [(калит, шифокор, маълумот)]"""
+    risk_columns = [f"{syndrome}_risk" for syndrome in SYNDROMES]
+    items = []
+    for offset, row in enumerate(frame.to_dict('records')):
+        if row.get('category') not in CRITICAL_CATEGORIES:
+            continue
+        risks = {syndrome: row[column] for syndrome, column in zip(SYNDROMES, risk_columns) if row[column] == row[column]}
+        syndrome, risk = get_highest_risk(risks)
+        clinician = row.get('clinician')
+        items.append((f"{source}#{first_row + offset + 1}", clinician.strip() if isinstance(clinician, str) else "", {
+            'patient_id': f"{source} қатор {first_row + offset + 1}",
+            'name': row.get('name'),
+            'age': row.get('age'),
+            'gestational_age': row.get('gestational_age'),
+            'screening_type': row.get('screening_type'),
+            'syndrome': SYNDROME_DESCRIPTIONS[syndrome]['name'],
+            'risk': risk,
+            'risk_display': format_risk_display(risk),
+            'category': row['category'],
+            'lab_id': lab_id,
+            'timestamp': datetime.now().strftime(TIMESTAMP_FORMAT),
+        }))
+    return items
+
+# ==================== НАВБАТ (OUTBOX) ====================
+
+class NotificationOutbox:
+    """
+    Юбориладиган хабарлар SQLite навбати (бир нечта жараён учун умумий).
+    Бир хил натижа бир шифокорга фақат бир марта ёзилади (dedup_key).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(OUTBOX_SCHEMA)
+
+    def enqueue(self, entries):
+        """[(калит, қабул қилувчи, шифокор, маълумот)] қўшиш, янги қўшилганлар сони"""
+        now = time.time()
+        created = datetime.now().strftime(TIMESTAMP_FORMAT)
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO outbox (dedup_key, recipient, clinician, payload, next_attempt, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(key, recipient, clinician, json.dumps(item, ensure_ascii=False, default=str), now, created)
+                     for key, recipient, clinician, item in entries],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._conn.total_changes - before
+
+    def claim_due(self, limit):
+        """Вақти келган хабарларни олиш ('sending'): [(id, қабул қилувчи, шифокор, маълумот, уринишлар)]"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE outbox SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?",
+                    (now - CLAIM_TIMEOUT,),
+                )
+                rows = self._conn.execute(
+                    "SELECT id, recipient, clinician, payload, attempts FROM outbox "
+                    "WHERE status = 'pending' AND next_attempt <= ? ORDER BY id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?", [(now, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(row_id, recipient, clinician, json.loads(payload), attempts)
+                for row_id, recipient, clinician, payload, attempts in rows]
+
+    def mark_sent(self, ids):
+        sent = datetime.now().strftime(TIMESTAMP_FORMAT)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'sent', sent = ?, last_error = NULL, attempts = attempts + 1 WHERE id = ?",
+                [(sent, row_id) for row_id in ids],
+            )
+
+    def mark_retry(self, ids, attempts, error):
+        """Хатолик: уринишлар сони ошади, кейинги уриниш вақти - экспоненциал кутиш (життер билан)"""
+        attempts += 1
+        status = 'failed' if attempts >= MAX_ATTEMPTS else 'pending'
+        delay = min(BASE_BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF) * random.uniform(0.8, 1.2)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                [(status, attempts, time.time() + delay, error, row_id) for row_id in ids],
+            )
+
+    def next_due(self):
+        """Энг яқин уриниш вақти (навбат бўш бўлса None)"""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def stats(self):
+        """Ҳолатлар бўйича хабарлар сони"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def failures(self, limit=20):
+        """Охирги юборилмаган хабарлар: (қабул қилувчи, калит, уринишлар, хато)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT recipient, dedup_key, attempts, last_error FROM outbox WHERE status = 'failed' "
+                "ORDER BY id DESC LIMIT ?", (limit,),
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ==================== УЛАНИШЛАР ВА ЮБОРИШ ====================
+
+# Қайта ишлатилган уланиш сервер томонидан ёпилган бўлса - янги уланиш билан бир марта такрорланади
+STALE_CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected, http.client.RemoteDisconnected, http.client.CannotSendRequest,
+    ConnectionResetError, BrokenPipeError,
+)
+
+def _close_connection(connection):
+    try:
+        if isinstance(connection, smtplib.SMTP):
+            connection.quit()
+        else:
+            connection.close()
+    except (OSError, smtplib.SMTPException):
+        pass
+
+class ConnectionPool:
+    """Очиқ SMTP/HTTP уланишлари (сервер бўйича) - хабарлар орасида қайта ишлатилади"""
+
+    def __init__(self, idle_ttl=IDLE_CONNECTION_TTL):
+        self.idle_ttl = idle_ttl
+        self.opened = 0
+        self._lock = threading.Lock()
+        self._idle = {}   # калит -> [(уланиш, охирги ишлатилган вақт)]
+
+    def _open(self, factory):
+        connection = factory()
+        with self._lock:
+            self.opened += 1
+        return connection
+
+    def use(self, key, factory, action):
+        """Бўш уланиш (ёки янгиси) билан action(уланиш); эскирган уланишда бир марта янгиси билан"""
+        with self._lock:
+            idle = self._idle.get(key)
+            connection = idle.pop()[0] if idle else None
+        reused = connection is not None
+        if connection is None:
+            connection = self._open(factory)
+        try:
+            try:
+                result = action(connection)
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                _close_connection(connection)
+                connection = self._open(factory)
+                result = action(connection)
+        except BaseException:
+            _close_connection(connection)
+            raise
+        with self._lock:
+            self._idle.setdefault(key, []).append((connection, time.monotonic()))
+        return result
+
+    def close_idle(self, max_idle=None):
+        """max_idle сониядан кўп ишлатилмаган уланишларни ёпиш (None - idle_ttl, 0 - барчаси)"""
+        max_idle = self.idle_ttl if max_idle is None else max_idle
+        now = time.monotonic()
+        with self._lock:
+            stale = []
+            for key, entries in self._idle.items():
+                stale += [connection for connection, last_used in entries if now - last_used >= max_idle]
+                entries[:] = [(connection, last_used) for connection, last_used in entries if now - last_used < max_idle]
+        for connection in stale:
+            _close_connection(connection)
+
+def format_message(clinician, items):
+    """Шифокор учун хабар: (мавзу, матн)"""
+    critical = sum(item['category'] == "КРИТИК" for item in items)
+    subject = f"Скрининг: {len(items)} та юқори хавфли натижа" + (f" ({critical} та КРИТИК)" if critical else "")
+    lines = [f"Ҳурматли {clinician}," if clinician else "Ассалому алайкум,", "",
+             "Қуйидаги беморларда генетик скрининг натижаси юқори хавфли:", ""]
+    for item in sorted(items, key=lambda item: -item['risk']):
+        lines.append(
+            f"- {item['patient_id']} | {item['name']} | {item['age']} ёш | {item['gestational_age']} ҳафта | "
+            f"{item['syndrome']}: {item['risk_display']} ({item['category']})"
+        )
+    lines += ["", "Натижалар дастурда тўлиқ кўрсатилган. Бу хабар автоматик юборилди."]
+    return subject, "\n".join(lines)
+
+def send_email(pool, smtp_config, address, clinician, items):
+    """Битта email (SMTP уланиши қайта ишлатилади)"""
+    subject, body = format_message(clinician, items)
+    message = EmailMessage()
+    message['Subject'] = subject
+    message['From'] = smtp_config.get('sender', "screening@localhost")
+    message['To'] = address
+    message.set_content(body)
+
+    host, port = smtp_config['host'], int(smtp_config.get('port', 25))
+
+    def connect():
+        connection = smtplib.SMTP(host, port, timeout=smtp_config.get('timeout', HTTP_TIMEOUT))
+        if smtp_config.get('starttls'):
+            connection.starttls()
+        if smtp_config.get('username'):
+            connection.login(smtp_config['username'], smtp_config.get('password', ""))
+        return connection
+
+    pool.use(('smtp', host, port), connect, lambda connection: connection.send_message(message))
+
+def send_webhook(pool, url, clinician, items, timeout=HTTP_TIMEOUT):
+    """Битта JSON POST (HTTP keep-alive уланиши қайта ишлатилади)"""
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    body = json.dumps({'clinician': clinician, 'results': items}, ensure_ascii=False, default=str).encode('utf-8')
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+
+    def post(connection):
+        connection.request("POST", path, body, {"Content-Type": "application/json; charset=utf-8"})
+        response = connection.getresponse()
+        response.read()
+        if response.status >= 300:
+            raise NotifyError(f"Webhook {url}: HTTP {response.status}")
+
+    pool.use(('http', parts.scheme, parts.netloc), lambda: connection_class(parts.netloc, timeout=timeout), post)
+
+# ==================== ФОН ЮБОРУВЧИ ====================
+
+class NotificationDispatcher:
+    """
+    Навбатга ёзиш (enqueue_record/enqueue_frame) ва фон оқимида юбориш.
+    Янги хабардан кейин COALESCE_WINDOW кутилади - планшетнинг барча
+    критик натижалари шифокорлар бўйича битта хабарга бирлашади; шифокорлар
+    SEND_WORKERS оқимда параллел юборилади.
+    """
+
+    def __init__(self, db_path, config, coalesce_window=COALESCE_WINDOW, poll_interval=30.0):
+        self.outbox = NotificationOutbox(db_path)
+        self.config = config
+        self.coalesce_window = coalesce_window
+        self.poll_interval = poll_interval
+        self.pool = ConnectionPool()
+        self.status = {'last_batch': None, 'last_error': None, 'sent': 0, 'messages': 0}
+
+        self._executor = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix="notify-send")
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="critical-notify", daemon=True)
+        self._thread.start()
+
+    def enqueue_record(self, record):
+        """Сақланган ёзув критик бўлса навбатга қўйиш; қабул қилувчи (олдин қўйилган бўлса ҳам None)"""
+        item = critical_item(record)
+        recipient = resolve_recipient(self.config, record.get('clinician')) if item else None
+        if recipient is None:
+            return None
+        key = f"{record.get('lab_id') or ''}/{record.get('patient_id')}"
+        if not self.outbox.enqueue([(key, recipient, record.get('clinician') or "", item)]):
+            return None
+        self._wake.set()
+        return recipient
+
+    def enqueue_frame(self, frame, source, first_row=0, lab_id=None):
+        """Оммавий ҳисоблаш бўлагидаги критик қаторларни навбатга қўйиш, қўшилганлар сони"""
+        entries = []
+        for key, clinician, item in frame_critical_items(frame, source, first_row, lab_id):
+            recipient = resolve_recipient(self.config, clinician)
+            if recipient:
+                entries.append((key, recipient, clinician, item))
+        added = self.outbox.enqueue(entries) if entries else 0
+        if added:
+            self._wake.set()
+        return added
+
+    def trigger(self):
+        self._wake.set()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        self.pool.close_idle(0)
+        self.outbox.close()
+
+    def drain(self, timeout=60.0):
+        """Навбатдаги (вақти келган) барча хабарларни дарҳол юбориш - CLI учун"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.send_due():
+                continue
+            # Фон оқими олган хабарлар юборилиб тугашини кутиш; қайта уринишлар кейинроқ
+            next_due = self.outbox.next_due()
+            if not self.outbox.stats().get('sending') and (next_due is None or next_due > time.time()):
+                return
+            time.sleep(0.1)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                next_due = self.outbox.next_due()
+                delay = self.poll_interval if next_due is None else min(max(next_due - time.time(), 0), self.poll_interval)
+                if self._wake.wait(delay):
+                    # Янги натижалар: бир шифокорнинг бошқа натижалари ҳам келиши учун қисқа кутиш
+                    self._stop.wait(self.coalesce_window)
+                self._wake.clear()
+                if self._stop.is_set():
+                    return
+                while self.send_due():
+                    pass
+                self.pool.close_idle()
+            except Exception as e:
+                # Оқим тўхтамайди: хато ҳолатда кўрсатилади, кейинги уриниш кутишдан сўнг
+                self.status['last_error'] = f"{type(e).__name__}: {e}"
+                self._stop.wait(BASE_BACKOFF)
+
+    def send_due(self, limit=MAX_BATCH * SEND_WORKERS * 4):
+        """Вақти келган хабарларни шифокорлар бўйича бирлаштириб юбориш, юборилган натижалар сони"""
+        rows = self.outbox.claim_due(limit)
+        if not rows:
+            return 0
+
+        batches = {}
+        for row_id, recipient, clinician, item, attempts in rows:
+            batches.setdefault((recipient, clinician, attempts), []).append((row_id, item))
+
+        futures = []
+        for (recipient, clinician, attempts), entries in batches.items():
+            for start in range(0, len(entries), MAX_BATCH):
+                chunk = entries[start:start + MAX_BATCH]
+                futures.append((self._executor.submit(self._send, recipient, clinician, [item for _, item in chunk]),
+                                [row_id for row_id, _ in chunk], attempts))
+
+        sent = 0
+        for future, ids, attempts in futures:
+            try:
+                future.result()
+            except Exception as e:
+                # Ҳар қандай хато - хабар қайта навбатга (MAX_ATTEMPTS дан кейин failed), 'sending' да қолмайди
+                error = f"{type(e).__name__}: {e}"
+                self.outbox.mark_retry(ids, attempts, error)
+                self.status['last_error'] = error
+                continue
+            self.outbox.mark_sent(ids)
+            sent += len(ids)
+            self.status['messages'] += 1
+        self.status['sent'] += sent
+        self.status['last_batch'] = datetime.now().strftime(TIMESTAMP_FORMAT)
+        return len(rows)
+
+    def _send(self, recipient, clinician, items):
+        channel, address = parse_recipient(recipient)
+        if channel == 'email':
+            if not smtp_configured(self.config):
+                raise NotifyError(f"{address}: SMTP созланмаган (notify.json да smtp.host йўқ)")
+            send_email(self.pool, self.config['smtp'], address, clinician, items)
+        else:
+            send_webhook(self.pool, address, clinician, items, self.config.get('webhook_timeout', HTTP_TIMEOUT))
+
+# ==================== МАҲАЛЛИЙ SMTP (СИНОВ УЧУН) ====================
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Энг оддий SMTP сервер: хабарларни қабул қилиб, экранга (ва папкага) ёзади"""
+
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('utf-8'))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self._reply("220 screening-sink ESMTP")
+        mail_from, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self._reply("250 screening-sink")
+            elif verb == 'MAIL':
+                mail_from, recipients = command[10:].strip(), []
+                self._reply("250 OK")
+            elif verb == 'RCPT':
+                recipients.append(command[8:].strip())
+                self._reply("250 OK")
+            elif verb == 'DATA':
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    data.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                server.deliver(mail_from, recipients, b"".join(data))
+                self._reply("250 OK")
+            elif verb == 'RSET':
+                mail_from, recipients = None, []
+                self._reply("250 OK")
+            elif verb == 'NOOP':
+                self._reply("250 OK")
+            elif verb == 'QUIT':
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, out_dir=None, quiet=False):
+        super().__init__(address, SMTPSinkHandler)
+        self.out_dir = out_dir
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+    def deliver(self, mail_from, recipients, data):
+        from email import message_from_bytes, policy
+
+        message = message_from_bytes(data, policy=policy.default)
+        with self.lock:
+            self.messages.append(message)
+            number = len(self.messages)
+        if self.out_dir:
+            with open(os.path.join(self.out_dir, f"message-{number:06d}.eml"), 'wb') as message_file:
+                message_file.write(data)
+        if not self.quiet:
+            print(f"[{number}] {mail_from} -> {', '.join(recipients)}: {message['Subject']}", flush=True)
+
+# ==================== CLI ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="Критик натижалар ҳақида хабарлар")
+    parser.add_argument('--config', default=os.environ.get("SCREENING_NOTIFY_CONFIG", DEFAULT_NOTIFY_CONFIG_PATH))
+    parser.add_argument('--outbox', default=os.environ.get("SCREENING_NOTIFY_DB", DEFAULT_OUTBOX_PATH))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    sink_parser = subparsers.add_parser('smtp-sink', help="Маҳаллий SMTP ўрнини босувчи сервер")
+    sink_parser.add_argument('--host', default="127.0.0.1")
+    sink_parser.add_argument('--port', type=int, default=8025)
+    sink_parser.add_argument('--out', help="Хабарлар (.eml) папкаси")
+    scan_parser = subparsers.add_parser('scan', help="Сақланган ёзувлардан критик натижаларни навбатга қўйиш")
+    scan_parser.add_argument('--db', required=True, help="SQLite беморлар омбори")
+    subparsers.add_parser('send', help="Навбатни юбориб тугатиш")
+    subparsers.add_parser('status', help="Навбат ҳолати")
+    args = parser.parse_args()
+
+    if args.command == 'smtp-sink':
+        with SMTPSink((args.host, args.port), args.out) as server:
+            print(f"SMTP: {args.host}:{args.port}", flush=True)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+    if args.command == 'status':
+        outbox = NotificationOutbox(args.outbox)
+        for status, label in OUTBOX_STATUSES.items():
+            print(f"{label:<12} {outbox.stats().get(status, 0)}")
+        for recipient, key, attempts, error in outbox.failures():
+            print(f"  {recipient} {key} ({attempts} уриниш): {error}")
+        return 0
+
+    config = load_notify_config(args.config)
+    if config is None:
+        print(f"Конфигурация топилмади: {args.config}", file=sys.stderr)
+        return 1
+    dispatcher = NotificationDispatcher(args.outbox, config, coalesce_window=0)
+    try:
+        if args.command == 'scan':
+            from patient_store import iter_store_records
+
+            queued = sum(dispatcher.enqueue_record(record) is not None for record in iter_store_records(args.db))
+            print(f"Навбатга қўйилди: {queued}")
+        dispatcher.drain()
+        print(f"Юборилди: {dispatcher.status['sent']} натижа, {dispatcher.status['messages']} хабар; "
+              f"навбат: {dispatcher.outbox.stats()}")
+    finally:
+        dispatcher.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ҚАРОР ЖАДВАЛИ
+risk_engine даги маркер қоидалари (MARKER_RULES, QUAD_RULES, NTD_RULES) ҳар бир
+MoM бўйича бўлак-бўлак ўзгармас. Юклашда улар компиляция қилинади:
+
+- ҳар бир маркер учун чегаралар (bin edges) - np.searchsorted орқали бин индекси;
+  чегаранинг ўзи алоҳида бин (қатъий < ва > шартлари учун), NaN - охирги бин;
+- ҳар бир синдром учун маркер бинлари бўйича кўпайтирувчилар (ва уларнинг зич тензори).
+
+Ҳисоблаш бир нечта бутун сонли индекс ва кўпайтмага айланади; натижа асл
+calculate_syndrome_risks билан битма-бит бир хил.
+
+    python decision_table.py verify            # асл функция билан тўлиқ тўр бўйича солиштириш
+    python decision_table.py verify --sample 5000  # қисқартирилган тасодифий тўр
+    python decision_table.py export table.json # жадвални экспорт қилиш
+    python decision_table.py show downs        # синдром тензорини кўриш
+"""
+
+import argparse
+import itertools
+import json
+import math
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from risk_engine import (
+    AGE_RISK_MULTIPLIERS, BASE_RISKS, ENGINE_VERSION, MARKER_RULES, NTD_RULES, QUAD_RULES, QUAD_WEIGHTS,
+    calculate_syndrome_risks, get_age_risk_multiplier_array,
+)
+
+MARKERS = ('nt_mom', 'papp_mom', 'hcg_mom', 'afp_mom', 'total_hcg_mom', 'ue3_mom')
+SYNDROMES = tuple(MARKER_RULES)
+
+# Асл функциядаги all([afp_mom, total_hcg_mom, ue3_mom]) шарти учун 0 ҳам чегара
+QUAD_ZERO_EDGE = 0.0
+
+def _apply_chain(value, chain, default=1.0):
+    """if/elif занжири: биринчи бажарилган шартнинг қиймати (NaN - ҳеч бир шарт бажарилмайди)"""
+    for operator, threshold, result in chain:
+        if (value < threshold) if operator == '<' else (value > threshold):
+            return result
+    return default
+
+def _search_points(edges):
+    """
+    searchsorted учун нуқталар: ҳар бир чегара ва ундан кейинги float, охирида NaN.
+    side='right' бўлганда индекс: чегаралар орасидаги оралиқлар жуфт (0, 2, ..., 2n),
+    чегаранинг ўзи тоқ (1, 3, ..., 2n-1), NaN - 2n+1 (NumPy NaN ни энг охирига қўяди)
+    """
+    points = []
+    for edge in edges:
+        points.extend([edge, np.nextafter(edge, np.inf)])
+    points.append(np.nan)
+    return np.array(points)
+
+def _representatives(edges):
+    """Ҳар бир бин учун битта вакил қиймат (бин ичида барча шартлар бир хил)"""
+    points = []
+    for index in range(len(edges) + 1):
+        if index == 0:
+            points.append(edges[0] - 1.0)
+        elif index == len(edges):
+            points.append(edges[-1] + 1.0)
+        else:
+            points.append((edges[index - 1] + edges[index]) / 2)
+        if index < len(edges):
+            points.append(edges[index])
+    points.append(math.nan)
+    return points
+
+def _bin_label(edges, index):
+    """Бин оралиғи матн кўринишида"""
+    if index == 2 * len(edges) + 1:
+        return "NaN"
+    if index % 2:
+        return f"={edges[index // 2]:g}"
+    k = index // 2
+    if k == 0:
+        return f"<{edges[0]:g}"
+    if k == len(edges):
+        return f">{edges[-1]:g}"
+    return f"{edges[k - 1]:g}..{edges[k]:g}"
+
+class DecisionTable:
+    """Компиляция қилинган қоидалар: маркер чегаралари ва синдром тензорлари (lab - ёш жадвали учун)"""
+
+    def __init__(self, lab=None):
+        self.lab = lab
+        thresholds = {marker: set() for marker in MARKERS}
+        for rules in MARKER_RULES.values():
+            for marker, chain in rules.items():
+                thresholds[marker].update(threshold for _, threshold, _ in chain)
+        for marker, chain in QUAD_RULES.items():
+            thresholds[marker].update(threshold for _, threshold, _ in chain)
+            thresholds[marker].add(QUAD_ZERO_EDGE)
+        thresholds['afp_mom'].update(threshold for _, threshold, _ in NTD_RULES)
+
+        self.edges = {marker: np.array(sorted(values)) for marker, values in thresholds.items()}
+        self.representatives = {marker: _representatives(edges) for marker, edges in self.edges.items()}
+        self._search = {marker: _search_points(edges) for marker, edges in self.edges.items()}
+
+        # Ёш эгри чизиғи бутун ёшлар учун олдиндан ҳисобланган (жадвал чегарасидан ташқари - четки қиймат)
+        age_table = AGE_RISK_MULTIPLIERS if lab is None else lab.age_risk_multipliers
+        self.age_range = (min(age_table), max(age_table))
+        whole_ages = np.arange(self.age_range[0], self.age_range[1] + 1, dtype=float)
+        self.age_curves = {
+            syndrome: get_age_risk_multiplier_array(whole_ages, syndrome, lab) for syndrome in SYNDROMES
+        }
+
+        # Синдромлар: ўқлар - MARKER_RULES даги маркерлар тартиби. Ҳисоблашда ҳар бир ўқнинг
+        # кўпайтирувчилари асл тартибда қўлланади (base * ёш * m1 * m2 * m3): зич тензор
+        # кўпайтмаси яхлитлаш тартибини ўзгартиради ва 1:250 каби чегарага аниқ тушган
+        # хавфларда категория ўзгаради. Зич тензор кўриш ва экспорт учун
+        self.axes = {syndrome: tuple(rules) for syndrome, rules in MARKER_RULES.items()}
+        self.factors = {
+            syndrome: [self._factors(marker, chain) for marker, chain in rules.items()]
+            for syndrome, rules in MARKER_RULES.items()
+        }
+        self.tensors = {syndrome: self._compile(MARKER_RULES[syndrome]) for syndrome in SYNDROMES}
+
+        # Иккиламчи коррекция: ўқлар QUAD_RULES тартибида; 0 MoM бўлса коррекция йўқ
+        self.quad_axes = tuple(QUAD_RULES)
+        quad = self._compile(QUAD_RULES)
+        zero = np.zeros(quad.shape, dtype=bool)
+        for axis, marker in enumerate(self.quad_axes):
+            zero_bin = 2 * int(np.searchsorted(self.edges[marker], QUAD_ZERO_EDGE)) + 1
+            index = [slice(None)] * quad.ndim
+            index[axis] = zero_bin
+            zero[tuple(index)] = True
+        # Асл функцияда бутун блок (вазн билан бирга) ўтказиб юборилади
+        self.quad = np.where(zero, 1.0, quad)
+        self.quad_weighted = {
+            syndrome: np.where(zero, 1.0, quad * weight) for syndrome, weight in QUAD_WEIGHTS.items()
+        }
+
+        # НТД: AFP бинлари бўйича мутлақ хавф
+        self.ntd = np.array([
+            min(_apply_chain(value, NTD_RULES, BASE_RISKS['ntd']), 0.5)
+            for value in self.representatives['afp_mom']
+        ])
+
+    def _factors(self, marker, chain):
+        """Битта занжирнинг маркер бинлари бўйича кўпайтирувчилари"""
+        return np.array([_apply_chain(value, chain) for value in self.representatives[marker]])
+
+    def _compile(self, rules):
+        """Маркерлар бинлари бўйича зич кўпайтирувчилар тензори (асл тартибда кўпайтирилган)"""
+        factors = [self._factors(marker, chain) for marker, chain in rules.items()]
+        tensor = np.empty([len(values) for values in factors])
+        for index in itertools.product(*(range(len(values)) for values in factors)):
+            product = 1.0
+            for axis, position in enumerate(index):
+                product *= factors[axis][position]
+            tensor[index] = product
+        return tensor
+
+    def bins(self, marker, values):
+        """MoM қийматлари учун бин индекслари"""
+        return np.searchsorted(self._search[marker], np.asarray(values, dtype=float), side='right')
+
+    def age_multipliers(self, patient_ages):
+        """Ёш кўпайтирувчилари: бутун ёшлар жадвалдан, каср ёшлар интерполяция орқали"""
+        if np.all(patient_ages == np.round(patient_ages)):
+            low, high = self.age_range
+            index = (np.clip(patient_ages, low, high) - low).astype(np.intp)
+            return {syndrome: curve[index] for syndrome, curve in self.age_curves.items()}
+        return {syndrome: get_age_risk_multiplier_array(patient_ages, syndrome, self.lab) for syndrome in SYNDROMES}
+
+    def score(self, patient_ages, marker_moms, trimester="first"):
+        """calculate_syndrome_risks_array натижаси (калитлар ва шакл бир хил)"""
+        patient_ages = np.asarray(patient_ages, dtype=float)
+        # Скаляр маркер (масалан, йўқ маркер учун 1.0) бир марта бинланади
+        bins = {
+            marker: np.broadcast_to(self.bins(marker, marker_moms.get(marker, 1.0)), patient_ages.shape)
+            for marker in MARKERS
+        }
+
+        age_risks = self.age_multipliers(patient_ages)
+        risks = {}
+        for syndrome in SYNDROMES:
+            risk = np.array(BASE_RISKS[syndrome] * age_risks[syndrome], dtype=float)
+            for marker, factors in zip(self.axes[syndrome], self.factors[syndrome]):
+                np.multiply(risk, np.take(factors, bins[marker]), out=risk)
+            risks[syndrome] = np.minimum(risk, 0.5, out=risk)
+        risks['ntd'] = np.take(self.ntd, bins['afp_mom'])
+
+        if trimester in ("second", "integrated"):
+            quad_cells = np.ravel_multi_index(tuple(bins[marker] for marker in self.quad_axes), self.quad.shape)
+            for syndrome, tensor in self.quad_weighted.items():
+                risks[syndrome] = risks[syndrome] * np.take(tensor, quad_cells)
+
+        risks['age_risk'] = age_risks
+        return risks
+
+    # ---------- Кўриш ва экспорт ----------
+
+    def bin_labels(self, marker):
+        edges = self.edges[marker]
+        return [_bin_label(edges, index) for index in range(2 * len(edges) + 2)]
+
+    def to_frame(self, syndrome):
+        """Синдром тензори жадвал кўринишида (фақат 1.0 дан фарқли катаклар)"""
+        import pandas as pd
+
+        if syndrome == 'quad':
+            axes, tensor = self.quad_axes, self.quad
+        elif syndrome == 'ntd':
+            axes, tensor = ('afp_mom',), self.ntd
+        else:
+            axes, tensor = self.axes[syndrome], self.tensors[syndrome]
+
+        labels = [self.bin_labels(marker) for marker in axes]
+        rows = [
+            {**{marker: labels[axis][position] for axis, (marker, position) in enumerate(zip(axes, index))},
+             'value': float(tensor[index])}
+            for index in zip(*np.nonzero(tensor != 1.0))
+        ]
+        return pd.DataFrame(rows, columns=[*axes, 'value'])
+
+    def to_dict(self):
+        return {
+            'engine_version': ENGINE_VERSION,
+            'edges': {marker: edges.tolist() for marker, edges in self.edges.items()},
+            'bin_labels': {marker: self.bin_labels(marker) for marker in MARKERS},
+            'syndromes': {
+                syndrome: {'axes': list(self.axes[syndrome]), 'base_risk': BASE_RISKS[syndrome],
+                           'tensor': self.tensors[syndrome].tolist()}
+                for syndrome in SYNDROMES
+            },
+            'ntd': {'axes': ['afp_mom'], 'risk': self.ntd.tolist()},
+            'quad': {'axes': list(self.quad_axes), 'weights': QUAD_WEIGHTS, 'tensor': self.quad.tolist()},
+        }
+
+    def export(self, path):
+        with open(path, 'w', encoding='utf-8') as table_file:
+            json.dump(self.to_dict(), table_file, ensure_ascii=False, indent=1)
+
+@lru_cache(maxsize=1)
+def get_decision_table():
+    """Жараён бўйича битта компиляция қилинган жадвал"""
+    return DecisionTable()
+
+# ==================== ТЕКШИРИШ ====================
+
+def verify_against_scalar(table=None, ages=None, trimesters=("first", "second", "integrated"), rtol=0.0,
+                          sample=None, seed=0):
+    """
+    Барча маркер бинлари вакилларининг тўлиқ тўри бўйича жадвал натижасини асл
+    calculate_syndrome_risks билан солиштириш. Ёшлар тўр бўйлаб айлантирилади.
+    sample берилса - тўрдан шунча тасодифий ҳолат (қисқартирилган тўр, seed билан такрорланади).
+    Натижа: {триместр: (текширилган ҳолатлар, энг катта нисбий фарқ, мос келмаганлар)}
+    """
+    table = table or get_decision_table()
+    ages = np.arange(15.0, 51.0, 0.5) if ages is None else np.asarray(ages, dtype=float)
+
+    axes = [np.array(table.representatives[marker]) for marker in MARKERS]
+    if sample is None:
+        grid = np.array(list(itertools.product(*axes)))
+    else:
+        shape = tuple(len(values) for values in axes)
+        cells = np.random.default_rng(seed).integers(0, math.prod(shape), size=sample)
+        grid = np.column_stack([values[index] for values, index in zip(axes, np.unravel_index(cells, shape))])
+    case_ages = ages[np.arange(len(grid)) % len(ages)]
+    marker_moms = {marker: grid[:, axis] for axis, marker in enumerate(MARKERS)}
+
+    report = {}
+    for trimester in trimesters:
+        compiled = table.score(case_ages, marker_moms, trimester)
+        worst, mismatches = 0.0, 0
+        for row in range(len(grid)):
+            expected = calculate_syndrome_risks(
+                case_ages[row], {marker: float(grid[row, axis]) for axis, marker in enumerate(MARKERS)}, trimester,
+                table.lab
+            )
+            for syndrome in (*SYNDROMES, 'ntd'):
+                reference = expected[syndrome]
+                difference = abs(compiled[syndrome][row] - reference) / reference
+                worst = max(worst, difference)
+                mismatches += difference > rtol
+        report[trimester] = (len(grid), worst, mismatches)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Синдром хавфлари қарор жадвали")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    verify_parser = subparsers.add_parser('verify', help="Асл функция билан тўлиқ тўр бўйича солиштириш")
+    verify_parser.add_argument('--sample', type=int, help="Тўлиқ тўр ўрнига шунча тасодифий ҳолат")
+    export_parser = subparsers.add_parser('export', help="Жадвални JSON га ёзиш")
+    export_parser.add_argument('path')
+    show_parser = subparsers.add_parser('show', help="Тензорни кўриш")
+    show_parser.add_argument('syndrome', choices=[*SYNDROMES, 'ntd', 'quad'])
+    args = parser.parse_args()
+
+    table = get_decision_table()
+    if args.command == 'export':
+        table.export(args.path)
+        print(f"Ёзилди: {args.path}")
+    elif args.command == 'show':
+        for marker, edges in table.edges.items():
+            print(f"{marker:<14} {edges.tolist()}")
+        print(table.to_frame(args.syndrome).to_string(index=False))
+    else:
+        failed = False
+        for trimester, (cases, worst, mismatches) in verify_against_scalar(table, sample=args.sample).items():
+            print(f"{trimester:<11} ҳолатлар: {cases}  энг катта нисбий фарқ: {worst:.2e}  мос эмас: {mismatches}")
+            failed |= bool(mismatches)
+        return 1 if failed else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ТАКРОРИЙ НАМУНА ВА БЕМОРЛАРНИ АНИҚЛАШ
+Ҳар бир ёзув учун учта қисқа (8 байт) хэш калити:
+  - тўлиқ: нормаллашган исм, ёш, ҳафта, скрининг тури ва маркерлар;
+  - намуна: исм бош ҳарфлари, ёш, ҳафта, скрининг тури ва маркерлар (исм бошқача
+    ёзилган бўлса ҳам; бир хил маркерли бошқа аёллар бир-бирига боғланмайди);
+  - блок: исмнинг "скелети" (кирилл/лотин, унлилар ва иккиланган ҳарфларсиз),
+    ёш, ҳафта ва скрининг тури - бир хил бемор бошқа маркерлар билан.
+Текшириш ва қўшиш луғат орқали O(1); оммавий импорт қаторлари оқим
+сифатида текширилади.
+
+    python dedup_index.py scan plate.csv --db data/screening.db
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+from patient_store import normalize_patient_name
+
+TRIMESTER_RAW_KEYS = {
+    'first': ('nt', 'papp_a', 'free_beta_hcg'),
+    'second': ('afp', 'total_hcg', 'ue3'),
+}
+
+# Блок ичида сақланадиган охирги ёзувлар сони (блок ҳажми чегараланган - O(1))
+BLOCK_SIZE = 8
+
+DUPLICATE_KINDS = {
+    'exact': "Бир хил ёзув",
+    'sample': "Бир хил намуна (маркерлар)",
+    'patient': "Эҳтимолий бир хил бемор",
+}
+
+_KIND_ORDER = {kind: order for order, kind in enumerate(DUPLICATE_KINDS)}
+
+_CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'ғ': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'қ': 'q', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'ў': 'o', 'п': 'p',
+    'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ҳ': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh',
+    'щ': 'sh', 'ъ': '', 'ь': '', 'ы': 'i', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+_SOUND_ALIKE = {'q': 'k', 'x': 'h', 'w': 'v', 'c': 'k'}
+# Кирилл ва лотин ёзувлари битта жадвал билан бир хил ҳарфларга келтирилади
+_TRANSLITERATE = str.maketrans({
+    **_SOUND_ALIKE,
+    **{letter: "".join(_SOUND_ALIKE.get(char, char) for char in latin) for letter, latin in _CYRILLIC_TO_LATIN.items()},
+})
+_VOWELS = re.compile(r"[aeiouyh]")
+_DOUBLED = re.compile(r"(.)\1+")
+_NON_LETTERS = re.compile(r"[^a-z0-9 ]")
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+def name_skeleton(name):
+    """Исм скелети: лотинча, сўзлар тартибсиз, ҳар бир сўз - биринчи ҳарф ва ундошлар (4 та)"""
+    tokens = []
+    for token in _NON_LETTERS.sub("", normalize_patient_name(name).translate(_TRANSLITERATE)).split():
+        # Рақамлар (масалан, тартиб рақами) ўзгаришсиз қолади
+        tokens.append(token if token.isdigit() else _DOUBLED.sub(r"\1", token[0] + _VOWELS.sub("", token[1:]))[:4])
+    return " ".join(sorted(tokens))
+
+def dedup_keys(name, age, week, screening_type, markers):
+    """(тўлиқ, намуна, блок, маркерлар) калитлари; маркерлар етишмаса намуна калити None"""
+    context = f"{screening_type}|{week}"
+    marker_text = None
+    if markers and all(value is not None and not math.isnan(value) for value in markers):
+        marker_text = "|".join(f"{value:.3f}" for value in markers)
+    person = f"{age}|{context}"
+    skeleton = name_skeleton(name)
+    # Намуна калитида шахс қисми: яхлит рақамлар ёки стандарт қийматлар бошқа аёлда ҳам такрорланади
+    initials = "".join(token[0] for token in skeleton.split())
+    return (
+        _digest(f"{normalize_patient_name(name)}|{person}|{marker_text}") if marker_text else None,
+        _digest(f"{initials}|{person}|{marker_text}") if marker_text else None,
+        _digest(f"{skeleton}|{person}"),
+        _digest(marker_text or ""),
+    )
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _week(gestational_age, gestational_days):
+    week = _number(gestational_age)
+    if math.isnan(week):
+        week = _number(gestational_days) // 7
+    return None if math.isnan(week) else int(week)
+
+def _age(value):
+    age = _number(value)
+    return None if math.isnan(age) else int(age)
+
+def record_dedup_keys(record):
+    """Сақланган ёзув калитлари (parameters ичидаги хом маркерлар)"""
+    screening_type = record.get('screening_type', 'first')
+    parameters = record.get('parameters', {})
+    markers = [_number(parameters.get(key)) for key in TRIMESTER_RAW_KEYS.get(screening_type, ())]
+    return dedup_keys(record.get('name'), _age(record.get('age')),
+                      _week(record.get('gestational_age'), record.get('gestational_days')), screening_type, markers)
+
+def row_dedup_keys(row, screening_type="first"):
+    """Планшет қатори калитлари (маркерлар алоҳида устунларда)"""
+    screening_type = row.get('screening_type') or screening_type
+    markers = [_number(row.get(key)) for key in TRIMESTER_RAW_KEYS.get(screening_type, ())]
+    return dedup_keys(row.get('name'), _age(row.get('age')),
+                      _week(row.get('gestational_age'), row.get('gestational_days')), screening_type, markers)
+
+class DedupIndex:
+    """Хэш калитлари бўйича индекс: тўлиқ ва намуна калити -> ID, блок -> охирги ёзувлар"""
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.exact = {}
+        self.samples = {}
+        self.blocks = {}
+        self.count = 0
+        self.last_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Индексга қўшилган ёзувлар сони"""
+        return self.count
+
+    def check(self, keys):
+        """Эҳтимолий такрорийлар: [(ID, тур)] - энг ишончлисидан"""
+        exact, sample, block, marker_digest = keys
+        candidates = []
+        with self._lock:
+            if exact is not None and exact in self.exact:
+                candidates.append((self.exact[exact], 'exact'))
+            if sample is not None and sample in self.samples:
+                candidates.append((self.samples[sample], 'sample'))
+            for patient_id, other_digest in self.blocks.get(block, ()):
+                # Исм скелети ва маркерлар бир хил - исм бошқа ёзувда (кирилл/лотин) киритилган
+                candidates.append((patient_id, 'exact' if sample is not None and other_digest == marker_digest
+                                   else 'patient'))
+        # Ҳар бир ID учун энг ишончли тур
+        matches = {}
+        for patient_id, kind in candidates:
+            if patient_id not in matches or _KIND_ORDER[kind] < _KIND_ORDER[matches[patient_id]]:
+                matches[patient_id] = kind
+        return sorted(matches.items(), key=lambda match: _KIND_ORDER[match[1]])
+
+    def add(self, keys, patient_id):
+        exact, sample, block, marker_digest = keys
+        with self._lock:
+            if exact is not None:
+                self.exact.setdefault(exact, patient_id)
+            if sample is not None:
+                self.samples.setdefault(sample, patient_id)
+            entries = self.blocks.setdefault(block, [])
+            entries.append((patient_id, marker_digest))
+            self.count += 1
+            if len(entries) > self.block_size:
+                del entries[0]
+
+    def check_record(self, record):
+        return self.check(record_dedup_keys(record))
+
+    def add_record(self, record):
+        self.add(record_dedup_keys(record), record['patient_id'])
+
+    def memory_bytes(self, seen=None):
+        """Калитлар ҳажми (тахминий, сессия хотирасини ҳисоблаш учун)"""
+        return (sys.getsizeof(self.exact) + sys.getsizeof(self.samples) + sys.getsizeof(self.blocks)
+                + 41 * (len(self.exact) + len(self.samples)) + 120 * len(self.blocks))
+
+    def refresh_from_db(self, db_path, batch_size=5000):
+        """SQLite омборидаги янги ёзувларни (seq бўйича) қўшиш"""
+        if not os.path.exists(db_path):
+            return 0
+        added = 0
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+        try:
+            while True:
+                rows = conn.execute(
+                    "SELECT seq, patient_id, record FROM patients WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (self.last_seq, batch_size),
+                ).fetchall()
+                if not rows:
+                    break
+                for _, patient_id, record in rows:
+                    self.add(record_dedup_keys(json.loads(record)), patient_id)
+                self.last_seq = rows[-1][0]
+                added += len(rows)
+        finally:
+            conn.close()
+        return added
+
+_STORE_INDEXES = {}
+_STORE_INDEXES_LOCK = threading.Lock()
+
+def store_index(db_path):
+    """Омбор бўйича жараён ичидаги битта индекс - ҳар чақирилганда фақат янги ёзувлар қўшилади"""
+    with _STORE_INDEXES_LOCK:
+        index = _STORE_INDEXES.setdefault(os.path.abspath(db_path), DedupIndex())
+        index.refresh_from_db(db_path)
+    return index
+
+def flag_duplicates(frame, reference=None, screening_type="first"):
+    """
+    Планшет қаторларини оқим сифатида текшириш: омбор индексида (reference) ва
+    файлнинг олдинги қаторларида. duplicate_of ва duplicate_kind устунлари қўшилади.
+    """
+    local = DedupIndex()
+    duplicate_of, duplicate_kind = [], []
+    for number, row in enumerate(frame.to_dict('records'), start=1):
+        keys = row_dedup_keys(row, screening_type)
+        matches = (reference.check(keys) if reference is not None else []) + local.check(keys)
+        local.add(keys, f"қатор {number}")
+        duplicate_of.append(", ".join(patient_id for patient_id, _ in matches))
+        duplicate_kind.append(matches[0][1] if matches else "")
+    frame['duplicate_of'] = duplicate_of
+    frame['duplicate_kind'] = duplicate_kind
+    return frame
+
+def main():
+    parser = argparse.ArgumentParser(description="Такрорий намуна/беморларни аниқлаш")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    scan_parser = subparsers.add_parser('scan', help="CSV файлни оқим сифатида текшириш")
+    scan_parser.add_argument('csv', help="Планшет файли")
+    scan_parser.add_argument('--db', help="Солиштириш учун SQLite омбори")
+    scan_parser.add_argument('--screening-type', default="first", choices=list(TRIMESTER_RAW_KEYS))
+    scan_parser.add_argument('--show', type=int, default=20, help="Кўрсатиладиган такрорийлар сони")
+    args = parser.parse_args()
+
+    reference = store_index(args.db) if args.db else None
+    local = DedupIndex()
+    counts = {kind: 0 for kind in DUPLICATE_KINDS}
+    rows = 0
+    with open(args.csv, newline='', encoding='utf-8-sig') as plate_file:
+        for row in csv.DictReader(plate_file):
+            rows += 1
+            row = {str(key).strip().lower(): value for key, value in row.items()}
+            keys = row_dedup_keys(row, args.screening_type)
+            matches = (reference.check(keys) if reference is not None else []) + local.check(keys)
+            local.add(keys, f"қатор {rows}")
+            if matches:
+                counts[matches[0][1]] += 1
+                if sum(counts.values()) <= args.show:
+                    print(f"қатор {rows} ({row.get('name')}): "
+                          + ", ".join(f"{patient_id} [{DUPLICATE_KINDS[kind]}]" for patient_id, kind in matches))
+
+    print(f"Қаторлар: {rows}; " + ", ".join(f"{DUPLICATE_KINDS[kind]}: {count}" for kind, count in counts.items()))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
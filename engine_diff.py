@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ҲИСОБЛАШ МОДУЛИ ВЕРСИЯЛАРИНИ СОЛИШТИРИШ (РЕГРЕССИЯ ТЕКШИРУВИ)
+
+Катта "олтин" когорта (сид бўйича яратилган ва/ёки омбордаги сақланган
+ҳолатлар) икки версия орқали ҳисобланади ва ҳар бир синдром учун энг катта
+мутлақ/нисбий хавф фарқлари ҳамда категория ўзгаришлари чиқарилади.
+
+Ҳар бир томон (git ревизияси, папка ёки жорий дарахт + ихтиёрий нормалар
+файли) ўз жараёнлар ҳовузида ишлайди - модуллар ва SCREENING_NORMS_FILE
+бир-бирига аралашмайди. Когорта бўлаклари иккала ҳовузда параллел
+ҳисобланади, фарқлар бўлак бўйича йиғилади.
+
+    python engine_diff.py --baseline HEAD --cases 2000000
+    python engine_diff.py --baseline HEAD --candidate-norms norms/norms-20250101-120000.json --max-abs 1e-4
+    python engine_diff.py --baseline v1.0 --db data/screening.db --allow-flips 10 --report diff.json
+
+Рухсат этилган чегарадан ошса, чиқиш коди 1.
+"""
+
+import argparse
+import importlib
+import inspect
+import io
+import json
+import multiprocessing
+import os
+import sqlite3
+import subprocess
+import sys
+import tarfile
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SYNDROMES = ['downs', 'edwards', 'patau', 'turner', 'ntd']
+
+# get_risk_category чегаралари (юқоридан пастга): хавф > чегара
+CATEGORY_CUTOFFS = np.array([0.0, 0.001, 0.005, 0.01, 0.02, 0.05, 0.1])
+CATEGORY_NAMES = ["НОМАЪЛУМ", "ПАСТ", "ПАСТ-ЎРТАЧА", "ЎРТАЧА", "ЎРТАЧА-ЮҚОРИ", "ЮҚОРИ", "ЖУДА ЮҚОРИ", "КРИТИК"]
+
+# Когорта маркерлари: (триместр, норма параметри, MoM калити, хом қиймат калити)
+TRIMESTER_MARKERS = {
+    'first': [('NT', 'nt_mom', 'nt'), ('PAPP_A', 'papp_mom', 'papp_a'), ('FREE_BETA_HCG', 'hcg_mom', 'free_beta_hcg')],
+    'second': [('AFP', 'afp_mom', 'afp'), ('TOTAL_HCG', 'total_hcg_mom', 'total_hcg'), ('UE3', 'ue3_mom', 'ue3')]
+}
+TRIMESTER_CODES = {'first': 0, 'second': 1}
+
+# Яратилган когорта: гестацион кунлар оралиғи ва хом қийматлар (медиана, log10 SD)
+GENERATED_DAYS = {'first': (77, 97), 'second': (105, 146)}
+GENERATED_MARKERS = {
+    'nt': (1.6, 0.15), 'papp_a': (2.5, 0.30), 'free_beta_hcg': (45.0, 0.30),
+    'afp': (45.0, 0.20), 'total_hcg': (25000.0, 0.28), 'ue3': (1.5, 0.17)
+}
+RAW_KEYS = ('nt', 'papp_a', 'free_beta_hcg', 'afp', 'total_hcg', 'ue3')
+
+# ==================== КОГОРТА ====================
+
+def generate_cohort(seed, size):
+    """Сид бўйича такрорланадиган синтетик когорта (иккала томонда бир хил)"""
+    rng = np.random.default_rng(seed)
+    trimester = rng.integers(0, 2, size)
+    first = trimester == 0
+    days = np.where(
+        first,
+        rng.integers(*GENERATED_DAYS['first'], size),
+        rng.integers(*GENERATED_DAYS['second'], size)
+    )
+    cohort = {
+        'trimester': trimester,
+        'age': rng.integers(15, 56, size).astype(float),
+        'gestational_days': days.astype(float),
+        'weight': rng.integers(40, 151, size).astype(float),
+        'covariate_code': np.where(rng.random(size) < 0.1, rng.integers(0, 80, size), 0)
+    }
+    for key in RAW_KEYS:
+        median, sd = GENERATED_MARKERS[key]
+        cohort[key] = np.round(median * np.power(10.0, rng.normal(0.0, sd, size)), 2)
+    return cohort
+
+def load_stored_cohort(db_path, seq_low, seq_high):
+    """Омбордаги ёзувлар (seq оралиғи) - фақат керакли майдонлар"""
+    from gestational_dating import WEEK_ANCHOR_DAY
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+    try:
+        rows = conn.execute(
+            "SELECT json_extract(record, '$.screening_type'), json_extract(record, '$.age'), "
+            "       COALESCE(json_extract(record, '$.gestational_days'), "
+            f"                json_extract(record, '$.gestational_age') * 7 + {WEEK_ANCHOR_DAY}), "
+            "       json_extract(record, '$.weight'), COALESCE(json_extract(record, '$.covariate_code'), 0), "
+            + ", ".join(f"json_extract(record, '$.parameters.{key}')" for key in RAW_KEYS) +
+            " FROM patients WHERE seq >= ? AND seq < ?",
+            (seq_low, seq_high),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    rows = [row for row in rows if row[0] in TRIMESTER_CODES and None not in row[1:4]]
+    columns = list(zip(*rows)) if rows else [()] * (5 + len(RAW_KEYS))
+    cohort = {
+        'trimester': np.array([TRIMESTER_CODES[value] for value in columns[0]], dtype=np.int64),
+        'age': np.array(columns[1], dtype=float),
+        'gestational_days': np.array(columns[2], dtype=float),
+        'weight': np.array(columns[3], dtype=float),
+        'covariate_code': np.array(columns[4], dtype=np.int64)
+    }
+    for offset, key in enumerate(RAW_KEYS):
+        cohort[key] = np.array([value if value else np.nan for value in columns[5 + offset]], dtype=float)
+    return cohort
+
+# ==================== ТОМОН (ВЕРСИЯ) ЖАРАЁНЛАРИ ====================
+
+_ENGINE = None
+
+def _load_engine(root, norms_file):
+    """Ҳовуз ишчиси бошланишида томон дарахтидан risk_engine ни юклаш"""
+    global _ENGINE
+    sys.path.insert(0, root)
+    if norms_file:
+        os.environ['SCREENING_NORMS_FILE'] = norms_file
+    else:
+        os.environ.pop('SCREENING_NORMS_FILE', None)
+    _ENGINE = importlib.import_module('risk_engine')
+
+def _accepts(function, name):
+    return name in inspect.signature(function).parameters
+
+def _engine_moms(engine, raw, parameter, days, weights, trimester, codes):
+    """MoM массиви; эски версияларда скаляр функция орқали"""
+    if hasattr(engine, 'calculate_mom_array'):
+        kwargs = {'covariate_codes': codes} if _accepts(engine.calculate_mom_array, 'covariate_codes') else {}
+        return engine.calculate_mom_array(raw, parameter, days, weights, trimester, **kwargs)
+
+    function = engine.calculate_mom_value
+    with_days = _accepts(function, 'gestational_days')
+    return np.array([
+        function(value, parameter, int(day // 7), weight, trimester, **({'gestational_days': day} if with_days else {}))
+        for value, day, weight in zip(raw, days, weights)
+    ])
+
+def _engine_syndrome_risks(engine, ages, marker_moms, trimester):
+    """Синдром хавфлари массивлари; эски версияларда скаляр функция орқали"""
+    if hasattr(engine, 'calculate_syndrome_risks_array'):
+        return engine.calculate_syndrome_risks_array(ages, marker_moms, trimester)
+
+    risks = {syndrome: np.empty(len(ages)) for syndrome in SYNDROMES}
+    for index, age in enumerate(ages):
+        case = engine.calculate_syndrome_risks(age, {key: float(values[index]) for key, values in marker_moms.items()},
+                                               trimester)
+        for syndrome in SYNDROMES:
+            risks[syndrome][index] = case[syndrome]
+    return risks
+
+def score_chunk(task):
+    """Ишчи: когорта бўлагини шу томон версияси билан ҳисоблаш"""
+    source, arguments, with_cohort = task
+    cohort = generate_cohort(*arguments) if source == 'generated' else load_stored_cohort(*arguments)
+    size = len(cohort['age'])
+    risks = {syndrome: np.full(size, np.nan) for syndrome in SYNDROMES}
+
+    for trimester, code in TRIMESTER_CODES.items():
+        rows = np.flatnonzero(cohort['trimester'] == code)
+        markers = TRIMESTER_MARKERS[trimester]
+        rows = rows[np.all([cohort[raw_key][rows] > 0 for _, _, raw_key in markers], axis=0)] if len(rows) else rows
+        if not len(rows):
+            continue
+
+        marker_moms = {
+            mom_key: _engine_moms(_ENGINE, cohort[raw_key][rows], parameter, cohort['gestational_days'][rows],
+                                  cohort['weight'][rows], trimester, cohort['covariate_code'][rows])
+            for parameter, mom_key, raw_key in markers
+        }
+        trimester_risks = _engine_syndrome_risks(_ENGINE, cohort['age'][rows], marker_moms, trimester)
+        for syndrome in SYNDROMES:
+            risks[syndrome][rows] = trimester_risks[syndrome]
+
+    return risks, (cohort if with_cohort else None)
+
+def prepare_side(spec, workdir, name):
+    """
+    Томон дарахти: None/'.' - жорий дарахт, мавжуд папка - ўзи,
+    акс ҳолда git ревизияси (git archive орқали вақтинчалик папкага).
+    """
+    if spec in (None, '', '.'):
+        return REPO_DIR
+    if os.path.isdir(spec):
+        return os.path.abspath(spec)
+
+    archive = subprocess.run(['git', '-C', REPO_DIR, 'archive', '--format=tar', spec],
+                             check=True, capture_output=True).stdout
+    root = os.path.join(workdir, name)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(root)
+    return root
+
+# ==================== СОЛИШТИРИШ ====================
+
+def risk_categories(risks):
+    """get_risk_category бўйича категория индекси (0 - НОМАЪЛУМ ... 7 - КРИТИК)"""
+    return np.searchsorted(CATEGORY_CUTOFFS, risks, side='left')
+
+class DiffAccumulator:
+    """Бўлаклар бўйича фарқ статистикасини йиғиш"""
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.cases = 0
+        self.stats = {
+            syndrome: {'max_abs': 0.0, 'max_rel': 0.0, 'changed': 0, 'flips': 0, 'worst': None,
+                       'transitions': np.zeros((len(CATEGORY_NAMES), len(CATEGORY_NAMES)), dtype=np.int64)}
+            for syndrome in SYNDROMES
+        }
+
+    def update(self, baseline, candidate, cohort, offset):
+        self.cases += len(cohort['age'])
+        for syndrome in SYNDROMES:
+            stats = self.stats[syndrome]
+            old, new = baseline[syndrome], candidate[syndrome]
+            valid = ~(np.isnan(old) | np.isnan(new))
+            if not valid.any():
+                continue
+            old, new = old[valid], new[valid]
+            delta = np.abs(new - old)
+            relative = delta / np.maximum(np.abs(old), 1e-12)
+
+            stats['changed'] += int(np.count_nonzero(delta > self.tolerance))
+            stats['max_rel'] = max(stats['max_rel'], float(relative.max()))
+            worst = int(np.argmax(delta))
+            if delta[worst] > stats['max_abs']:
+                stats['max_abs'] = float(delta[worst])
+                case_index = np.flatnonzero(valid)[worst]
+                stats['worst'] = {
+                    'case': int(offset + case_index),
+                    'inputs': {key: values[case_index].item() for key, values in cohort.items()},
+                    'baseline': float(old[worst]),
+                    'candidate': float(new[worst])
+                }
+
+            old_categories, new_categories = risk_categories(old), risk_categories(new)
+            stats['flips'] += int(np.count_nonzero(old_categories != new_categories))
+            np.add.at(stats['transitions'], (old_categories, new_categories), 1)
+
+    def report(self):
+        syndromes = {}
+        for syndrome, stats in self.stats.items():
+            transitions = [
+                {'from': CATEGORY_NAMES[i], 'to': CATEGORY_NAMES[j], 'count': int(stats['transitions'][i, j])}
+                for i, j in zip(*np.nonzero(stats['transitions'])) if i != j
+            ]
+            syndromes[syndrome] = {key: stats[key] for key in ('max_abs', 'max_rel', 'changed', 'flips', 'worst')}
+            syndromes[syndrome]['transitions'] = sorted(transitions, key=lambda item: -item['count'])
+        return {'cases': self.cases, 'syndromes': syndromes}
+
+def _cohort_tasks(cases, chunk_size, seed, db_path):
+    """Когорта бўлаклари: (манба, аргументлар)"""
+    tasks = []
+    seeds = np.random.SeedSequence(seed).spawn(max(1, -(-cases // chunk_size)))
+    for index, start in enumerate(range(0, cases, chunk_size)):
+        tasks.append(('generated', (seeds[index], min(chunk_size, cases - start))))
+
+    if db_path:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+        try:
+            low, high = conn.execute("SELECT MIN(seq), MAX(seq) FROM patients").fetchone()
+        finally:
+            conn.close()
+        if low is not None:
+            for start in range(low, high + 1, chunk_size):
+                tasks.append(('stored', (db_path, start, start + chunk_size)))
+    return tasks
+
+def compare_engines(baseline=None, candidate=None, baseline_norms=None, candidate_norms=None, cases=1_000_000,
+                    db_path=None, chunk_size=250_000, workers=None, seed=2024, tolerance=0.0):
+    """Икки версияни когорта бўйича солиштириш, ҳисобот луғатини қайтаради"""
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    context = multiprocessing.get_context('spawn')
+    accumulator = DiffAccumulator(tolerance)
+
+    with tempfile.TemporaryDirectory(prefix="engine-diff-") as workdir:
+        baseline_root = prepare_side(baseline, workdir, 'baseline')
+        candidate_root = prepare_side(candidate, workdir, 'candidate')
+        tasks = _cohort_tasks(cases, chunk_size, seed, db_path)
+
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_load_engine,
+                                 initargs=(baseline_root, baseline_norms)) as baseline_pool, \
+             ProcessPoolExecutor(workers, mp_context=context, initializer=_load_engine,
+                                 initargs=(candidate_root, candidate_norms)) as candidate_pool:
+            baseline_futures = [baseline_pool.submit(score_chunk, (source, arguments, True))
+                                for source, arguments in tasks]
+            candidate_futures = [candidate_pool.submit(score_chunk, (source, arguments, False))
+                                 for source, arguments in tasks]
+
+            offset = 0
+            for baseline_future, candidate_future in zip(baseline_futures, candidate_futures):
+                baseline_risks, cohort = baseline_future.result()
+                candidate_risks, _ = candidate_future.result()
+                accumulator.update(baseline_risks, candidate_risks, cohort, offset)
+                offset += len(cohort['age'])
+
+    report = accumulator.report()
+    report['baseline'] = {'tree': baseline or 'working tree', 'norms': baseline_norms}
+    report['candidate'] = {'tree': candidate or 'working tree', 'norms': candidate_norms}
+    return report
+
+def check_report(report, max_abs=0.0, max_rel=None, allow_flips=0):
+    """Рухсат этилмаган ўзгаришлар рўйхати (бўш - текширув ўтди)"""
+    failures = []
+    for syndrome, stats in report['syndromes'].items():
+        if stats['max_abs'] > max_abs:
+            failures.append(f"{syndrome}: мутлақ фарқ {stats['max_abs']:.3g} > {max_abs:.3g}")
+        if max_rel is not None and stats['max_rel'] > max_rel:
+            failures.append(f"{syndrome}: нисбий фарқ {stats['max_rel']:.3g} > {max_rel:.3g}")
+        if stats['flips'] > allow_flips:
+            failures.append(f"{syndrome}: {stats['flips']} та категория ўзгариши > {allow_flips}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Ҳисоблаш модули/нормалар версияларини когорта бўйича солиштириш")
+    parser.add_argument('--baseline', help="Таянч версия: git ревизияси ёки папка (стандарт: жорий дарахт)")
+    parser.add_argument('--candidate', help="Янги версия: git ревизияси ёки папка (стандарт: жорий дарахт)")
+    parser.add_argument('--baseline-norms', help="Таянч томон учун нормалар файли")
+    parser.add_argument('--candidate-norms', help="Янги томон учун нормалар файли")
+    parser.add_argument('--cases', type=int, default=1_000_000, help="Яратиладиган ҳолатлар сони")
+    parser.add_argument('--db', help="Сақланган ҳолатлар учун SQLite омбори")
+    parser.add_argument('--chunk-size', type=int, default=250_000)
+    parser.add_argument('--workers', type=int, default=None, help="Ҳар бир томон учун жараёнлар сони")
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--max-abs', type=float, default=0.0, help="Рухсат этилган энг катта мутлақ фарқ")
+    parser.add_argument('--max-rel', type=float, default=None, help="Рухсат этилган энг катта нисбий фарқ")
+    parser.add_argument('--allow-flips', type=int, default=0, help="Рухсат этилган категория ўзгаришлари")
+    parser.add_argument('--report', help="Тўлиқ ҳисоботни JSON файлга ёзиш")
+    args = parser.parse_args()
+
+    report = compare_engines(args.baseline, args.candidate, args.baseline_norms, args.candidate_norms, args.cases,
+                             args.db, args.chunk_size, args.workers, args.seed, args.max_abs)
+
+    print(f"Ҳолатлар: {report['cases']:,}".replace(",", " "))
+    print(f"{'синдром':<10} {'макс. мутлақ':>14} {'макс. нисбий':>14} {'ўзгарган':>10} {'категория':>10}")
+    for syndrome, stats in report['syndromes'].items():
+        print(f"{syndrome:<10} {stats['max_abs']:>14.3g} {stats['max_rel']:>14.3g} {stats['changed']:>10} {stats['flips']:>10}")
+        for transition in stats['transitions'][:3]:
+            print(f"{'':<12}{transition['from']} → {transition['to']}: {transition['count']}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+    failures = check_report(report, args.max_abs, args.max_rel, args.allow_flips)
+    if failures:
+        print("\n❌ РЕГРЕССИЯ: кутилмаган ўзгаришлар")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("\n✅ Фарқлар рухсат этилган чегарада")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
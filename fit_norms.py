@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+НОРМАЛАРНИ ЛАБОРАТОРИЯ МАЪЛУМОТЛАРИДАН БАҲОЛАШ
+
+Сақланган скрининглар бўйича ҳар бир маркер учун гестацион кунга нисбатан
+вазнли логарифмик-чизиқли медиана регрессияси:
+
+    log10(медиана) = a + b * кун
+
+Ҳар бир маркер алоҳида жараёнда ҳисобланади. Маълумот оқим сифатида
+ўқилади ва кунлик логарифмик гистограммаларда йиғилади, шунинг учун хотира
+ёзувлар сонига боғлиқ эмас (кунлар x устунлар, бир неча МБ). Натижа
+DELFIA_*_TRIMESTER_NORMS тузилишидаги янги версияли JSON файл:
+
+    python fit_norms.py --db data/screening.db --out-dir norms
+    SCREENING_NORMS_FILE=norms/norms-20250101-120000.json streamlit run app.py
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from risk_engine import (
+    DELFIA_FIRST_TRIMESTER_NORMS, DELFIA_SECOND_TRIMESTER_NORMS, MARKER_RECORD_KEYS, NORMS_VERSION
+)
+from gestational_dating import WEEK_ANCHOR_DAY
+
+# Гистограмма: log10(қиймат) бўйича 0.005 қадам (~1.2% аниқлик)
+LOG_MIN, LOG_MAX, LOG_STEP = -3.0, 6.0, 0.005
+MAX_DAY = 300
+
+# Регрессияга кириши учун кунда энг кам кузатувлар сони
+MIN_DAY_COUNT = 5
+
+NORMS_BY_TRIMESTER = {
+    'first': DELFIA_FIRST_TRIMESTER_NORMS,
+    'second': DELFIA_SECOND_TRIMESTER_NORMS
+}
+
+def _stream_marker_values(db_path, trimester, raw_key, batch_size):
+    """Маркер учун (кун, қиймат) пакетлари - фақат керакли устунлар ўқилади"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+    try:
+        cursor = conn.execute(
+            "SELECT COALESCE(json_extract(record, '$.gestational_days'), "
+            f"       json_extract(record, '$.gestational_age') * 7 + {WEEK_ANCHOR_DAY}), "
+            "       json_extract(record, '$.parameters.' || ?) "
+            "FROM patients WHERE screening_type = ?",
+            (raw_key, trimester),
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            batch = np.array([row for row in rows if row[0] is not None and row[1]], dtype=float)
+            if len(batch):
+                yield batch[:, 0], batch[:, 1]
+    finally:
+        conn.close()
+
+def histogram_medians(histogram):
+    """Кунлик гистограммалардан медианалар ва кузатувлар сони"""
+    counts = histogram.sum(axis=1)
+    days = np.nonzero(counts)[0]
+    cumulative = np.cumsum(histogram[days], axis=1)
+    median_bins = np.argmax(cumulative >= (counts[days, None] / 2.0), axis=1)
+    log_medians = LOG_MIN + (median_bins + 0.5) * LOG_STEP
+    return days, log_medians, counts[days]
+
+def fit_marker(task):
+    """Битта маркер учун регрессия (ProcessPoolExecutor ишчиси)"""
+    db_path, trimester, parameter, batch_size = task
+    bins = int(round((LOG_MAX - LOG_MIN) / LOG_STEP))
+    histogram = np.zeros((MAX_DAY + 1, bins), dtype=np.int64)
+
+    for days, values in _stream_marker_values(db_path, trimester, MARKER_RECORD_KEYS[parameter], batch_size):
+        valid = values > 0
+        day_index = np.clip(np.rint(days[valid]).astype(np.int64), 0, MAX_DAY)
+        bin_index = np.clip(((np.log10(values[valid]) - LOG_MIN) / LOG_STEP).astype(np.int64), 0, bins - 1)
+        np.add.at(histogram, (day_index, bin_index), 1)
+
+    days, log_medians, counts = histogram_medians(histogram)
+    usable = counts >= MIN_DAY_COUNT
+    result = {'trimester': trimester, 'parameter': parameter, 'n': int(counts.sum()), 'days': int(usable.sum())}
+    if usable.sum() < 2:
+        return result
+
+    # Вазнли энг кичик квадратлар: кундаги кузатувлар сони вазн сифатида
+    slope, intercept = np.polyfit(days[usable], log_medians[usable], 1, w=np.sqrt(counts[usable]))
+    result.update({'intercept': float(intercept), 'slope': float(slope)})
+    return result
+
+def build_norms(fits):
+    """Регрессия натижаларидан DELFIA_* тузилишидаги нормалар"""
+    norms = {}
+    for trimester, current_norms in NORMS_BY_TRIMESTER.items():
+        norms[trimester] = {}
+        for parameter, spec in current_norms.items():
+            fitted = dict(spec, median_values=dict(spec['median_values']))
+            fit = fits.get((trimester, parameter), {})
+            if 'slope' in fit:
+                fitted['median_values'] = {
+                    week: float(f"{10 ** (fit['intercept'] + fit['slope'] * (week * 7 + WEEK_ANCHOR_DAY)):.4g}")
+                    for week in spec['median_values']
+                }
+            fitted['regression'] = {key: fit[key] for key in ('n', 'days', 'intercept', 'slope') if key in fit}
+            norms[trimester][parameter] = fitted
+    return norms
+
+def run_fit(db_path, workers=None, batch_size=10000):
+    """Барча маркерлар учун регрессияни параллел бажариш"""
+    tasks = [
+        (db_path, trimester, parameter, batch_size)
+        for trimester, norms in NORMS_BY_TRIMESTER.items()
+        for parameter in norms
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(fit_marker, tasks))
+    return {(result['trimester'], result['parameter']): result for result in results}
+
+def write_norms_file(norms, out_dir, source):
+    """Янги версияли нормалар файлини ёзиш"""
+    version = f"fit-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"norms-{version[4:]}.json")
+
+    document = {
+        'version': version,
+        'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'base_version': NORMS_VERSION,
+        'source': source,
+        'DELFIA_FIRST_TRIMESTER_NORMS': norms['first'],
+        'DELFIA_SECOND_TRIMESTER_NORMS': norms['second']
+    }
+    with open(path, 'w', encoding='utf-8') as norms_file:
+        json.dump(document, norms_file, ensure_ascii=False, indent=2)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Маркер медианаларини сақланган скрининглардан баҳолаш")
+    parser.add_argument('--db', required=True, help="SQLite омбори (SCREENING_DB_PATH)")
+    parser.add_argument('--out-dir', default='norms', help="Нормалар файллари папкаси")
+    parser.add_argument('--workers', type=int, default=None, help="Жараёнлар сони (стандарт: CPU сони)")
+    parser.add_argument('--batch-size', type=int, default=10000, help="Бир марта ўқиладиган қаторлар")
+    args = parser.parse_args()
+
+    fits = run_fit(args.db, args.workers, args.batch_size)
+    path = write_norms_file(build_norms(fits), args.out_dir, {
+        'db': os.path.abspath(args.db),
+        'records': {f"{t}/{p}": fit['n'] for (t, p), fit in fits.items()}
+    })
+
+    for (trimester, parameter), fit in fits.items():
+        status = f"a={fit['intercept']:.4f} b={fit['slope']:.5f}" if 'slope' in fit else "ўзгаришсиз (маълумот етарли эмас)"
+        print(f"{trimester}/{parameter:<14} n={fit['n']:<9} кунлар={fit['days']:<4} {status}")
+    print(f"Нормалар файли: {path}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
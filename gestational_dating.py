@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ГЕСТАЦИОН МУДДАТНИ КУНЛАРДА АНИҚЛАШ
+CRL (биринчи триместр) ва BPD (иккинчи триместр) бўйича датировка,
+кунлик медиана жадваллари. Жадваллар модул юкланганда бир марта
+тузилади ва интерактив ҳамда пакетли ҳисоблашда бир хил ишлатилади.
+"""
+
+import numpy as np
+
+# Жадвал қадами: 0.1 мм
+MM_STEP = 0.1
+
+# Ҳафта медианаси шу ҳафтанинг ўртасига (w+3 кун) тўғри келади деб олинади
+WEEK_ANCHOR_DAY = 3
+
+# Датировка формулалари жадвали диапазонлари (мм). Скрининг учун рухсат этилган
+# диапазон триместр медиана жадвали кунларидан келиб чиқади (measurement_range)
+CRL_RANGE_MM = (30.0, 85.0)
+BPD_RANGE_MM = (25.0, 60.0)
+
+def _crl_to_days(crl_mm):
+    """Robinson & Fleming (1975): GA(кун) = 8.052 * sqrt(CRL мм) + 23.73"""
+    return 8.052 * np.sqrt(crl_mm) + 23.73
+
+def _bpd_to_days(bpd_mm):
+    """Hadlock (1982): GA(ҳафта) = 9.54 + 1.482 * BPD(см) + 0.1676 * BPD(см)^2"""
+    bpd_cm = bpd_mm / 10.0
+    return (9.54 + 1.482 * bpd_cm + 0.1676 * bpd_cm ** 2) * 7.0
+
+def _build_dating_table(formula, mm_range):
+    """мм бўйича индексланган датировка жадвали"""
+    low, high = mm_range
+    grid = np.round(np.arange(low, high + MM_STEP / 2, MM_STEP), 1)
+    return {'low': low, 'high': high, 'days': formula(grid)}
+
+DATING_TABLES = {
+    'CRL': _build_dating_table(_crl_to_days, CRL_RANGE_MM),
+    'BPD': _build_dating_table(_bpd_to_days, BPD_RANGE_MM),
+}
+
+def ga_days_from_measurement(measurement_mm, method):
+    """
+    Ўлчов (мм) бўйича гестацион муддат (кун).
+    Скаляр ёки массив қабул қилади; жадвал диапазонидан ташқари қиймат учун ValueError.
+    """
+    table = DATING_TABLES[method]
+    values = np.round(np.asarray(measurement_mm, dtype=float), 1)
+    outside = (values < table['low']) | (values > table['high'])
+    if np.any(outside):
+        raise ValueError(f"{method} {np.extract(outside, values)[0]:g} мм датировка жадвали "
+                         f"диапазонидан ташқарида ({table['low']:g}-{table['high']:g} мм)")
+    index = np.rint((values - table['low']) / MM_STEP).astype(np.int64)
+    days = table['days'][index]
+    return float(days) if np.ndim(days) == 0 else days
+
+def measurement_range(method, first_day, last_day):
+    """Муддати first_day..last_day кунга тўғри келадиган ўлчовлар диапазони (мм)"""
+    table = DATING_TABLES[method]
+    whole_days = np.floor(table['days'])
+    inside = np.nonzero((whole_days >= first_day) & (whole_days <= last_day))[0]
+    if inside.size == 0:
+        raise ValueError(f"{method} жадвалида {first_day}-{last_day} кунларга мос ўлчов йўқ")
+    return (round(table['low'] + inside[0] * MM_STEP, 1), round(table['low'] + inside[-1] * MM_STEP, 1))
+
+def ga_days_from_crl(crl_mm):
+    """CRL бўйича гестацион муддат (кун)"""
+    return ga_days_from_measurement(crl_mm, 'CRL')
+
+def ga_days_from_bpd(bpd_mm):
+    """BPD бўйича гестацион муддат (кун)"""
+    return ga_days_from_measurement(bpd_mm, 'BPD')
+
+def format_gestational_age(days):
+    """Кунларни 'ҳафта+кун' кўринишида форматлаш (масалан 12+6)"""
+    days = int(days)
+    return f"{days // 7}+{days % 7}"
+
+# ==================== КУНЛИК МЕДИАНАЛАР ====================
+
+def compile_median_table(median_values):
+    """
+    Ҳафталик медианалардан кунлик жадвал тузиш (биринчи ҳафтанинг 0-кунидан
+    охирги ҳафтанинг 6-кунигача). Ҳафталар орасида логарифмик-чизиқли
+    интерполяция, четларда энг яқин ҳафта.
+    """
+    weeks = sorted(median_values)
+    anchor_days = np.array([week * 7 + WEEK_ANCHOR_DAY for week in weeks], dtype=float)
+    log_medians = np.log([float(median_values[week]) for week in weeks])
+
+    first_day, last_day = weeks[0] * 7, weeks[-1] * 7 + 6
+    days = np.arange(first_day, last_day + 1)
+    return {
+        'first_day': first_day,
+        'last_day': last_day,
+        'medians': np.exp(np.interp(days, anchor_days, log_medians)),
+    }
+
+def compile_norms_tables(norms):
+    """Нормалар тўплами учун барча маркерларнинг кунлик жадваллари"""
+    return {parameter: compile_median_table(spec['median_values']) for parameter, spec in norms.items()}
+
+def median_for_days(table, ga_days):
+    """
+    Кунлик жадвалдан медиана (скаляр ёки массив). Жадвалдан ташқари кун учун
+    ValueError - четки ҳафта медианаси бошқа муддатга нотўғри MoM беради.
+    """
+    medians = table['medians']
+    index = np.rint(np.asarray(ga_days, dtype=float)).astype(np.int64) - table['first_day']
+    outside = (index < 0) | (index >= len(medians))
+    if np.any(outside):
+        day = int(np.extract(outside, index)[0]) + table['first_day']
+        raise ValueError(f"Гестацион муддат {format_gestational_age(day)} норма жадвалидан ташқарида "
+                         f"({format_gestational_age(table['first_day'])} - {format_gestational_age(table['last_day'])})")
+    result = medians[index]
+    return float(result) if np.ndim(result) == 0 else result
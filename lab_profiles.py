@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ЛАБОРАТОРИЯЛАР (КЎП ЛАБОРАТОРИЯЛИ ИШЛАШ)
+Ҳар бир шифохона лабораторияси ўз реагент лотлари ва популяцияси учун ўз
+нормаларига (fit_norms.py файли), кунлик медиана жадвалларига ва ёш хавф
+жадвалига эга. Профиллар labs.json (ёки SCREENING_LABS_FILE) дан бир марта
+юкланади ва компиляция қилинади:
+
+    {"default": "navoiy",
+     "labs": [
+       {"id": "navoiy", "name": "Навоий вилоят перинатал маркази"},
+       {"id": "zarafshon", "name": "Зарафшон шаҳар шифохонаси",
+        "norms_file": "norms/zarafshon.json",
+        "age_risk_multipliers": {"20": {"downs": 0.5, ...}, ...}}
+     ]}
+
+Нормалар файли кўрсатилмаса ўрнатилган нормалар ишлатилади. Лаборатория
+маълумотлари (беморлар омбори, аудит, QC, оммавий вазифалар) алоҳида
+папкаларда сақланади; асосий лаборатория эски йўлларда қолади.
+
+    python lab_profiles.py show
+    python lab_profiles.py verify
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from functools import lru_cache
+
+import risk_engine
+from gestational_dating import compile_norms_tables
+
+DEFAULT_LABS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "labs.json")
+
+# Конфигурация бўлмаса - битта ўрнатилган лаборатория
+BUILTIN_LAB_ID = "default"
+BUILTIN_LAB_NAME = "Асосий лаборатория"
+
+# Лаборатория ID си папка номи сифатида ишлатилади
+LAB_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+
+class LabProfile:
+    """Лаборатория нормалари, кунлик жадваллари ва ёш жадвали (компиляция қилинган)"""
+
+    def __init__(self, lab_id, name, norms_version, first_norms, second_norms, age_risk_multipliers,
+                 median_tables=None):
+        self.lab_id = lab_id
+        self.name = name
+        self.norms_version = norms_version
+        self.first_norms = first_norms
+        self.second_norms = second_norms
+        self.age_risk_multipliers = age_risk_multipliers
+        self.median_tables = median_tables or {
+            'first': compile_norms_tables(first_norms),
+            'second': compile_norms_tables(second_norms),
+        }
+        self._decision_table = None
+        self._lock = threading.Lock()
+
+    def norms(self, trimester):
+        return self.first_norms if trimester == "first" else self.second_norms
+
+    @property
+    def decision_table(self):
+        """Лаборатория ёш жадвали бўйича қарор жадвали (биринчи чақирувда компиляция қилинади)"""
+        with self._lock:
+            if self._decision_table is None:
+                from decision_table import DecisionTable, get_decision_table
+
+                if self.age_risk_multipliers is risk_engine.AGE_RISK_MULTIPLIERS:
+                    self._decision_table = get_decision_table()
+                else:
+                    self._decision_table = DecisionTable(self)
+            return self._decision_table
+
+    def __repr__(self):
+        return f"LabProfile({self.lab_id!r}, norms={self.norms_version!r})"
+
+def builtin_profile(lab_id=BUILTIN_LAB_ID, name=BUILTIN_LAB_NAME):
+    """Ўрнатилган нормалар профили (risk_engine жадваллари қайта компиляция қилинмайди)"""
+    return LabProfile(
+        lab_id, name, risk_engine.NORMS_VERSION,
+        risk_engine.DELFIA_FIRST_TRIMESTER_NORMS, risk_engine.DELFIA_SECOND_TRIMESTER_NORMS,
+        risk_engine.AGE_RISK_MULTIPLIERS, risk_engine.MEDIAN_TABLES,
+    )
+
+def _age_table(spec, lab_id):
+    """JSON ёш жадвали: калитлар сатр - ёшларни int га, барча синдромлар бўлиши керак"""
+    syndromes = set(risk_engine.AGE_RISK_MULTIPLIERS[min(risk_engine.AGE_RISK_MULTIPLIERS)])
+    table = {}
+    for age, multipliers in spec.items():
+        if set(multipliers) != syndromes:
+            raise ValueError(f"Лаборатория {lab_id}: {age} ёш учун синдромлар {sorted(syndromes)} бўлиши керак")
+        table[int(age)] = {syndrome: float(value) for syndrome, value in multipliers.items()}
+    if len(table) < 2:
+        raise ValueError(f"Лаборатория {lab_id}: ёш жадвалида камида икки ёш бўлиши керак")
+    return table
+
+def load_lab_profiles(path=None):
+    """Профиллар {ID: LabProfile} ва асосий лаборатория ID си; файл бўлмаса - ўрнатилган битта"""
+    if not path or not os.path.exists(path):
+        return {BUILTIN_LAB_ID: builtin_profile()}, BUILTIN_LAB_ID
+
+    with open(path, encoding='utf-8') as labs_file:
+        document = json.load(labs_file)
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    profiles = {}
+    for spec in document.get('labs', []):
+        lab_id = str(spec.get('id', ''))
+        if not LAB_ID_PATTERN.match(lab_id):
+            raise ValueError(f"Нотўғри лаборатория ID си: {lab_id!r} (кичик лотин ҳарфлари, рақамлар, _ ва -)")
+        if lab_id in profiles:
+            raise ValueError(f"Лаборатория ID си такрорланган: {lab_id}")
+
+        name = spec.get('name') or lab_id
+        if spec.get('norms_file'):
+            norms_path = os.path.join(base_dir, spec['norms_file'])
+            version, first_norms, second_norms = risk_engine.load_norms_file(norms_path)
+            profile = LabProfile(lab_id, name, version, first_norms, second_norms, risk_engine.AGE_RISK_MULTIPLIERS)
+        else:
+            profile = builtin_profile(lab_id, name)
+        if spec.get('age_risk_multipliers'):
+            profile.age_risk_multipliers = _age_table(spec['age_risk_multipliers'], lab_id)
+        profiles[lab_id] = profile
+
+    if not profiles:
+        raise ValueError(f"{path}: лабораториялар рўйхати бўш")
+    default_lab = document.get('default') or next(iter(profiles))
+    if default_lab not in profiles:
+        raise ValueError(f"Асосий лаборатория рўйхатда йўқ: {default_lab}")
+    return profiles, default_lab
+
+@lru_cache(maxsize=1)
+def get_lab_profiles():
+    """Жараён бўйича битта профиллар тўплами: ({ID: LabProfile}, асосий ID)"""
+    return load_lab_profiles(os.environ.get("SCREENING_LABS_FILE", DEFAULT_LABS_PATH))
+
+def default_lab_id():
+    """SCREENING_LAB_ID (бўлса) ёки конфигурациядаги асосий лаборатория"""
+    profiles, default_lab = get_lab_profiles()
+    lab_id = os.environ.get("SCREENING_LAB_ID", default_lab)
+    return lab_id if lab_id in profiles else default_lab
+
+def get_lab(lab_id=None):
+    """Лаборатория профили (None - асосий); номаълум ID учун KeyError"""
+    profiles, default_lab = get_lab_profiles()
+    lab_id = lab_id or default_lab
+    if lab_id not in profiles:
+        raise KeyError(f"Номаълум лаборатория: {lab_id}")
+    return profiles[lab_id]
+
+def partition_path(path, lab_id):
+    """
+    Лаборатория маълумотлари йўли: асосий лаборатория - ўзгаришсиз (мавжуд
+    маълумотлар сақланади), бошқалари - <папка>/labs/<ID>/<ном>
+    """
+    if not path or lab_id is None or lab_id == get_lab_profiles()[1]:
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(path)), "labs", lab_id, os.path.basename(path))
+
+def main():
+    parser = argparse.ArgumentParser(description="Лабораториялар профиллари")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('show', help="Юкланган профиллар")
+    subparsers.add_parser('verify', help="Ҳар бир лаборатория қарор жадвалини асл функция билан солиштириш")
+    args = parser.parse_args()
+
+    profiles, default_lab = get_lab_profiles()
+    if args.command == 'show':
+        for lab_id, profile in profiles.items():
+            marker = "*" if lab_id == default_lab else " "
+            ages = sorted(profile.age_risk_multipliers)
+            print(f"{marker} {lab_id:<16} {profile.name:<36} {profile.norms_version:<28} ёш: {ages[0]}-{ages[-1]}")
+        return 0
+
+    from decision_table import verify_against_scalar
+
+    failed = False
+    for lab_id, profile in profiles.items():
+        for trimester, (cases, worst, mismatches) in verify_against_scalar(profile.decision_table).items():
+            print(f"{lab_id:<16} {trimester:<11} ҳолатлар: {cases}  энг катта нисбий фарқ: {worst:.2e}  "
+                  f"мос эмас: {mismatches}")
+            failed |= bool(mismatches)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
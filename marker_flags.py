@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+МАРКЕРЛАР БЕЛГИЛАРИ (ҚОИДАЛАР)
+Маркер натижасини "нормал / ненормал / критик" деб белгилаш қоидалари:
+маркер, асос (MoM ёки хом қиймат), йўналиш, чегара ва даража. Қоидалар
+JSON файлдан (SCREENING_MARKER_FLAGS ёки marker_flags.json) ёки стандарт
+рўйхатдан юкланади ва маркерлар бўйича массивларга компиляция қилинади -
+интерфейс, ҳисоботлар ва оммавий экспорт бир хил векторлаштирилган
+баҳолашни ишлатади.
+
+    python marker_flags.py show
+    python marker_flags.py report --db data/screening.db
+"""
+
+import argparse
+import json
+import operator
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from risk_engine import MARKER_RECORD_KEYS
+
+# Скрининг турида кўрсатиладиган маркерлар: (параметр, ном, хом қиймат бирлиги)
+FLAG_MARKERS = {
+    'first': [('NT', "NT", "мм"), ('PAPP_A', "PAPP-A", "U/L"), ('FREE_BETA_HCG', "Free β-hCG", "ng/ml")],
+    'second': [('AFP', "AFP", "ng/ml"), ('TOTAL_HCG', "Total hCG", "IU/L"), ('UE3', "uE3", "nmol/L")],
+}
+MARKER_UNITS = {parameter: unit for markers in FLAG_MARKERS.values() for parameter, _, unit in markers}
+MARKER_NAMES = {parameter: name for markers in FLAG_MARKERS.values() for parameter, name, _ in markers}
+
+# Даражалар (рақам - устуворлик; 0 - нормал)
+SEVERITIES = {'normal': 0, 'abnormal': 1, 'critical': 2}
+SEVERITY_LABELS = {'normal': "Нормал", 'abnormal': "Ненормал", 'critical': "Критик"}
+SEVERITY_NAMES = {rank: name for name, rank in SEVERITIES.items()}
+
+BASES = ('mom', 'raw')
+DIRECTIONS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+
+# NT - ультратовуш ўлчови (мм), қолганлари MoM бўйича
+DEFAULT_FLAG_RULES = [
+    {'id': 'nt_high', 'marker': 'NT', 'basis': 'raw', 'direction': '>', 'threshold': 2.5, 'severity': 'abnormal'},
+    {'id': 'nt_critical', 'marker': 'NT', 'basis': 'raw', 'direction': '>=', 'threshold': 3.5, 'severity': 'critical'},
+    {'id': 'papp_low', 'marker': 'PAPP_A', 'basis': 'mom', 'direction': '<', 'threshold': 0.4, 'severity': 'abnormal'},
+    {'id': 'hcg_high', 'marker': 'FREE_BETA_HCG', 'basis': 'mom', 'direction': '>', 'threshold': 2.0, 'severity': 'abnormal'},
+    {'id': 'afp_high', 'marker': 'AFP', 'basis': 'mom', 'direction': '>', 'threshold': 2.0, 'severity': 'abnormal'},
+    {'id': 'afp_ntd', 'marker': 'AFP', 'basis': 'mom', 'direction': '>=', 'threshold': 2.5, 'severity': 'critical'},
+    {'id': 'total_hcg_high', 'marker': 'TOTAL_HCG', 'basis': 'mom', 'direction': '>', 'threshold': 2.0, 'severity': 'abnormal'},
+    {'id': 'ue3_low', 'marker': 'UE3', 'basis': 'mom', 'direction': '<', 'threshold': 0.5, 'severity': 'abnormal'},
+]
+
+DEFAULT_FLAGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "marker_flags.json")
+
+def load_flag_rules(path=None):
+    """Қоидалар рўйхати: JSON файл ({"rules": [...]}) бўлса ундан, бўлмаса стандарт"""
+    rules = DEFAULT_FLAG_RULES
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as config_file:
+            configured = json.load(config_file)
+        rules = configured.get('rules', configured) if isinstance(configured, dict) else configured
+
+    rules = [dict(rule) for rule in rules]
+    for index, rule in enumerate(rules):
+        rule.setdefault('id', f"rule_{index}")
+        if rule.get('marker') not in MARKER_RECORD_KEYS:
+            raise ValueError(f"Қоида {rule['id']}: номаълум маркер {rule.get('marker')}")
+        if rule.get('basis') not in BASES:
+            raise ValueError(f"Қоида {rule['id']}: асос 'mom' ёки 'raw' бўлиши керак")
+        if rule.get('direction') not in DIRECTIONS:
+            raise ValueError(f"Қоида {rule['id']}: номаълум йўналиш {rule.get('direction')}")
+        if rule.get('severity') not in SEVERITIES or rule['severity'] == 'normal':
+            raise ValueError(f"Қоида {rule['id']}: номаълум даража {rule.get('severity')}")
+        rule['threshold'] = float(rule['threshold'])
+    return rules
+
+def describe_rule(rule):
+    """Қоида матни: 'MoM < 0.4' ёки '> 2.5 мм'"""
+    if rule['basis'] == 'mom':
+        return f"MoM {rule['direction']} {rule['threshold']:g}"
+    return f"{rule['direction']} {rule['threshold']:g} {MARKER_UNITS.get(rule['marker'], '')}".strip()
+
+def _normal_range(rules):
+    """Маркер учун нормал оралиқ матни (энг юмшоқ чегаралар бўйича)"""
+    parts = []
+    for direction, bound in (('>', min), ('<', max)):
+        thresholds = [rule for rule in rules if rule['direction'].startswith(direction)]
+        if thresholds:
+            edge = bound(thresholds, key=lambda rule: rule['threshold'])
+            inverse = {'>': '≤', '>=': '<', '<': '≥', '<=': '>'}[edge['direction']]
+            unit = "MoM" if edge['basis'] == 'mom' else MARKER_UNITS.get(edge['marker'], '')
+            parts.append(f"{inverse}{edge['threshold']:g} {unit}".strip())
+    return ", ".join(parts)
+
+class FlagRuleSet:
+    """
+    Компиляция қилинган қоидалар: ҳар бир маркер учун асос индекси, чегара
+    ва даража массивлари. Баҳолаш (қоидалар × ёзувлар) матрицаси бўйича -
+    даража энг юқори бўлган биринчи қоида танланади.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.markers = {}
+        for marker in dict.fromkeys(rule['marker'] for rule in rules):
+            indices = [index for index, rule in enumerate(rules) if rule['marker'] == marker]
+            marker_rules = [rules[index] for index in indices]
+            self.markers[marker] = {
+                'indices': np.array(indices),
+                'basis': np.array([BASES.index(rule['basis']) for rule in marker_rules]),
+                'threshold': np.array([rule['threshold'] for rule in marker_rules]),
+                'severity': np.array([SEVERITIES[rule['severity']] for rule in marker_rules]),
+                'ops': [(DIRECTIONS[direction], np.array([rule['direction'] == direction for rule in marker_rules]))
+                        for direction in dict.fromkeys(rule['direction'] for rule in marker_rules)],
+                'normal_range': _normal_range(marker_rules),
+            }
+
+    def evaluate(self, marker, raw=None, mom=None):
+        """
+        Битта маркер бўйича массив баҳолаш.
+        Натижа: (даража рақами, қоида индекси; қоида йўқ бўлса -1). NaN - белги йўқ.
+        """
+        compiled = self.markers.get(marker)
+        size = len(np.atleast_1d(mom if raw is None else raw))
+        if compiled is None:
+            return np.zeros(size, dtype=np.int8), np.full(size, -1)
+
+        nan = np.full(size, np.nan)
+        values = np.stack([
+            nan if mom is None else np.asarray(mom, dtype=float).reshape(size),
+            nan if raw is None else np.asarray(raw, dtype=float).reshape(size),
+        ])[compiled['basis']]
+        thresholds = compiled['threshold'][:, None]
+
+        hits = np.zeros(values.shape, dtype=bool)
+        for compare, selected in compiled['ops']:
+            hits[selected] = compare(values[selected], thresholds[selected])
+
+        ranks = np.where(hits, compiled['severity'][:, None], 0)
+        best = ranks.argmax(axis=0)
+        severity = ranks.max(axis=0).astype(np.int8)
+        rule_index = np.where(severity > 0, compiled['indices'][best], -1)
+        return severity, rule_index
+
+    def flag_record(self, record):
+        """Сақланган ёзув маркерлари учун белгилар (интерфейс ва ҳисоботлар учун)"""
+        params = record['parameters']
+        trimester = 'first' if record.get('screening_type') == 'first' else 'second'
+        flags = []
+        for parameter, name, unit in FLAG_MARKERS[trimester]:
+            raw_key = MARKER_RECORD_KEYS[parameter]
+            value, mom = params.get(raw_key), params.get(f"{raw_key}_mom")
+            severity, rule_index = self.evaluate(
+                parameter, np.nan if value is None else value, np.nan if mom is None else mom
+            )
+            rule = self.rules[rule_index[0]] if rule_index[0] >= 0 else None
+            flags.append({
+                'marker': parameter, 'name': name, 'unit': unit, 'value': value, 'mom': mom,
+                'severity': SEVERITY_NAMES[int(severity[0])], 'rule': rule,
+                'normal_range': self.markers.get(parameter, {}).get('normal_range', ""),
+            })
+        return flags
+
+    def flag_frame(self, frame):
+        """Жадвалга <маркер>_flag ва <маркер>_flag_rule устунларини қўшиш (хом ва _mom устунлар бўйича)"""
+        for parameter in self.markers:
+            raw_key = MARKER_RECORD_KEYS[parameter]
+            if raw_key not in frame and f"{raw_key}_mom" not in frame:
+                continue
+            severity, rule_index = self.evaluate(
+                parameter,
+                frame[raw_key].to_numpy(dtype=float) if raw_key in frame else None,
+                frame[f"{raw_key}_mom"].to_numpy(dtype=float) if f"{raw_key}_mom" in frame else None,
+            )
+            names = np.array(["" if rank == 0 else SEVERITY_NAMES[rank] for rank in range(len(SEVERITIES))], dtype=object)
+            rule_ids = np.array([rule['id'] for rule in self.rules] + [""], dtype=object)
+            frame[f"{raw_key}_flag"] = names[severity]
+            frame[f"{raw_key}_flag_rule"] = rule_ids[rule_index]
+        return frame
+
+@lru_cache(maxsize=1)
+def get_flag_rules():
+    """Жараён бўйича битта компиляция қилинган қоидалар тўплами"""
+    return FlagRuleSet(load_flag_rules(os.environ.get("SCREENING_MARKER_FLAGS", DEFAULT_FLAGS_PATH)))
+
+def flag_report(db_path, batch_size=5000):
+    """Сақланган ёзувлар бўйича: маркер ва қоида бўйича белгилар сони (пакетлаб)"""
+    from patient_store import iter_store_records
+
+    rule_set = get_flag_rules()
+    counts = {}
+    totals = {}
+    batch = []
+
+    def flush():
+        for parameter in rule_set.markers:
+            raw_key = MARKER_RECORD_KEYS[parameter]
+            rows = [record['parameters'] for record in batch if raw_key in record.get('parameters', {})]
+            if not rows:
+                continue
+            raw = np.array([row[raw_key] for row in rows], dtype=float)
+            mom = np.array([row.get(f"{raw_key}_mom", np.nan) for row in rows], dtype=float)
+            _, rule_index = rule_set.evaluate(parameter, raw, mom)
+            totals[parameter] = totals.get(parameter, 0) + len(rows)
+            for index, count in zip(*np.unique(rule_index[rule_index >= 0], return_counts=True)):
+                counts[int(index)] = counts.get(int(index), 0) + int(count)
+        batch.clear()
+
+    for record in iter_store_records(db_path, batch_size):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return [
+        {'rule': rule, 'flagged': counts.get(index, 0), 'total': totals.get(rule['marker'], 0)}
+        for index, rule in enumerate(rule_set.rules)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Маркерлар белгилари қоидалари")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('show', help="Юкланган қоидалар")
+    report_parser = subparsers.add_parser('report', help="Сақланган ёзувлар бўйича белгилар сони")
+    report_parser.add_argument('--db', required=True, help="SQLite омбори")
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        for rule in get_flag_rules().rules:
+            print(f"{rule['id']:<20} {MARKER_NAMES.get(rule['marker'], rule['marker']):<12} "
+                  f"{describe_rule(rule):<16} {SEVERITY_LABELS[rule['severity']]}")
+        return 0
+
+    for row in flag_report(args.db):
+        rule = row['rule']
+        share = row['flagged'] / row['total'] * 100 if row['total'] else 0.0
+        print(f"{rule['id']:<20} {MARKER_NAMES.get(rule['marker'], rule['marker']):<12} {describe_rule(rule):<16} "
+              f"{row['flagged']:>8} / {row['total']:<8} ({share:.2f}%)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
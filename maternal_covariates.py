@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ОНА ВА ҲОМИЛАДОРЛИК ОМИЛЛАРИ БЎЙИЧА MoM КОРРЕКЦИЯСИ
+Эгизаклар, ЭКО (IVF), чекиш, қандли диабет ва этник келиб чиқиш.
+
+Омиллар битта бутун сонга (омиллар коди) кодланади. Ҳар бир триместр учун
+барча кодлар x маркерлар кўпайтирувчилари жадвали модул юкланганда бир марта
+тузилади; скаляр ва пакетли ҳисоблаш шу жадвалдан ўқийди.
+
+Тузатилган MoM = MoM / кўпайтирувчи
+"""
+
+import numpy as np
+
+# Иккилик омиллар (код битлари тартибида)
+BINARY_COVARIATES = ('twins', 'ivf', 'smoking', 'diabetes')
+
+COVARIATE_LABELS = {
+    'twins': "Эгизаклар",
+    'ivf': "ЭКО (IVF)",
+    'smoking': "Чекиш",
+    'diabetes': "Қандли диабет (инсулинга боғлиқ)"
+}
+
+# Этник гуруҳлар: биринчиси - таянч популяция (кўпайтирувчи 1.0)
+ETHNICITIES = ('central_asian', 'european', 'east_asian', 'south_asian', 'african')
+
+ETHNICITY_LABELS = {
+    'central_asian': "Марказий Осиё",
+    'european': "Европа",
+    'east_asian': "Шарқий Осиё",
+    'south_asian': "Жанубий Осиё",
+    'african': "Африка"
+}
+
+ETHNICITY_SHIFT = len(BINARY_COVARIATES)
+COVARIATE_CODE_COUNT = len(ETHNICITIES) << ETHNICITY_SHIFT
+
+# Омил бўйича маркер медианаси кўпайтирувчилари (кўрсатилмаган - 1.0)
+COVARIATE_FACTORS = {
+    'first': {
+        'twins': {'PAPP_A': 2.10, 'FREE_BETA_HCG': 2.00},
+        'ivf': {'PAPP_A': 0.90, 'FREE_BETA_HCG': 1.10, 'NT': 1.03},
+        'smoking': {'PAPP_A': 0.85, 'FREE_BETA_HCG': 0.80, 'NT': 1.05},
+        'diabetes': {'PAPP_A': 0.90, 'FREE_BETA_HCG': 0.95},
+        'european': {},
+        'east_asian': {'PAPP_A': 1.17, 'FREE_BETA_HCG': 1.06, 'NT': 0.96},
+        'south_asian': {'PAPP_A': 1.15, 'FREE_BETA_HCG': 1.09, 'NT': 0.97},
+        'african': {'PAPP_A': 1.57, 'FREE_BETA_HCG': 1.17, 'NT': 0.95}
+    },
+    'second': {
+        'twins': {'AFP': 2.10, 'TOTAL_HCG': 1.90, 'UE3': 1.70},
+        'ivf': {'AFP': 0.95, 'TOTAL_HCG': 1.07, 'UE3': 0.92},
+        'smoking': {'AFP': 1.03, 'TOTAL_HCG': 0.77, 'UE3': 0.97},
+        'diabetes': {'AFP': 0.80, 'UE3': 0.95},
+        'european': {},
+        'east_asian': {'AFP': 1.05, 'TOTAL_HCG': 1.05},
+        'south_asian': {'TOTAL_HCG': 1.05, 'UE3': 0.95},
+        'african': {'AFP': 1.12, 'TOTAL_HCG': 1.10}
+    }
+}
+
+TRIMESTER_PARAMETERS = {
+    'first': ('NT', 'PAPP_A', 'FREE_BETA_HCG'),
+    'second': ('AFP', 'TOTAL_HCG', 'UE3')
+}
+
+def covariate_code(covariates=None):
+    """Омиллар луғатини кодга айлантириш ({'twins': True, 'ethnicity': 'african', ...})"""
+    covariates = covariates or {}
+    code = 0
+    for bit, name in enumerate(BINARY_COVARIATES):
+        if covariates.get(name):
+            code |= 1 << bit
+    ethnicity = covariates.get('ethnicity') or ETHNICITIES[0]
+    return code | (ETHNICITIES.index(ethnicity) << ETHNICITY_SHIFT)
+
+def decode_covariates(code):
+    """Коддан омиллар луғати"""
+    code = int(code or 0)
+    covariates = {name: bool(code & (1 << bit)) for bit, name in enumerate(BINARY_COVARIATES)}
+    covariates['ethnicity'] = ETHNICITIES[code >> ETHNICITY_SHIFT]
+    return covariates
+
+def describe_covariates(code):
+    """Фаол омиллар рўйхати (таянч ҳолатда бўш)"""
+    covariates = decode_covariates(code)
+    labels = [COVARIATE_LABELS[name] for name in BINARY_COVARIATES if covariates[name]]
+    if covariates['ethnicity'] != ETHNICITIES[0]:
+        labels.append(ETHNICITY_LABELS[covariates['ethnicity']])
+    return labels
+
+def build_correction_tables(factors=COVARIATE_FACTORS):
+    """Ҳар бир триместр учун [код, маркер] кўпайтирувчилари жадвали"""
+    tables = {}
+    for trimester, parameters in TRIMESTER_PARAMETERS.items():
+        table = np.ones((COVARIATE_CODE_COUNT, len(parameters)))
+        for code in range(COVARIATE_CODE_COUNT):
+            covariates = decode_covariates(code)
+            active = [name for name in BINARY_COVARIATES if covariates[name]] + [covariates['ethnicity']]
+            for column, parameter in enumerate(parameters):
+                for name in active:
+                    table[code, column] *= factors[trimester].get(name, {}).get(parameter, 1.0)
+        tables[trimester] = table
+    return tables
+
+CORRECTION_TABLES = build_correction_tables()
+
+def covariate_factor(parameter, trimester, code=0):
+    """Маркер учун омиллар кўпайтирувчиси (скаляр)"""
+    parameters = TRIMESTER_PARAMETERS[trimester]
+    if not code or parameter not in parameters:
+        return 1.0
+    return float(CORRECTION_TABLES[trimester][code, parameters.index(parameter)])
+
+def covariate_factor_array(codes, parameter, trimester):
+    """Маркер учун омиллар кўпайтирувчилари (кодлар массиви бўйича)"""
+    parameters = TRIMESTER_PARAMETERS[trimester]
+    codes = np.asarray(codes, dtype=np.int64)
+    if parameter not in parameters:
+        return np.ones(codes.shape)
+    return CORRECTION_TABLES[trimester][codes, parameters.index(parameter)]
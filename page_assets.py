@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+САҲИФАНИНГ СТАТИК ҚИСМЛАРИ
+CSS ва HTML блоклар жараён бўйича бир марта юкланади
+"""
+
+# ==================== CSS СТИЛЛАР ====================
+PAGE_CSS = """
+<style>
+/* Асосий сарлавҳа */
+.main-title {
+    font-size: 2.8rem;
+    font-weight: 800;
+    text-align: center;
+    background: linear-gradient(90deg, #0d47a1, #1565c0, #1976d2);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    margin: 20px 0;
+    padding: 15px;
+    border-radius: 15px;
+    border: 3px solid #bbdefb;
+    box-shadow: 0 8px 25px rgba(33, 150, 243, 0.15);
+}
+
+.sub-title {
+    font-size: 1.4rem;
+    text-align: center;
+    color: #1565c0;
+    margin-bottom: 30px;
+    padding: 15px;
+    background: linear-gradient(90deg, #e3f2fd, #bbdefb);
+    border-radius: 12px;
+    border: 2px solid #90caf9;
+}
+
+/* Скрининг тугмалари */
+.screening-btn {
+    font-size: 1.1rem;
+    font-weight: 600;
+    padding: 15px;
+    border-radius: 10px;
+    transition: all 0.3s ease;
+    margin: 5px 0;
+}
+
+.screening-btn:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 5px 15px rgba(0,0,0,0.1);
+}
+
+/* Синдром карталари */
+.syndrome-card {
+    padding: 20px;
+    border-radius: 15px;
+    margin: 15px 0;
+    border: 3px solid;
+    transition: all 0.3s ease;
+    box-shadow: 0 5px 15px rgba(0,0,0,0.08);
+}
+
+.syndrome-card:hover {
+    transform: translateY(-3px);
+    box-shadow: 0 8px 25px rgba(0,0,0,0.15);
+}
+
+.downs-card { border-color: #ff6b6b; background: linear-gradient(135deg, #ffebee, #ffcdd2); }
+.edwards-card { border-color: #ff9800; background: linear-gradient(135deg, #fff3e0, #ffe0b2); }
+.patau-card { border-color: #ff5722; background: linear-gradient(135deg, #fbe9e7, #ffccbc); }
+.turner-card { border-color: #9c27b0; background: linear-gradient(135deg, #f3e5f5, #e1bee7); }
+.ntd-card { border-color: #4caf50; background: linear-gradient(135deg, #e8f5e9, #c8e6c9); }
+
+/* Хавф категориялари */
+.risk-critical {
+    background: linear-gradient(135deg, #b71c1c, #d32f2f);
+    color: white;
+    padding: 12px 25px;
+    border-radius: 25px;
+    font-weight: bold;
+    display: inline-block;
+    border: 3px solid #ff5252;
+    box-shadow: 0 6px 20px rgba(183, 28, 28, 0.3);
+    animation: pulse 2s infinite;
+    font-size: 1.1rem;
+}
+
+.risk-high {
+    background: linear-gradient(135deg, #e65100, #f57c00);
+    color: white;
+    padding: 12px 25px;
+    border-radius: 25px;
+    font-weight: bold;
+    display: inline-block;
+    border: 3px solid #ffb74d;
+    box-shadow: 0 6px 18px rgba(230, 81, 0, 0.3);
+    font-size: 1.1rem;
+}
+
+.risk-medium {
+    background: linear-gradient(135deg, #f57f17, #f9a825);
+    color: #333;
+    padding: 12px 25px;
+    border-radius: 25px;
+    font-weight: bold;
+    display: inline-block;
+    border: 3px solid #ffd54f;
+    box-shadow: 0 6px 16px rgba(245, 127, 23, 0.3);
+    font-size: 1.1rem;
+}
+
+.risk-low {
+    background: linear-gradient(135deg, #1b5e20, #388e3c);
+    color: white;
+    padding: 12px 25px;
+    border-radius: 25px;
+    font-weight: bold;
+    display: inline-block;
+    border: 3px solid #66bb6a;
+    box-shadow: 0 6px 16px rgba(27, 94, 32, 0.3);
+    font-size: 1.1rem;
+}
+
+.risk-unknown {
+    background: linear-gradient(135deg, #616161, #9e9e9e);
+    color: white;
+    padding: 12px 25px;
+    border-radius: 25px;
+    font-weight: bold;
+    display: inline-block;
+    border: 3px solid #bdbdbd;
+    font-size: 1.1rem;
+}
+
+/* Анимация */
+@keyframes pulse {
+    0% { transform: scale(1); box-shadow: 0 0 0 0 rgba(183, 28, 28, 0.7); }
+    50% { transform: scale(1.05); }
+    70% { box-shadow: 0 0 0 15px rgba(183, 28, 28, 0); }
+    100% { transform: scale(1); box-shadow: 0 0 0 0 rgba(183, 28, 28, 0); }
+}
+
+/* Метрика карталари */
+.metric-card {
+    background: white;
+    padding: 20px;
+    border-radius: 15px;
+    box-shadow: 0 5px 15px rgba(0,0,0,0.08);
+    margin: 10px 0;
+    border-left: 5px solid #2196f3;
+    transition: all 0.3s ease;
+}
+
+.metric-card:hover {
+    transform: translateY(-3px);
+    box-shadow: 0 8px 25px rgba(0,0,0,0.15);
+}
+
+/* Инфо блоки */
+.info-box {
+    background: linear-gradient(135deg, #e3f2fd, #bbdefb);
+    padding: 20px;
+    border-radius: 15px;
+    border: 2px solid #90caf9;
+    margin: 20px 0;
+}
+
+/* Тавсия блоки */
+.recommendation-box {
+    background: linear-gradient(135deg, #fff8e1, #ffecb3);
+    padding: 20px;
+    border-radius: 15px;
+    border: 2px solid #ffd54f;
+    margin: 20px 0;
+}
+
+/* Хавфсизлик ёзуви */
+.warning-box {
+    background: linear-gradient(135deg, #ffebee, #ffcdd2);
+    padding: 20px;
+    border-radius: 15px;
+    border: 2px solid #ff5252;
+    margin: 20px 0;
+    color: #c62828;
+}
+
+/* BMI категориялари */
+.bmi-low { color: #0277bd; }
+.bmi-normal { color: #2e7d32; }
+.bmi-overweight { color: #f57c00; }
+.bmi-obese { color: #c62828; }
+</style>
+"""
+
+# ==================== КИРИШ САҲИФАСИ ====================
+LANDING_HTML = """
+    <div style="background: linear-gradient(135deg, #0d47a1 0%, #1976d2 100%); color: white; padding: 40px; border-radius: 20px; margin: 20px 0;">
+        <h2 style="text-align: center; margin-bottom: 20px;">🧬 ГЕНЕТИК СИНДРОМЛАР ХАВФ БАХОЛАШ ДАСТУРИГА ХУШ КЕЛИБСИЗ!</h2>
+        
+        <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px; margin-top: 30px;">
+            
+            <div style="background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px;">
+                <h3>👶 Даун синдроми</h3>
+                <p><strong>Трисомия 21</strong> - интеллектуал нотўликлик, юрак аномалиялари, мускул гипотонияси</p>
+                <p><em>Хавф омиллари:</em> Ҳар иккала ота-онада ёш, оилда борилиги</p>
+            </div>
+            
+            <div style="background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px;">
+                <h3>⚠️ Эдвардс синдроми</h3>
+                <p><strong>Трисомия 18</strong> - оғир кўп орган зарарланиши, йўл-йўлақа аномалиялари</p>
+                <p><em>Хавф омиллари:</em> Онанинг ёши, қийин вазн орттириш</p>
+            </div>
+            
+            <div style="background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px;">
+                <h3>🔬 Патау синдроми</h3>
+                <p><strong>Трисомия 13</strong> - неврологик аномалиялар, кўз ва юз аномалиялари</p>
+                <p><em>Хавф омиллари:</em> Ота-она ёши, радиацияга мулоқот</p>
+            </div>
+            
+            <div style="background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px;">
+                <h3>🧬 Тернер синдроми</h3>
+                <p><strong>45,X</strong> - бўй пастлиги, жинсий руксатсизлик, юрак аномалиялари</p>
+                <p><em>Хавф омиллари:</em> Отанинг ёши, модда алмашинуви</p>
+            </div>
+            
+            <div style="background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px;">
+                <h3>📏 Нейротубуляр дефект</h3>
+                <p><strong>НТД</strong> - спина бифида, анэнцефалия, менингоцеле</p>
+                <p><em>Хавф омиллари:</em> Фолат етишмовчилиги, диабет, ожирение</p>
+            </div>
+            
+            <div style="background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px;">
+                <h3>🎂 Ёш хавфи</h3>
+                <p><strong>35+ ёш</strong> - генетик аномалиялар хавфи каттарок</p>
+                <p><em>Муҳим:</em> 35 ёшдан сўнг хавф асосий омил ҳисобланади</p>
+            </div>
+            
+        </div>
+        
+        <div style="text-align: center; margin-top: 40px; padding: 20px; background: rgba(255,255,255,0.15); border-radius: 10px;">
+            <h3>📋 ДАСТУРНИ ИШЛАТИШ УЧУН ҚАДАМЛАР:</h3>
+            <div style="display: flex; justify-content: center; gap: 30px; flex-wrap: wrap; margin-top: 20px;">
+                <div style="text-align: center;">
+                    <div style="font-size: 2rem;">1️⃣</div>
+                    <p>Чеп томондаги панелда барча маълумотларни тўлдиринг</p>
+                </div>
+                <div style="text-align: center;">
+                    <div style="font-size: 2rem;">2️⃣</div>
+                    <p>Скрининг турини танланг (биринчи ёки иккиламчи)</p>
+                </div>
+                <div style="text-align: center;">
+                    <div style="font-size: 2rem;">3️⃣</div>
+                    <p>«ГЕНЕТИК ХАВФЛАРНИ ҲИСОБЛАШ» тугмасини босинг</p>
+                </div>
+            </div>
+        </div>
+        
+        <div style="margin-top: 30px; padding: 15px; background: rgba(255,255,255,0.1); border-radius: 10px;">
+            <p style="text-align: center; font-style: italic;">
+                <strong>DELFIA Revvity</strong> реагентлари асосида ишлаб чиқилган. 
+                Биринчи ва иккиламчи триместр скрининглари учун мослаштирилган.
+            </p>
+        </div>
+    </div>
+    """
+
+# ==================== ФУТЕР ====================
+FOOTER_HTML = """
+<div style="text-align: center; color: #666; padding: 20px;">
+    <p style="font-size: 1.1rem; font-weight: bold; color: #0d47a1;">
+        © 2024 ГЕНЕТИК СИНДРОМЛАР ХАВФ БАХОЛАШ ДАСТУРИ | DELFIA Revvity асосида
+    </p>
+    <div class="warning-box">
+        <p style="font-size: 0.9rem; font-weight: bold;">
+            ⚕️ <strong>ТИББИЙ ОГОҲЛАНТИРИШ:</strong> Бу дастур фақат ёрдамчи восита сифатида ишлатилади. 
+            Ҳеч қандай ҳолда тиббий қарор қабул қилиш учун ёлғиз асос бўлиб хизмат қилмайди. 
+            Ҳар қандай тиббий қарор қабул қилишдан олдин мутахассис шифокорга мурожаат қилинг.
+        </p>
+        <p style="font-size: 0.8rem; margin-top: 10px;">
+            Дастур базасида илмий адабиётлар, клиник кўрсатмалар ва DELFIA Revvity нормалари асосида ишлаб чиқилган.
+        </p>
+    </div>
+</div>
+"""
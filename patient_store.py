@@ -0,0 +1,833 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+БЕМОРЛАР МАЪЛУМОТЛАРИ ОМБОРИ
+Сессия хотираси ёки бир нечта жараёнлар учун умумий SQLite файли
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import uuid
+import weakref
+from datetime import datetime
+
+from maternal_covariates import covariate_code
+from worklist import Worklist, build_worklist_entry, worklist_priority
+
+# Тарихда кўрсатиладиган охирги ёзувлар сони
+HISTORY_LIMIT = 20
+
+# ==================== ИНТЕГРАЛ СКРИНИНГ ИНДЕКСИ ====================
+
+def normalize_patient_name(name):
+    """Бемор исмини индекс калити учун нормаллаштириш"""
+    return " ".join(str(name or "").lower().split())
+
+def index_first_trimester_record(index, record):
+    """Биринчи скрининг ёзувини индексга қўшиш (исм ва ID бўйича)"""
+    if record.get('screening_type') != 'first':
+        return
+
+    name_key = normalize_patient_name(record.get('name'))
+    if name_key:
+        previous = index.get(name_key)
+        # Бир нечта ёзув бўлса, энг охиргиси сақланади
+        if previous is None or record.get('timestamp', '') >= previous.get('timestamp', ''):
+            index[name_key] = record
+
+    if record.get('patient_id'):
+        index[record['patient_id']] = record
+
+def build_first_trimester_index(records):
+    """Ёзувлар рўйхатидан биринчи скрининг индексини тузиш"""
+    index = {}
+    for record in records:
+        index_first_trimester_record(index, record)
+    return index
+
+class FirstTrimesterLinkError(LookupError):
+    """Биринчи скрининг ёзувини боғлаб бўлмади (ID йўқ, топилмади ёки бошқа беморники)"""
+
+def first_trimester_ages(age):
+    """Иккинчи скрининг ёшига мос биринчи скрининг ёшлари (орада туғилган кун бўлиши мумкин)"""
+    return {int(age), int(age) - 1}
+
+def check_first_trimester_record(record, patient_id, patient_name=None):
+    """ID бўйича топилган ёзувни текшириш: топилмаса ёки исм мос келмаса - FirstTrimesterLinkError"""
+    if record is None:
+        raise FirstTrimesterLinkError(f"Биринчи скрининг ёзуви топилмади: {patient_id}")
+    name_key = normalize_patient_name(patient_name)
+    if name_key and normalize_patient_name(record.get('name')) != name_key:
+        raise FirstTrimesterLinkError(f"{patient_id} бошқа беморга тегишли ({record.get('name')})")
+    return record
+
+def find_first_trimester_record(index, patient_id, patient_name=None):
+    """Биринчи скрининг ёзуви фақат ID бўйича - исм бўйича бошқа ёзув танланмайди"""
+    patient_id = (patient_id or "").strip()
+    if not patient_id:
+        raise FirstTrimesterLinkError("Биринчи скрининг ID си кўрсатилмаган")
+    record = index.get(patient_id)
+    if record is not None and record.get('patient_id') != patient_id:
+        record = None
+    return check_first_trimester_record(record, patient_id, patient_name)
+
+def suggest_first_trimester_record(index, patient_name, age=None):
+    """Исм ва ёш бўйича эҳтимолий биринчи скрининг - фақат таклиф, ID ни фойдаланувчи тасдиқлайди"""
+    name_key = normalize_patient_name(patient_name)
+    record = index.get(name_key) if name_key else None
+    if record is None or normalize_patient_name(record.get('name')) != name_key:
+        return None
+    if age is not None and record.get('age') not in first_trimester_ages(age):
+        return None
+    return record
+
+def link_first_trimester_records(second_records, first_records):
+    """
+    Кўплаб иккинчи скрининг ёзувларини биринчи скрининг билан боғлаш (индекс
+    орқали, фақат linked_first_trimester_id бўйича): [(ёзув, биринчи ёзув ёки None, хато)]
+    """
+    index = build_first_trimester_index(first_records)
+
+    linked = []
+    for record in second_records:
+        try:
+            first_record = find_first_trimester_record(
+                index, record.get('linked_first_trimester_id'), record.get('name')
+            )
+            linked.append((record, first_record, ""))
+        except FirstTrimesterLinkError as e:
+            linked.append((record, None, str(e)))
+
+    return linked
+
+def record_covariate_code(record):
+    """Ёзувдаги омиллар коди (эски ёзувларда 0)"""
+    if 'covariate_code' in record:
+        return int(record['covariate_code'])
+    return covariate_code(record.get('covariates'))
+
+def format_patient_id(sequence, now=None):
+    """Пациент ID ни тузиш (PAT-ЙЙЙЙООКК-NNN)"""
+    now = now or datetime.now()
+    return f"PAT-{now.strftime('%Y%m%d')}-{sequence:03d}"
+
+# ==================== СЕССИЯ ХОТИРАСИДАГИ ОМБОР ====================
+
+class SpilledHistory:
+    """
+    Сессия тарихидан чиқарилган ёзувлар учун вақтинчалик SQLite файли.
+    Объект йўқ қилинганда (сессия ёпилганда) файл ўчирилади.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SPILL_SCHEMA)
+        self._finalizer = weakref.finalize(self, _remove_spill_file, self._conn, path)
+
+    def add(self, records):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO spilled (patient_id, name_key, screening_type, timestamp, record) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    record['patient_id'],
+                    normalize_patient_name(record.get('name')),
+                    record.get('screening_type', 'first'),
+                    record.get('timestamp', ''),
+                    json.dumps(record, ensure_ascii=False),
+                )
+                for record in records
+            ],
+        )
+        self._conn.commit()
+
+    def recent(self, limit):
+        """Охирги чиқарилган ёзувлар (эскидан янгига)"""
+        rows = self._conn.execute("SELECT record FROM spilled ORDER BY seq DESC LIMIT ?", (limit,)).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def find_first_trimester(self, patient_id):
+        """Биринчи скрининг ёзуви ID бўйича (ёки None)"""
+        row = self._conn.execute(
+            "SELECT record FROM spilled WHERE patient_id = ? AND screening_type = 'first'", (patient_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def suggest_first_trimester(self, patient_name, age=None):
+        """Исм ва ёш бўйича энг охирги биринчи скрининг (таклиф учун)"""
+        rows = self._conn.execute(
+            "SELECT record FROM spilled WHERE name_key = ? AND screening_type = 'first' "
+            "ORDER BY timestamp DESC, seq DESC LIMIT 20",
+            (normalize_patient_name(patient_name),),
+        ).fetchall()
+        for row in rows:
+            record = json.loads(row[0])
+            if age is None or record.get('age') in first_trimester_ages(age):
+                return record
+        return None
+
+    def add_worklist(self, entries):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO spilled_worklist (patient_id, entry) VALUES (?, ?)",
+            [(entry['patient_id'], json.dumps(entry, ensure_ascii=False)) for entry in entries],
+        )
+        self._conn.commit()
+
+    def worklist_entries(self):
+        return [json.loads(row[0]) for row in self._conn.execute("SELECT entry FROM spilled_worklist")]
+
+    def resolve_worklist_entry(self, patient_id):
+        cursor = self._conn.execute("DELETE FROM spilled_worklist WHERE patient_id = ?", (patient_id,))
+        self._conn.commit()
+        return cursor.rowcount > 0
+
+    def close(self):
+        self._finalizer()
+
+def _remove_spill_file(conn, path):
+    conn.close()
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+SPILL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spilled (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT NOT NULL UNIQUE,
+    name_key TEXT NOT NULL,
+    screening_type TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_spilled_name ON spilled (name_key, screening_type);
+CREATE TABLE IF NOT EXISTS spilled_worklist (
+    patient_id TEXT PRIMARY KEY,
+    entry TEXT NOT NULL
+);
+"""
+
+class MemoryPatientStore:
+    """
+    Битта Streamlit сессияси учун хотирадаги омбор.
+
+    Хотирада охирги history_limit та ёзув сақланади; эскилари (ва
+    enforce_session_limit чиқарганлари) spill_dir даги вақтинчалик файлга
+    ўтказилади ва интеграл скрининг қидируви ҳамда тарих учун ўқилади.
+    Ёзувлар ҳажми сақлашда бир марта ҳисобланиб, жорий йиғинди юритилади;
+    release() бошқа сессия оқимидан чақирилиши мумкин - барча амаллар қулф остида.
+    """
+
+    def __init__(self, spill_dir=None, history_limit=HISTORY_LIMIT):
+        self.history = []
+        self.counter = 1
+        self.first_trimester_index = {}
+        self.worklist = Worklist()
+        self.cohorts = {}
+        self.history_limit = history_limit
+        self.spill_dir = spill_dir
+        self._spilled = None
+        self._lock = threading.RLock()
+        # Ҳажм ҳисоби: тарих ёзувлари (history тартибида) ва иш рўйхати элементлари
+        self._record_bytes = []
+        self._worklist_bytes = {}
+        self._bytes = 0
+
+        # Такрорийлар индекси - биринчи сақлашда тузилади (сақлаш йўлидан ташқарида керак эмас);
+        # файлга чиқарилган ёзувлар калитлари ҳам сақланади
+        self.dedup = None
+
+    def save_record(self, record):
+        """Ёзувга ID ва вақт бериб сақлаш"""
+        from session_memory import deep_sizeof
+
+        with self._lock:
+            now = datetime.now()
+            record['patient_id'] = format_patient_id(self.counter, now)
+            record['timestamp'] = now.strftime("%Y-%m-%d %H:%M:%S")
+            self.counter += 1
+
+            self.history.append(record)
+            # Ёзув ва унинг индекс калитлари ҳажми
+            record_bytes = deep_sizeof(record) + 2 * deep_sizeof(record['patient_id'])
+            self._record_bytes.append(record_bytes)
+            self._bytes += record_bytes
+            index_first_trimester_record(self.first_trimester_index, record)
+            if self.dedup is None:
+                from dedup_index import DedupIndex
+                self.dedup = DedupIndex()
+            self.dedup.add_record(record)
+            cohort = (record.get('screening_type', 'first'), record_covariate_code(record))
+            self.cohorts[cohort] = self.cohorts.get(cohort, 0) + 1
+
+            entry = build_worklist_entry(record)
+            if entry:
+                self.worklist.add(entry)
+                self._worklist_bytes[entry['patient_id']] = deep_sizeof(entry)
+                self._bytes += self._worklist_bytes[entry['patient_id']]
+
+            # Хотирада фақат охирги history_limit та ёзув - қолганлари файлга
+            if len(self.history) > self.history_limit:
+                self.spill(len(self.history) - self.history_limit)
+
+            return record['patient_id']
+
+    def spill(self, count, keep=0):
+        """Энг эски count та ёзувни файлга чиқариш (охирги keep тасидан ташқари), чиқарилганлар сони"""
+        with self._lock:
+            count = min(count, len(self.history) - keep)
+            if count <= 0:
+                return 0
+
+            evicted = self.history[:count]
+            del self.history[:count]
+            self._bytes -= sum(self._record_bytes[:count])
+            del self._record_bytes[:count]
+            if self.spill_dir is not None:
+                self._spill_file().add(evicted)
+
+            # Индексда фақат хотирадаги ёзувлар қолади
+            for record in evicted:
+                for key in (normalize_patient_name(record.get('name')), record.get('patient_id')):
+                    if self.first_trimester_index.get(key) is record:
+                        del self.first_trimester_index[key]
+            return count
+
+    def spill_bytes(self, excess, keep=0):
+        """Камида excess байт бўшагунча энг эски ёзувларни битта пакетда файлга чиқариш, бўшатилган байт"""
+        with self._lock:
+            freed = count = 0
+            for record_bytes in self._record_bytes[:max(len(self.history) - keep, 0)]:
+                if freed >= excess:
+                    break
+                freed += record_bytes
+                count += 1
+            self.spill(count, keep)
+            return freed
+
+    def spill_worklist(self, keep):
+        """Иш рўйхатининг энг устувор keep тасидан бошқасини файлга чиқариш, чиқарилганлар сони"""
+        with self._lock:
+            if self.spill_dir is None or len(self.worklist) <= keep:
+                return 0
+            evicted = self.worklist.entries()[keep:]
+            for entry in evicted:
+                self.worklist.resolve(entry['patient_id'])
+                self._bytes -= self._worklist_bytes.pop(entry['patient_id'], 0)
+            self._spill_file().add_worklist(evicted)
+            return len(evicted)
+
+    def release(self):
+        """Узоқ фаолсиз сессия: барча тарих ва иш рўйхатини файлга чиқариш"""
+        with self._lock:
+            self.spill(len(self.history))
+            self.spill_worklist(0)
+
+    def _spill_file(self):
+        if self._spilled is None:
+            self._spilled = SpilledHistory(os.path.join(self.spill_dir, f"spill-{uuid.uuid4().hex}.db"))
+        return self._spilled
+
+    def memory_bytes(self, seen=None):
+        """Хотирадаги тарих, индекс калитлари ва иш рўйхати ҳажми (жорий йиғинди, O(тарих))"""
+        with self._lock:
+            shared = 0
+            if seen is not None:
+                # Сессиядаги бошқа калит (масалан, жорий натижа) билан умумий ёзувлар икки марта ҳисобланмайди
+                shared = sum(size for record, size in zip(self.history, self._record_bytes) if id(record) in seen)
+                seen.update(id(record) for record in self.history)
+            dedup_bytes = self.dedup.memory_bytes() if self.dedup is not None else 0
+            return self._bytes - shared + sys.getsizeof(self.cohorts) + 120 * len(self.cohorts) + dedup_bytes
+
+    def recent_records(self, limit=HISTORY_LIMIT):
+        """Охирги ёзувлар (эскидан янгига), етишмаса файлдан"""
+        with self._lock:
+            records = self.history[-limit:]
+            if len(records) < limit and self._spilled is not None:
+                records = self._spilled.recent(limit - len(records)) + records
+            return records
+
+    def find_first_trimester(self, patient_id, patient_name=None):
+        """Беморнинг биринчи скрининг ёзуви ID бўйича; топилмаса ёки бошқа беморники - FirstTrimesterLinkError"""
+        with self._lock:
+            try:
+                return find_first_trimester_record(self.first_trimester_index, patient_id, patient_name)
+            except FirstTrimesterLinkError:
+                if self._spilled is None or not (patient_id or "").strip():
+                    raise
+            return check_first_trimester_record(
+                self._spilled.find_first_trimester(patient_id.strip()), patient_id.strip(), patient_name
+            )
+
+    def suggest_first_trimester(self, patient_name, age=None):
+        """Исм ва ёш бўйича эҳтимолий биринчи скрининг (фақат таклиф)"""
+        with self._lock:
+            record = suggest_first_trimester_record(self.first_trimester_index, patient_name, age)
+            if record is None and self._spilled is not None:
+                record = self._spilled.suggest_first_trimester(patient_name, age)
+            return record
+
+    def worklist_entries(self, limit=None):
+        """Скрининг-мусбат беморлар навбати (устуворлик тартибида, файлга чиқарилганлар билан)"""
+        with self._lock:
+            entries = self.worklist.entries(limit)
+            if self._spilled is not None:
+                spilled = self._spilled.worklist_entries()
+                if spilled:
+                    entries = sorted(entries + spilled, key=worklist_priority)[:limit]
+            return entries
+
+    def worklist_summary(self, now):
+        """Навбатдаги беморлар сони ва улардан муддати now дан ўтганлари"""
+        with self._lock:
+            total = len(self.worklist)
+            overdue = self.worklist.overdue_count(now)
+            if self._spilled is not None:
+                spilled = self._spilled.worklist_entries()
+                total += len(spilled)
+                overdue += sum(1 for entry in spilled if entry['deadline'] < now)
+            return total, overdue
+
+    def resolve_worklist_entry(self, patient_id):
+        """Беморни навбатдан чиқариш"""
+        with self._lock:
+            if self.worklist.resolve(patient_id) is not None:
+                self._bytes -= self._worklist_bytes.pop(patient_id, 0)
+                return True
+            return self._spilled is not None and self._spilled.resolve_worklist_entry(patient_id)
+
+    def find_duplicates(self, record):
+        """Эҳтимолий такрорий ёзувлар: [(ID, тур)]"""
+        return self.dedup.check_record(record) if self.dedup is not None else []
+
+    def cohort_counts(self):
+        """Ёзувлар сони (скрининг тури, омиллар коди) бўйича"""
+        return dict(self.cohorts)
+
+    def count(self):
+        """Сақланган ёзувлар сони (файлга чиқарилганлар билан)"""
+        return self.counter - 1
+
+# ==================== УМУМИЙ SQLITE ОМБОРИ ====================
+
+def iter_store_records(db_path, batch_size=5000):
+    """
+    SQLite омборидаги барча ёзувларни оқим сифатида ўқиш.
+    Алоҳида уланиш ишлатилади (WAL - ёзувчиларни тўсмайди), хотирада
+    бир вақтда фақат битта пакет сақланади.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+    try:
+        cursor = conn.execute("SELECT record FROM patients ORDER BY seq")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield json.loads(row[0])
+    finally:
+        conn.close()
+
+def load_first_trimester_records(db_path, patient_ids, batch_size=500):
+    """
+    Берилган ID лар бўйича биринчи скрининг ёзувлари (оммавий интеграл скрининг
+    учун): алоҳида фақат ўқиш уланиши, patient_id индекси бўйича пакетли сўровлар.
+    """
+    patient_ids = sorted({patient_id for patient_id in patient_ids if patient_id})
+    if not db_path or not patient_ids or not os.path.exists(db_path):
+        return []
+    records = []
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+    try:
+        for start in range(0, len(patient_ids), batch_size):
+            batch = patient_ids[start:start + batch_size]
+            rows = conn.execute(
+                f"SELECT record FROM patients WHERE screening_type = 'first' "
+                f"AND patient_id IN ({', '.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+            records += [json.loads(row[0]) for row in rows]
+    finally:
+        conn.close()
+    return records
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    seq INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL UNIQUE,
+    name_key TEXT NOT NULL,
+    screening_type TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    covariate_code INTEGER NOT NULL DEFAULT 0,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_patients_first_trimester
+    ON patients (name_key, screening_type, seq);
+CREATE TABLE IF NOT EXISTS worklist (
+    patient_id TEXT PRIMARY KEY,
+    deadline TEXT NOT NULL,
+    max_risk REAL NOT NULL,
+    resolved_at TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_worklist_open
+    ON worklist (resolved_at, deadline);
+CREATE TABLE IF NOT EXISTS sync_sites (
+    site_id TEXT PRIMARY KEY,
+    acked_seq INTEGER NOT NULL,
+    last_sync TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_origins (
+    site_id TEXT NOT NULL,
+    origin_patient_id TEXT NOT NULL,
+    site_seq INTEGER NOT NULL,
+    patient_id TEXT NOT NULL,
+    PRIMARY KEY (site_id, origin_patient_id)
+);
+CREATE TABLE IF NOT EXISTS sync_conflicts (
+    site_id TEXT NOT NULL,
+    site_seq INTEGER NOT NULL,
+    origin_patient_id TEXT NOT NULL,
+    patient_id TEXT NOT NULL,
+    detected_at TEXT NOT NULL
+);
+"""
+
+class SQLitePatientStore:
+    """
+    Бир нечта Streamlit жараёнлари учун умумий омбор.
+
+    Тарих ва ID кетма-кетлиги битта SQLite файлида сақланади (WAL режими),
+    шунинг учун бир хил файлни ишлатувчи барча жараёнлар бир хил маълумотни
+    кўради. Охирги ёзувлар жараён ичида кешланади ва бошқа жараён ёзганда
+    (PRAGMA data_version ўзгарганда) бекор қилинади.
+    """
+
+    def __init__(self, db_path, columns_dir=None):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+        self._cache_version = None
+        self._cache_limit = 0
+        self._recent_cache = []
+
+        # Иш рўйхати навбати жараён ичида сақланади ва ўз ёзувларимизда
+        # O(log n) янгиланади; бошқа жараён ёзса, қайта юкланади
+        self._worklist = None
+        self._worklist_version = None
+
+        # Устунли натижалар кеши (сифат назорати сўровлари учун), ихтиёрий
+        self._columns = None
+        if columns_dir:
+            from columnar_cache import ColumnarResults
+            self._columns = ColumnarResults(columns_dir)
+
+    def _migrate(self):
+        """Эски омборларга кейин қўшилган устунлар ва индексларни қўшиш"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(patients)")}
+        if 'covariate_code' not in columns:
+            self._conn.execute("ALTER TABLE patients ADD COLUMN covariate_code INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_patients_cohort ON patients (covariate_code, screening_type)"
+        )
+
+    def _data_version(self):
+        """Бошқа уланишлар ёзганда ўзгарадиган рақам"""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _invalidate(self):
+        self._cache_version = None
+        self._recent_cache = []
+
+    def save_record(self, record):
+        """Ёзувга умумий кетма-кетликдан ID бериб, транзакцияда сақлаш"""
+        now = datetime.now()
+        with self._lock:
+            # BEGIN IMMEDIATE - ёзиш қулфи, ID кетма-кетлиги жараёнлар орасида такрорланмайди
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                sequence = self._conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM patients").fetchone()[0]
+                record['patient_id'] = format_patient_id(sequence, now)
+                # Марказий омборда клиникалардан келган ID лар ҳам бор - банд ID ўтказиб юборилади
+                while self._conn.execute("SELECT 1 FROM patients WHERE patient_id = ?", (record['patient_id'],)).fetchone():
+                    sequence += 1
+                    record['patient_id'] = format_patient_id(sequence, now)
+                record['timestamp'] = now.strftime("%Y-%m-%d %H:%M:%S")
+
+                self._conn.execute(
+                    "INSERT INTO patients (seq, patient_id, name_key, screening_type, timestamp, covariate_code, record) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        sequence,
+                        record['patient_id'],
+                        normalize_patient_name(record.get('name')),
+                        record.get('screening_type', 'first'),
+                        record['timestamp'],
+                        record_covariate_code(record),
+                        json.dumps(record, ensure_ascii=False),
+                    ),
+                )
+
+                entry = build_worklist_entry(record)
+                if entry:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO worklist (patient_id, deadline, max_risk, entry) VALUES (?, ?, ?, ?)",
+                        (entry['patient_id'], entry['deadline'], entry['max_risk'], json.dumps(entry, ensure_ascii=False)),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._worklist = None
+                raise
+            finally:
+                self._invalidate()
+
+            if entry and self._worklist is not None:
+                self._worklist.add(entry)
+
+        return record['patient_id']
+
+    def sync_columns(self):
+        """Устунли кешга сақланган, лекин ҳали қўшилмаган ёзувларни қўшиш (бошқа жараёнларникини ҳам)"""
+        if self._columns is None:
+            return 0
+        with self._lock:
+            return self._columns.sync(self._conn)
+
+    # ---------- Клиникалар синхронизацияси ----------
+
+    def max_sequence(self):
+        """Охирги сақланган ёзувнинг кетма-кетлик рақами"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM patients").fetchone()[0]
+
+    def changes_since(self, after_seq, limit):
+        """Кетма-кетлик рақами after_seq дан катта ёзувлар: [(seq, JSON матн)] - бирламчи калит оралиғи"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, record FROM patients WHERE seq > ? ORDER BY seq LIMIT ?",
+                (after_seq, limit),
+            ).fetchall()
+
+    def sync_cursor(self, site_id):
+        """Марказий омбор: клиниканинг охирги қабул қилинган кетма-кетлик рақами"""
+        with self._lock:
+            row = self._conn.execute("SELECT acked_seq FROM sync_sites WHERE site_id = ?", (site_id,)).fetchone()
+        return row[0] if row else 0
+
+    def sync_sites(self):
+        """Марказий омбор: клиникалар, уларнинг курсори ва зиддиятлар сони"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.site_id, s.acked_seq, s.last_sync, "
+                "(SELECT COUNT(*) FROM sync_conflicts c WHERE c.site_id = s.site_id) "
+                "FROM sync_sites s ORDER BY s.site_id"
+            ).fetchall()
+        return [
+            {'site_id': site_id, 'acked_seq': acked_seq, 'last_sync': last_sync, 'conflicts': conflicts}
+            for site_id, acked_seq, last_sync, conflicts in rows
+        ]
+
+    def apply_remote_changes(self, site_id, changes):
+        """
+        Марказий омбор: клиника ёзувларини битта транзакцияда қабул қилиш.
+        changes - [(клиникадаги seq, ёзув)], ўсиш тартибида. Курсордан кичик
+        рақамлар (қайта юборилган пакет) ўтказиб юборилади. Пациент ID бошқа
+        ёзувда банд бўлса, ёзув "<ID>-<клиника>" ID си билан сақланади ва
+        зиддият қайд қилинади; интеграл скрининг ҳаволалари ҳам шу ID га
+        алмаштирилади. Курсор шу транзакцияда янгиланади - узилишдан кейин
+        пакет ё тўлиқ қабул қилинган, ё умуман қабул қилинмаган бўлади.
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        applied = duplicates = conflicts = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT acked_seq FROM sync_sites WHERE site_id = ?", (site_id,)).fetchone()
+                acked_seq = row[0] if row else 0
+                sequence = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM patients").fetchone()[0]
+
+                for site_seq, record in changes:
+                    if site_seq <= acked_seq:
+                        duplicates += 1
+                        continue
+                    acked_seq = site_seq
+
+                    origin_id = record['patient_id']
+                    linked_id = record.get('linked_first_trimester_id')
+                    if linked_id:
+                        linked = self._conn.execute(
+                            "SELECT patient_id FROM sync_origins WHERE site_id = ? AND origin_patient_id = ?",
+                            (site_id, linked_id),
+                        ).fetchone()
+                        if linked:
+                            record['linked_first_trimester_id'] = linked[0]
+
+                    patient_id = origin_id
+                    suffix = 1
+                    while self._conn.execute("SELECT 1 FROM patients WHERE patient_id = ?", (patient_id,)).fetchone():
+                        patient_id = f"{origin_id}-{site_id}" + (f"-{suffix}" if suffix > 1 else "")
+                        suffix += 1
+                    if patient_id != origin_id:
+                        conflicts += 1
+                        self._conn.execute(
+                            "INSERT INTO sync_conflicts (site_id, site_seq, origin_patient_id, patient_id, detected_at) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (site_id, site_seq, origin_id, patient_id, now),
+                        )
+
+                    record['patient_id'] = patient_id
+                    record['origin'] = {'site': site_id, 'seq': site_seq, 'patient_id': origin_id}
+                    record['timestamp'] = record.get('timestamp') or now
+                    sequence += 1
+                    self._conn.execute(
+                        "INSERT INTO patients (seq, patient_id, name_key, screening_type, timestamp, covariate_code, record) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            sequence,
+                            patient_id,
+                            normalize_patient_name(record.get('name')),
+                            record.get('screening_type', 'first'),
+                            record['timestamp'],
+                            record_covariate_code(record),
+                            json.dumps(record, ensure_ascii=False),
+                        ),
+                    )
+                    # Клиниканинг скрининг-мусбат натижалари марказий иш рўйхатига ҳам тушади
+                    entry = build_worklist_entry(record)
+                    if entry:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO worklist (patient_id, deadline, max_risk, entry) VALUES (?, ?, ?, ?)",
+                            (entry['patient_id'], entry['deadline'], entry['max_risk'],
+                             json.dumps(entry, ensure_ascii=False)),
+                        )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sync_origins (site_id, origin_patient_id, site_seq, patient_id) "
+                        "VALUES (?, ?, ?, ?)",
+                        (site_id, origin_id, site_seq, patient_id),
+                    )
+                    applied += 1
+
+                self._conn.execute(
+                    "INSERT INTO sync_sites (site_id, acked_seq, last_sync) VALUES (?, ?, ?) "
+                    "ON CONFLICT(site_id) DO UPDATE SET acked_seq = excluded.acked_seq, last_sync = excluded.last_sync",
+                    (site_id, acked_seq, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._invalidate()
+                self._worklist = None
+
+        return {'applied': applied, 'duplicates': duplicates, 'conflicts': conflicts, 'acked_seq': acked_seq}
+
+    def recent_records(self, limit=HISTORY_LIMIT):
+        """Охирги ёзувлар (эскидан янгига), жараён ичида кешланган"""
+        with self._lock:
+            version = self._data_version()
+            if self._cache_version != version or self._cache_limit < limit:
+                self._cache_limit = max(limit, HISTORY_LIMIT)
+                rows = self._conn.execute(
+                    "SELECT record FROM patients ORDER BY seq DESC LIMIT ?",
+                    (self._cache_limit,),
+                ).fetchall()
+                self._recent_cache = [json.loads(row[0]) for row in reversed(rows)]
+                self._cache_version = version
+
+            return self._recent_cache[-limit:]
+
+    def find_first_trimester(self, patient_id, patient_name=None):
+        """Беморнинг биринчи скрининг ёзуви ID бўйича; топилмаса ёки бошқа беморники - FirstTrimesterLinkError"""
+        patient_id = (patient_id or "").strip()
+        if not patient_id:
+            raise FirstTrimesterLinkError("Биринчи скрининг ID си кўрсатилмаган")
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM patients WHERE patient_id = ? AND screening_type = 'first'",
+                (patient_id,),
+            ).fetchone()
+        return check_first_trimester_record(json.loads(row[0]) if row else None, patient_id, patient_name)
+
+    def suggest_first_trimester(self, patient_name, age=None):
+        """Исм ва ёш бўйича эҳтимолий биринчи скрининг (индекс орқали, фақат таклиф)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record FROM patients WHERE name_key = ? AND screening_type = 'first' "
+                "ORDER BY seq DESC LIMIT 20",
+                (normalize_patient_name(patient_name),),
+            ).fetchall()
+        for row in rows:
+            record = json.loads(row[0])
+            if age is None or record.get('age') in first_trimester_ages(age):
+                return record
+        return None
+
+    def find_duplicates(self, record):
+        """Эҳтимолий такрорий ёзувлар: [(ID, тур)] - жараён ичидаги индекс янги ёзувлар билан тўлдирилади"""
+        from dedup_index import store_index
+
+        return store_index(self.db_path).check_record(record)
+
+    def _load_worklist(self):
+        """Очиқ иш рўйхати навбати (керак бўлса базадан қайта юклаш)"""
+        version = self._data_version()
+        if self._worklist is None or self._worklist_version != version:
+            rows = self._conn.execute("SELECT entry FROM worklist WHERE resolved_at IS NULL").fetchall()
+            self._worklist = Worklist(json.loads(row[0]) for row in rows)
+            self._worklist_version = version
+        return self._worklist
+
+    def worklist_entries(self, limit=None):
+        """Скрининг-мусбат беморлар навбати (устуворлик тартибида)"""
+        with self._lock:
+            return self._load_worklist().entries(limit)
+
+    def worklist_summary(self, now):
+        """Навбатдаги беморлар сони ва улардан муддати now дан ўтганлари"""
+        with self._lock:
+            worklist = self._load_worklist()
+            return len(worklist), worklist.overdue_count(now)
+
+    def resolve_worklist_entry(self, patient_id):
+        """Беморни навбатдан чиқариш (базада белгилаш)"""
+        with self._lock:
+            worklist = self._load_worklist()
+            cursor = self._conn.execute(
+                "UPDATE worklist SET resolved_at = ? WHERE patient_id = ? AND resolved_at IS NULL",
+                (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), patient_id),
+            )
+            worklist.resolve(patient_id)
+            return cursor.rowcount > 0
+
+    def cohort_counts(self):
+        """Ёзувлар сони (скрининг тури, омиллар коди) бўйича - индекс орқали"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT screening_type, covariate_code, COUNT(*) FROM patients GROUP BY covariate_code, screening_type"
+            ).fetchall()
+        return {(screening_type, code): count for screening_type, code, count in rows}
+
+    def count(self):
+        """Сақланган ёзувлар сони"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
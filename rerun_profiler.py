@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ИШГА ТУШИРИШ ПРОФИЛИ (дастурчи режими)
+Streamlit скриптининг битта ишга туширилишини профиллаш: детерминистик
+(cProfile) ёки намуна олувчи (стек ҳар 1 мс да ёзилади), ихтиёрий равишда
+tracemalloc орқали хотира ажратилиши. Натижа: энг кўп вақт олган функциялар,
+энг кўп хотира ажратган қаторлар ва юклаб олинадиган хом профиль.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+PROFILE_MODES = {
+    'cprofile': "Детерминистик (cProfile)",
+    'sampling': "Намуна олиш (1 мс)",
+}
+
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 15
+SAMPLING_INTERVAL = 0.001
+
+# Хом профиль файллари папкаси (ҳар бир сессияда фақат охиргиси сақланади)
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "screening-profiles")
+
+def _function_label(filename, lineno, name):
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+class SamplingProfiler:
+    """Фон оқими жорий оқим стекини интервал бўйича ёзади (collapsed stacks)"""
+
+    def __init__(self, interval=SAMPLING_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="rerun-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            stack.reverse()
+            # Оқим ва Streamlit ички кадрлари ташланади - стек скрипт модулидан бошланади
+            roots = [index for index, (_, _, name) in enumerate(stack) if name == '<module>']
+            if roots:
+                stack = stack[roots[0]:]
+            if stack:
+                self.stacks[tuple(stack)] += 1
+
+    def function_rows(self, elapsed):
+        """Функциялар бўйича умумий (cumulative) ва ўз (self) вақти, сония"""
+        samples = sum(self.stacks.values())
+        seconds = elapsed / samples if samples else 0.0
+        cumulative, own = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            for function in set(stack):
+                cumulative[function] += count
+            own[stack[-1]] += count
+        return [
+            {'function': _function_label(*function), 'calls': None,
+             'own_s': own[function] * seconds, 'cumulative_s': count * seconds}
+            for function, count in cumulative.most_common(TOP_FUNCTIONS)
+        ]
+
+    def collapsed(self):
+        """Flame graph учун 'a;b;c сони' форматидаги матн"""
+        return "\n".join(
+            ";".join(_function_label(*function) for function in stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+        )
+
+class RerunProfile:
+    """Битта ишга туширишни профиллаш: start() скрипт бошида, stop() охирида"""
+
+    def __init__(self, mode='cprofile', trace_memory=False):
+        self.mode = mode
+        self.trace_memory = trace_memory
+        self._profiler = SamplingProfiler() if mode == 'sampling' else cProfile.Profile()
+        self._started = None
+        self._tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._started = time.perf_counter()
+        if self.mode == 'sampling':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        return self
+
+    def stop(self, previous_report=None):
+        """Профилни тўхтатиш ва ҳисобот (хом профиль файлга ёзилади)"""
+        if self.mode == 'sampling':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        elapsed = time.perf_counter() - self._started
+
+        allocations, peak_kb = [], None
+        if self._tracing:
+            # Профилловчининг ўз ажратишлари ҳисобга олинмайди
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)
+            ])
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+            allocations = [
+                {'location': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                 'size_kb': stat.size / 1024, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+            ]
+
+        if previous_report and os.path.exists(previous_report.get('raw_path', '')):
+            os.remove(previous_report['raw_path'])
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+
+        if self.mode == 'sampling':
+            functions = self._profiler.function_rows(elapsed)
+            raw_path = os.path.join(PROFILE_DIR, f"rerun-{uuid.uuid4().hex[:8]}.collapsed.txt")
+            with open(raw_path, 'w', encoding='utf-8') as raw_file:
+                raw_file.write(self._profiler.collapsed())
+        else:
+            stats = pstats.Stats(self._profiler, stream=io.StringIO())
+            functions = [
+                {'function': _function_label(*function), 'calls': calls,
+                 'own_s': own_time, 'cumulative_s': cumulative_time}
+                for function, (_, calls, own_time, cumulative_time, _) in sorted(
+                    stats.stats.items(), key=lambda item: item[1][3], reverse=True
+                )[:TOP_FUNCTIONS]
+            ]
+            raw_path = os.path.join(PROFILE_DIR, f"rerun-{uuid.uuid4().hex[:8]}.prof")
+            stats.dump_stats(raw_path)
+
+        return {
+            'mode': self.mode,
+            'elapsed_s': elapsed,
+            'functions': functions,
+            'allocations': allocations,
+            'peak_kb': peak_kb,
+            'raw_path': raw_path,
+        }
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Кешланган ҳисоблашлар ва натижа графиклари (plotly/numpy фақат чизилганда юкланади)
+"""
+
+import streamlit as st
+
+from risk_engine import (
+    SYNDROME_DESCRIPTIONS, calculate_mom_value, get_age_risk_multiplier, calculate_syndrome_risks,
+    combine_trimester_moms, calculate_risk_grid
+)
+from lab_profiles import get_lab
+from tenant_cache import tenant_cached
+from app_resources import TENANT_CACHE_ENTRIES, get_tenant_cache
+
+# ==================== КЕШЛАНГАН ҲИСОБЛАШЛАР ====================
+# Натижалар фақат ҳисоблашга таъсир қилувчи киришлар бўйича кешланади - бошқа
+# виджетлар ўзгарганда (масалан, дастурчи режими) хавф ва графиклар қайта
+# ҳисобланмайди.
+
+@tenant_cached(lambda: get_tenant_cache("screening", TENANT_CACHE_ENTRIES))
+def compute_screening(lab_id, screening_type, patient_age, gestational_age, weight, marker_values, first_record=None,
+                      gestational_days=None, covariates_code=0):
+    """MoM қийматлари ва синдром хавфларини лаборатория нормалари бўйича ҳисоблаш"""
+    lab = get_lab(lab_id)
+    if screening_type == "first":
+        nt_value, papp_a_value, free_beta_hcg_value = marker_values
+        marker_moms = {
+            'nt_mom': calculate_mom_value(nt_value, 'NT', gestational_age, weight, "first", gestational_days, covariates_code, lab),
+            'papp_mom': calculate_mom_value(papp_a_value, 'PAPP_A', gestational_age, weight, "first", gestational_days, covariates_code, lab),
+            'hcg_mom': calculate_mom_value(free_beta_hcg_value, 'FREE_BETA_HCG', gestational_age, weight, "first", gestational_days, covariates_code, lab)
+        }
+        screening_mode = "first"
+    else:
+        afp_value, total_hcg_value, ue3_value = marker_values
+        marker_moms = {
+            'afp_mom': calculate_mom_value(afp_value, 'AFP', gestational_age, weight, "second", gestational_days, covariates_code, lab),
+            'total_hcg_mom': calculate_mom_value(total_hcg_value, 'TOTAL_HCG', gestational_age, weight, "second", gestational_days, covariates_code, lab),
+            'ue3_mom': calculate_mom_value(ue3_value, 'UE3', gestational_age, weight, "second", gestational_days, covariates_code, lab),
+            'nt_mom': 1.0,  # Суров қилинади
+            'papp_mom': 1.0,  # Суров қилинади
+            'hcg_mom': 1.0   # Суров қилинади
+        }
+        screening_mode = "second"
+        
+        # Интеграл скрининг: биринчи скрининг натижаларини қўшиш
+        if first_record:
+            marker_moms = combine_trimester_moms(marker_moms, first_record)
+            screening_mode = "integrated"
+    
+    risks = calculate_syndrome_risks(patient_age, marker_moms, screening_mode, lab)
+    return marker_moms, screening_mode, risks
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_risk_bar_figure(risk_values):
+    """Синдромлар хавфлари бар графиги (1:N)"""
+    import plotly.express as px
+    
+    syndromes = [SYNDROME_DESCRIPTIONS[key]['name'] for key in ['downs', 'edwards', 'patau', 'turner', 'ntd']]
+    
+    # Хавф нисбатлари (1:N)
+    risk_ratios = [1/val if val > 0 else 10000 for val in risk_values]
+    
+    fig_bar = px.bar(
+        x=syndromes,
+        y=risk_ratios,
+        title="Генетик синдромлар хавфлари (1:N нисбат)",
+        labels={'x': 'Синдром', 'y': 'Хавф нисбати (1:N)'},
+        color=syndromes,
+        color_discrete_sequence=['#ff6b6b', '#ff9800', '#ff5722', '#9c27b0', '#4caf50']
+    )
+    
+    fig_bar.update_layout(
+        height=400,
+        showlegend=False,
+        yaxis_title="Хавф нисбати (қанчада 1 та)",
+        xaxis_title=""
+    )
+    
+    return fig_bar
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_age_risk_figure(lab_id, patient_age):
+    """Ёш бўйича хавф кўпайтирувчилари графиги (лаборатория ёш жадвали)"""
+    import plotly.graph_objects as go
+    
+    age_values = list(range(20, 46, 5))
+    
+    fig_age = go.Figure()
+    
+    # Ҳар бир синдром учун чизиқ
+    syndromes_plot = ['downs', 'edwards', 'patau']
+    colors = ['#ff6b6b', '#ff9800', '#ff5722']
+    names = ['Даун', 'Эдвардс', 'Патау']
+    
+    for idx, syndrome in enumerate(syndromes_plot):
+        multipliers = [get_age_risk_multiplier(age, syndrome, get_lab(lab_id)) for age in age_values]
+        
+        fig_age.add_trace(go.Scatter(
+            x=age_values,
+            y=multipliers,
+            mode='lines+markers',
+            name=names[idx],
+            line=dict(color=colors[idx], width=3),
+            marker=dict(size=8)
+        ))
+    
+    fig_age.update_layout(
+        title="Ёш бўйича генетик синдромлар хавфи",
+        xaxis_title="Онанинг ёши",
+        yaxis_title="Хавф кўпайтирувчиси",
+        height=400,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    # Жорий ёшни белгилаш
+    fig_age.add_vline(
+        x=patient_age,
+        line_dash="dash",
+        line_color="red",
+        annotation_text=f"Жорий ёш: {patient_age}",
+        annotation_position="top right"
+    )
+    
+    return fig_age
+
+# "Агар ... бўлса" тўрлари: (x ўқи, y ўқи), ўқ - (ном, сарлавҳа, бошланиш, охир, қадам)
+WHAT_IF_GRIDS = {
+    "first": {
+        "PAPP-A × Free β-hCG": (('papp_mom', "PAPP-A MoM", 0.10, 3.00, 0.02), ('hcg_mom', "Free β-hCG MoM", 0.10, 4.00, 0.02)),
+        "NT × Ёш": (('nt_mom', "NT MoM", 0.50, 4.00, 0.02), ('age', "Ёш", 15, 50, 1)),
+    },
+    "second": {
+        "AFP × uE3": (('afp_mom', "AFP MoM", 0.20, 3.50, 0.02), ('ue3_mom', "uE3 MoM", 0.20, 2.50, 0.02)),
+        "Total hCG × Ёш": (('total_hcg_mom', "Total hCG MoM", 0.20, 4.00, 0.02), ('age', "Ёш", 15, 50, 1)),
+    },
+}
+WHAT_IF_GRIDS["integrated"] = WHAT_IF_GRIDS["first"]
+
+def _axis_values(axis):
+    import numpy as np
+    
+    _, _, start, stop, step = axis
+    return np.round(np.arange(start, stop + step / 2, step), 2)
+
+@tenant_cached(lambda: get_tenant_cache("what_if", 32), copy_result=False)
+def compute_what_if_grid(lab_id, grid_axes, patient_age, marker_items, screening_mode):
+    """Бемор киритмалари бўйича бутун тўр хавфлари (битта векторли чақирув, лаборатория кешида)"""
+    x_axis, y_axis = grid_axes
+    risks = calculate_risk_grid(
+        patient_age, dict(marker_items), screening_mode,
+        x_axis[0], _axis_values(x_axis), y_axis[0], _axis_values(y_axis), get_lab(lab_id)
+    )
+    return {syndrome: risks[syndrome] for syndrome in ['downs', 'edwards', 'patau', 'turner', 'ntd']}
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_what_if_figure(lab_id, grid_axes, patient_age, marker_items, screening_mode, syndrome, patient_point,
+                         what_if_point):
+    """Хавф иссиқлик харитаси: бемор нуқтаси ва танланган "агар" нуқтаси белгиланган"""
+    import numpy as np
+    import plotly.graph_objects as go
+    
+    x_axis, y_axis = grid_axes
+    risk = compute_what_if_grid(lab_id, grid_axes, patient_age, marker_items, screening_mode)[syndrome]
+    ratios = np.round(1 / risk).astype(int)
+    
+    fig = go.Figure(go.Heatmap(
+        x=_axis_values(x_axis),
+        y=_axis_values(y_axis),
+        z=np.log10(ratios),
+        customdata=ratios,
+        colorscale="RdYlGn",
+        zmin=1, zmax=5,
+        colorbar=dict(title="1:N", tickvals=[1, 2, 3, 4, 5], ticktext=["1:10", "1:100", "1:1000", "1:10000", "1:100000"]),
+        hovertemplate=f"{x_axis[1]}: %{{x}}<br>{y_axis[1]}: %{{y}}<br>Хавф: 1:%{{customdata}}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=[patient_point[0]], y=[patient_point[1]], mode='markers', name="Бемор",
+        marker=dict(symbol='x', size=14, color='black', line=dict(width=2))
+    ))
+    fig.add_trace(go.Scatter(
+        x=[what_if_point[0]], y=[what_if_point[1]], mode='markers', name="Агар",
+        marker=dict(symbol='circle-open', size=16, color='#1f77b4', line=dict(width=3))
+    ))
+    fig.update_layout(
+        title=f"{SYNDROME_DESCRIPTIONS[syndrome]['name']}: хавф ўзгариши",
+        xaxis_title=x_axis[1],
+        yaxis_title=y_axis[1],
+        height=450,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_levey_jennings_figure(series, title):
+    """Levey-Jennings графиги: сақланган қиймат қатори, мақсад ±1/2/3 SD чизиқлари"""
+    import plotly.graph_objects as go
+    
+    mean, sd = series['target_mean'], series['target_sd']
+    x_values = list(range(1, len(series['value']) + 1))
+    fig = go.Figure()
+    for k, color in [(0, '#2e7d32'), (1, '#9e9e9e'), (2, '#ff9800'), (3, '#d32f2f')]:
+        for sign in ((1, -1) if k else (1,)):
+            fig.add_hline(y=mean + sign * k * sd, line_dash='solid' if k == 0 else 'dash', line_color=color,
+                          annotation_text=f"{'+' if sign > 0 else '-'}{k}SD" if k else "x̄",
+                          annotation_position="right")
+    
+    fig.add_trace(go.Scatter(
+        x=x_values, y=series['value'], mode='lines+markers', name="Назорат",
+        line=dict(color='#1976d2'),
+        customdata=list(zip(series['run_id'], series['created'], series['z'], series['rules'])),
+        hovertemplate="%{customdata[0]}<br>%{customdata[1]}<br>Қиймат: %{y:.3g} (z = %{customdata[2]:.2f})"
+                      "<br>%{customdata[3]}<extra></extra>"
+    ))
+    flagged = [index for index, rules in enumerate(series['rules']) if rules]
+    if flagged:
+        fig.add_trace(go.Scatter(
+            x=[x_values[index] for index in flagged], y=[series['value'][index] for index in flagged],
+            mode='markers+text', name="Қоида",
+            text=[series['rules'][index] for index in flagged], textposition='top center',
+            marker=dict(size=12, symbol='x', color=['#d32f2f' if not series['accepted'][index] else '#ff9800'
+                                                    for index in flagged])
+        ))
+    
+    fig.update_layout(
+        title=title, height=380, showlegend=False, xaxis_title="Серия", yaxis_title="Қиймат",
+        yaxis_range=[mean - 4 * sd, mean + 4 * sd]
+    )
+    return fig
@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Натижа саҳифаси ва панеллар (тарих, иш рўйхати, оммавий ҳисоблаш, QC)
+"""
+
+from datetime import datetime
+import os
+
+import streamlit as st
+
+from risk_engine import (
+    SYNDROME_DESCRIPTIONS, get_highest_risk, get_risk_category, format_risk_display, record_marker_moms
+)
+from gestational_dating import format_gestational_age
+from maternal_covariates import describe_covariates
+from marker_flags import SEVERITY_LABELS, describe_rule, get_flag_rules
+from assay_qc import QC_MARKERS, WESTGARD_RULES
+from worklist import WORKLIST_PAGE_SIZE
+from app_resources import (
+    BULK_JOBS_DIR, QC_DB_PATH, current_lab_id, record_lab_id, lab_path, get_bulk_queue, get_patient_store,
+    get_qc_store
+)
+from result_figures import (
+    WHAT_IF_GRIDS, compute_what_if_grid,
+    build_risk_bar_figure, build_age_risk_figure, build_what_if_figure, build_levey_jennings_figure
+)
+
+def get_patient_summary():
+    """Беморлар тарихини қисқача кўрсатиш"""
+    recent_records = get_patient_store().recent_records(5)
+    if not recent_records:
+        return None
+    
+    summary = []
+    for patient in recent_records[::-1]:  # Охирги 5 таси
+        summary.append({
+            'name': patient.get('name', 'Номаълум'),
+            'age': patient.get('age', 30),
+            'gestational_age': patient.get('gestational_age', 12),
+            'screening_type': patient.get('screening_type', 'first'),
+            'timestamp': patient.get('timestamp', ''),
+            'downs_risk': patient.get('risks', {}).get('downs', 0)
+        })
+    
+    return summary
+
+# ==================== ФРАГМЕНТЛАР ====================
+# Кешланган ҳисоблашлар ва графиклар result_figures модулида.
+# st.fragment (Streamlit >= 1.37) ёки st.experimental_fragment (>= 1.33);
+# эски версияларда оддий функция сифатида ишлайди
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# ==================== НАТИЖА КЎРИНИШИ ====================
+# Натижа саҳифаси сақланган ёзувдан чизилади, шунинг учун қайта ишлашда
+# (rerun) ҳисоблаш ва сақлаш такрорланмайди.
+
+def render_patient_header(record):
+    """Бемор маълумотлари кардаси"""
+    st.markdown("### 📋 БЕМОР МАЪЛУМОТЛАРИ")
+    
+    col_p1, col_p2, col_p3, col_p4 = st.columns(4)
+    
+    with col_p1:
+        st.metric("👤 **Бемор**", record['name'])
+    
+    with col_p2:
+        st.metric("🎂 **Ёши**", f"{record['age']} йош")
+    
+    with col_p3:
+        if record.get('gestational_days') is not None:
+            st.metric("🤰 **Хомилалик**", f"{format_gestational_age(record['gestational_days'])} ҳафта",
+                      record['dating']['method'], delta_color="off")
+        else:
+            st.metric("🤰 **Хомилалик**", f"{record['gestational_age']} ҳафта")
+    
+    with col_p4:
+        st.metric("📊 **BMI**", f"{record['bmi']:.1f}", record['bmi_category'])
+    
+    covariate_labels = describe_covariates(record.get('covariate_code', 0))
+    if covariate_labels:
+        st.caption(f"⚖️ MoM коррекцияси: {', '.join(covariate_labels)}")
+    
+    st.markdown("---")
+
+def render_syndrome_cards(risks):
+    """Ҳар бир синдром учун хавф кардаси"""
+    st.markdown("### 🧬 ГЕНЕТИК СИНДРОМЛАР ХАВФЛАРИ")
+    
+    # Ҳар бир синдром учун карта яратиш
+    for syndrome_key in ['downs', 'edwards', 'patau', 'turner', 'ntd']:
+        syndrome_info = SYNDROME_DESCRIPTIONS[syndrome_key]
+        risk_value = risks.get(syndrome_key, 0)
+        risk_display = format_risk_display(risk_value)
+        category, risk_class, _ = get_risk_category(risk_value)
+        
+        css_class = f"{syndrome_key}-card".replace('_', '-')
+        
+        with st.container():
+            st.markdown(f'<div class="syndrome-card {css_class}">', unsafe_allow_html=True)
+            
+            col_s1, col_s2, col_s3 = st.columns([3, 2, 3])
+            
+            with col_s1:
+                st.markdown(f"#### {syndrome_info['icon']} **{syndrome_info['name']}**")
+                st.markdown(f"*({syndrome_info['scientific']})*")
+                st.markdown(f"**Хусусият:** {syndrome_info['description']}")
+            
+            with col_s2:
+                st.markdown(f"<div style='text-align: center;'>", unsafe_allow_html=True)
+                st.metric("**Хавф нисбати**", risk_display)
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+            with col_s3:
+                st.markdown(f"<div style='text-align: center; margin-top: 20px;'>", unsafe_allow_html=True)
+                st.markdown(f'<div class="{risk_class}">{category}</div>', unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+
+def render_age_multipliers(risks):
+    """Ёш бўйича хавф кўпайтирувчилари"""
+    if 'age_risk' in risks:
+        st.markdown('<div class="info-box">', unsafe_allow_html=True)
+        st.markdown("#### 📊 ЁШ БЎЙИЧА ХАВФ КЎПАЙТИРУВЧИЛАРИ")
+        
+        age_risks = risks['age_risk']
+        col_a1, col_a2, col_a3, col_a4 = st.columns(4)
+        
+        with col_a1:
+            st.metric("**Даун синдроми**", f"{age_risks.get('downs', 1.0):.1f}x")
+        
+        with col_a2:
+            st.metric("**Эдвардс синдроми**", f"{age_risks.get('edwards', 1.0):.1f}x")
+        
+        with col_a3:
+            st.metric("**Патау синдроми**", f"{age_risks.get('patau', 1.0):.1f}x")
+        
+        with col_a4:
+            st.metric("**Тернер синдроми**", f"{age_risks.get('turner', 1.0):.1f}x")
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+
+def render_risk_charts(risks, patient_age, lab_id):
+    """Хавф графиклари (кешланган фигуралар)"""
+    st.markdown("### 📈 ХАВФ ТАҲЛИЛИ")
+    
+    col_g1, col_g2 = st.columns(2)
+    
+    with col_g1:
+        risk_values = tuple(risks[key] for key in ['downs', 'edwards', 'patau', 'turner', 'ntd'])
+        st.plotly_chart(build_risk_bar_figure(risk_values), use_container_width=True)
+    
+    with col_g2:
+        st.plotly_chart(build_age_risk_figure(lab_id, patient_age), use_container_width=True)
+
+@fragment
+def render_what_if_panel(record):
+    """Маркер ёки ёш ўзгарса хавф қандай ўзгаришини кўрсатиш (тўр бир марта ҳисобланади)"""
+    with st.expander("🎛️ АГАР ... БЎЛСА: ХАВФ ХАРИТАСИ", expanded=False):
+        # Ёпиқ expander ичидаги код ҳам ҳар ишга туширишда бажарилади -
+        # тўр ва график фақат панел ёқилганда ҳисобланади
+        if not st.toggle("Хавф харитасини кўрсатиш", key="what_if_open"):
+            return
+        marker_moms, screening_mode = record_marker_moms(record)
+        grids = WHAT_IF_GRIDS[screening_mode]
+        
+        col_w1, col_w2 = st.columns([1, 2])
+        with col_w1:
+            grid_name = st.radio("Тўр", list(grids), horizontal=True, key="what_if_grid")
+        syndrome_keys = ['downs', 'edwards', 'patau', 'turner', 'ntd']
+        syndrome_labels = [SYNDROME_DESCRIPTIONS[key]['name'] for key in syndrome_keys]
+        with col_w2:
+            syndrome_label = st.radio("Синдром", syndrome_labels, horizontal=True, key="what_if_syndrome")
+        syndrome = syndrome_keys[syndrome_labels.index(syndrome_label)]
+        
+        grid_axes = grids[grid_name]
+        marker_items = tuple(sorted(marker_moms.items()))
+        patient_point = tuple(record['age'] if axis[0] == 'age' else marker_moms[axis[0]] for axis in grid_axes)
+        
+        # Слайдерлар фақат тўрдаги нуқтани танлайди - хавф ҳисобланган тўрдан олинади
+        what_if_point = []
+        sliders = st.columns(2)
+        for column, axis, value in zip(sliders, grid_axes, patient_point):
+            _, label, start, stop, step = axis
+            with column:
+                default = min(max(round(round((value - start) / step) * step + start, 2), start), stop)
+                what_if_point.append(st.slider(
+                    label, min_value=start, max_value=stop, value=type(start)(default), step=step,
+                    key=f"what_if_{record.get('patient_id')}_{grid_name}_{axis[0]}"
+                ))
+        
+        risk = compute_what_if_grid(record_lab_id(record), grid_axes, record['age'], marker_items, screening_mode)[syndrome]
+        x_index = int(round((what_if_point[0] - grid_axes[0][2]) / grid_axes[0][4]))
+        y_index = int(round((what_if_point[1] - grid_axes[1][2]) / grid_axes[1][4]))
+        what_if_risk = float(risk[y_index, x_index])
+        current_risk = record['risks'][syndrome]
+        
+        col_m1, col_m2 = st.columns(2)
+        with col_m1:
+            st.metric("Жорий хавф", format_risk_display(current_risk))
+        with col_m2:
+            st.metric(
+                "Агар шундай бўлса", format_risk_display(what_if_risk),
+                delta=f"{what_if_risk / current_risk:.2f}x", delta_color="inverse"
+            )
+        
+        st.plotly_chart(
+            build_what_if_figure(record_lab_id(record), grid_axes, record['age'], marker_items, screening_mode, syndrome,
+                                 patient_point, tuple(what_if_point)),
+            use_container_width=True
+        )
+
+def render_marker_analysis(record):
+    """Маркерлар таҳлили (белгилар қоидалар тўплами бўйича)"""
+    st.markdown("### 🔬 МАРКЕРЛАР ТАҲЛИЛИ")
+    
+    cols_markers = st.columns(3)
+    
+    for idx, flag in enumerate(get_flag_rules().flag_record(record)):
+        with cols_markers[idx]:
+            st.markdown(f"**{flag['name']}**")
+            st.metric("Қиймат", f"{flag['value']} {flag['unit']}")
+            st.metric("MoM", f"{flag['mom']:.2f}")
+            
+            # Нормал ёки ненормалликни кўрсатиш
+            if flag['rule'] is None:
+                st.success("✅ Нормал диапазонда")
+            else:
+                icon = "🚨" if flag['severity'] == 'critical' else "⛔"
+                st.error(f"{icon} {SEVERITY_LABELS[flag['severity']]}: {describe_rule(flag['rule'])} "
+                         f"(норма: {flag['normal_range']})")
+
+def render_recommendations(risks):
+    """Хавф даражасига кўра тиббий тавсиялар"""
+    st.markdown("### 💡 ТИББИЙ ТАВСИЯЛАР")
+    
+    # Энг юқори хавфли синдромни аниқлаш
+    max_syndrome_key, max_risk = get_highest_risk(risks)
+    max_syndrome = SYNDROME_DESCRIPTIONS[max_syndrome_key]['name'] if max_risk > 0 else ""
+    
+    max_risk_display = format_risk_display(max_risk)
+    
+    with st.expander("#### 🏥 Хавф даражасига кўра тавсиялар", expanded=True):
+        st.markdown(f"**Энг юқори хавф:** {max_syndrome} ({max_risk_display})")
+        
+        if max_risk > 0.05:  # 1:20 дан юқори
+            st.markdown("""
+            ### 🔴 **ШАФФОФ ЧОРАЛАР ТАВСИЯ ЕТИЛАДИ:**
+            
+            **ДАРОР ЧОРАЛАРИ (24 соат ичида):**
+            1. **Дарҳол генетик машварат** - мутахассис генетикга мурожаат
+            2. **NIPT тести** - но-инвазив пренатал тест (қон тести)
+            3. **Инвазив диагностика** - амниоцентез ёки хорион биопсияси
+            4. **Фетал эхокардиография** - юракни детал текшириш
+            5. **Ҳар ҳафта ультратовуш** - доимий мониторинг
+            
+            **ҚОШИМЧА ТАДҚИҚОТЛАР:**
+            - Кариотип таҳлили
+            - Микрочип таҳлили (CMA)
+            - WES тести (Whole Exome Sequencing)
+            """)
+            
+        elif max_risk > 0.01:  # 1:100
+            st.markdown("""
+            ### 🟠 **ОЧИҚ ЧОРАЛАР ТАВСИЯ ЕТИЛАДИ:**
+            
+            **ТЕЗ ТЕКШИРИШ (72 соат ичида):**
+            1. **Генетик машварат** - детал маълумот ва ёрим
+            2. **Деталли ультратовуш** - 2-даражали скрининг
+            3. **Қўшимча тестлар** - НIPT ёки квад тест
+            4. **Мунтазам мониторинг** - ҳар 2 ҳафтада назорат
+            
+            **МОДДА АЛМАШИНУВИ:**
+            - Фолат кислотаси (4 мг/кун)
+            - Витамин B комплекс
+            - Йод препаратлари
+            """)
+            
+        elif max_risk > 0.001:  # 1:1000
+            st.markdown("""
+            ### 🟡 **НАЗОРАТ ЧОРАЛАРИ:**
+            
+            **МУНТАЗАМ КУЗАТУВ:**
+            1. **Стандарт мониторинг** - регламент тартибида ультратовуш
+            2. **Генетик машварат** - ихтиёрий, агар керак бўлса
+            3. **Парвардалик кўрсатмалари** - соглом турмуш тарзи
+            4. **Ҳар 4-6 ҳафтада** - назорат ўтказиш
+            
+            **ПРОФИЛАКТИКА:**
+            - Муқим парвардалик
+            - Стрессдан сақланиш
+            - Муносиб озиқ-овқат
+            """)
+            
+        else:  # 1:1000 дан паст
+            st.markdown("""
+            ### 🟢 **НОРМАЛ ПАРВАРДАЛИК:**
+            
+            **СТАНДАРТ ДАВОЛ ДАСТУРИ:**
+            1. **Регламент скрининг** - плантирилган тартибда текшириш
+            2. **Мунтазам ультратовуш** - тайинланган муддатларда
+            3. **Соглом турмуш тарзи** - тавсия этилган озиқ-овқат
+            4. **Даво-профилактика** - витамин ва минераллар
+            
+            **МАШВАРАТ:**
+            - Ҳар қандай шубҳа бўлса, шифокорга мурожаат
+            - Қўшимча маълумот учун генетик машварат
+            """)
+
+@fragment
+def render_history_panel():
+    """Охирги беморлар тарихи (алоҳида қайта чизилади)"""
+    patient_history = get_patient_summary()
+    if patient_history:
+        with st.expander("#### 📊 ОХИРГИ БЕМОРЛАР ТАРИХИ", expanded=False):
+            for patient in patient_history:
+                with st.container():
+                    col_h1, col_h2, col_h3, col_h4 = st.columns([3, 2, 2, 3])
+                    
+                    with col_h1:
+                        st.markdown(f"**{patient['name']}** ({patient['age']}й)")
+                    
+                    with col_h2:
+                        st.caption(f"Ҳафта: {patient['gestational_age']}")
+                    
+                    with col_h3:
+                        risk_val = patient.get('downs_risk', 0)
+                        if risk_val > 0:
+                            st.caption(f"Даун: 1:{int(1/risk_val)}")
+                    
+                    with col_h4:
+                        st.caption(patient.get('timestamp', ''))
+                
+                st.divider()
+
+@fragment
+def render_worklist_panel():
+    """Скрининг-мусбат беморлар иш рўйхати (ЮҚОРИ ва ундан юқори хавф)"""
+    store = get_patient_store()
+    now = datetime.now()
+    total, overdue = store.worklist_summary(now.strftime("%Y-%m-%d %H:%M:%S"))
+    if not total:
+        return
+    
+    title = f"#### 🚨 СКРИНИНГ-МУСБАТ ИШ РЎЙХАТИ ({total})"
+    if overdue:
+        title += f" - ⏰ {overdue} та муддати ўтган"
+    
+    # Навбат саҳифалаб кўрсатилади - фақат биринчи limit та элемент уюмдан олинади
+    limit = st.session_state.get('worklist_limit', WORKLIST_PAGE_SIZE)
+    with st.expander(title, expanded=False):
+        for entry in store.worklist_entries(limit):
+            _, risk_class, _ = get_risk_category(entry['max_risk'])
+            remaining = datetime.strptime(entry['deadline'], "%Y-%m-%d %H:%M:%S") - now
+            remaining_hours = remaining.total_seconds() / 3600
+            
+            col_w1, col_w2, col_w3, col_w4 = st.columns([3, 3, 3, 2])
+            
+            with col_w1:
+                st.markdown(f"**{entry['name']}** ({entry['age']}й)")
+                st.caption(f"`{entry['patient_id']}`")
+            
+            with col_w2:
+                st.markdown(f"{entry['syndrome_name']}: **{format_risk_display(entry['max_risk'])}**")
+                st.markdown(f'<div class="{risk_class}" style="font-size: 0.8rem; padding: 4px 12px;">{entry["category"]}</div>', unsafe_allow_html=True)
+            
+            with col_w3:
+                st.markdown(f"**{entry['action']}**")
+                if remaining_hours < 0:
+                    st.caption(f"⏰ Муддати ўтган ({-remaining_hours:.0f} соат)")
+                else:
+                    st.caption(f"Қолган вақт: {remaining_hours:.0f} соат")
+            
+            with col_w4:
+                if st.button("✅ Бажарилди", key=f"resolve_{entry['patient_id']}", use_container_width=True):
+                    store.resolve_worklist_entry(entry['patient_id'])
+                    st.rerun()
+            
+            st.divider()
+        
+        if total > limit:
+            if st.button(f"Яна кўрсатиш ({total - limit} та қолди)", key="worklist_more"):
+                st.session_state.worklist_limit = limit + WORKLIST_PAGE_SIZE
+                st.rerun()
+
+def render_bulk_job(queue, job):
+    """Битта оммавий вазифа: жараён, бошқарув тугмалари ва оралиқ натижалар"""
+    from bulk_scoring import JOB_STATUSES
+    
+    progress_value = job['done_chunks'] / job['total_chunks'] if job['total_chunks'] else 0.0
+    st.progress(
+        progress_value,
+        text=f"**{job['filename']}** - {JOB_STATUSES[job['status']]} ({job['done_chunks']}/{job['total_chunks']} бўлак)"
+    )
+    if job['error']:
+        st.error(f"❌ {job['error']}")
+    
+    col_j1, col_j2, col_j3 = st.columns(3)
+    with col_j1:
+        if job['status'] in ('queued', 'running') and st.button("⏹ Бекор қилиш", key=f"cancel_{job['job_id']}"):
+            queue.cancel(job['job_id'])
+            st.rerun()
+    with col_j2:
+        if job['status'] in ('failed', 'cancelled') and st.button("🔁 Қайта ишга тушириш", key=f"retry_{job['job_id']}"):
+            queue.retry(job['job_id'])
+            st.rerun()
+    with col_j3:
+        if job['status'] == 'done':
+            st.download_button(
+                "⬇️ Натижалар (CSV)",
+                queue.result_csv(job['job_id']),
+                file_name=f"{job['job_id']}.csv",
+                mime="text/csv",
+                key=f"download_{job['job_id']}"
+            )
+    
+    if job['done_chunks']:
+        st.dataframe(queue.partial_results(job['job_id'], limit=50), use_container_width=True)
+
+@fragment
+def render_bulk_panel():
+    """
+    Оммавий ҳисоблаш: CSV юклаш, навбат ва жараённи кузатиш. Панел ёқилган ва
+    шу сессиянинг вазифаси навбатда ёки бажарилаётган бўлса True (саҳифа янгиланади).
+    """
+    job_ids = st.session_state.get('bulk_jobs', [])
+    
+    with st.expander("📥 ОММАВИЙ ҲИСОБЛАШ (CSV)", expanded=bool(job_ids)):
+        # Панел ёпиқ бўлса навбат ўқилмайди ва саҳифа автоматик янгиланмайди
+        if not st.toggle("Оммавий ҳисоблаш панели", key="bulk_open"):
+            return False
+        st.caption("Устунлар: name, age, gestational_age ёки gestational_days, weight ва триместр маркерлари "
+                   "(nt, papp_a, free_beta_hcg / afp, total_hcg, ue3); ихтиёрий: screening_type, twins, ivf, "
+                   "smoking, diabetes, ethnicity, qc_run (бўш бўлса - маркерларни назорат қилган охирги серия; "
+                   "рад этилган серия қаторлари ҳисобланмайди; override - текширувсиз), "
+                   "clinician (критик натижалар ҳақида шу шифокорга хабар юборилади), first_trimester_id "
+                   "(иккиламчи скринингда интеграл хавф; ID топилмаса ёки исм мос келмаса қатор ҳисобланмайди). "
+                   "Такрорий намуна/беморлар duplicate_of ва duplicate_kind устунларида белгиланади.")
+        uploaded = st.file_uploader("**Планшет файли**", type=['csv'], key="bulk_upload")
+        if uploaded is not None and st.button("📤 Навбатга қўйиш", key="bulk_submit"):
+            job_id = get_bulk_queue(BULK_JOBS_DIR, current_lab_id()).submit(
+                uploaded.name, uploaded.getvalue(), st.session_state.screening_type
+            )
+            job_ids = [job_id] + job_ids
+            st.session_state.bulk_jobs = job_ids
+        
+        if not job_ids:
+            return False
+        
+        # Ҳисоблаш фон оқимида - бу ерда фақат жадвалдан ҳолат ўқилади
+        queue = get_bulk_queue(BULK_JOBS_DIR, current_lab_id())
+        st.button("🔄 Янгилаш", key="bulk_refresh", help="Вазифалар ҳолатини қайта ўқиш")
+        if queue.status['last_error']:
+            st.warning(f"⚠️ Навбат оқими хатоси ({queue.status['failures']} марта): {queue.status['last_error']}. "
+                       f"Вазифалар кейинроқ қайта олинади.")
+        active = False
+        for job_id in job_ids:
+            job = queue.job(job_id)
+            if job is None:
+                continue
+            st.divider()
+            render_bulk_job(queue, job)
+            active = active or job['status'] in ('queued', 'running')
+        return active
+
+@fragment
+def render_qc_panel():
+    """Сифат назорати: серия натижаларини киритиш, Westgard баҳоси ва Levey-Jennings графиклари"""
+    qc_store = get_qc_store(lab_path(QC_DB_PATH))
+    
+    with st.expander("🧪 СИФАТ НАЗОРАТИ (QC)", expanded=False):
+        # Ёпиқ expander ичидаги код ҳам ҳар ишга туширишда бажарилади - панел ёқилганда чизилади
+        if not st.toggle("Сифат назорати панели", key="qc_open"):
+            return
+        analyzer = st.text_input("**Анализатор**", value="DELFIA-1", key="qc_analyzer").strip()
+        targets = qc_store.targets(analyzer) if analyzer else []
+        tab_run, tab_chart, tab_targets = st.tabs(["📝 Серия", "📈 Levey-Jennings", "🎯 Назорат материаллари"])
+        
+        with tab_run:
+            if not targets:
+                st.info("Бу анализатор учун назорат материаллари киритилмаган («🎯 Назорат материаллари»).")
+            else:
+                results = {}
+                columns = st.columns(min(len(targets), 4))
+                for index, target in enumerate(targets):
+                    with columns[index % len(columns)]:
+                        value = st.number_input(
+                            f"{QC_MARKERS[target['marker']]} · даража {target['level']}",
+                            min_value=0.0, value=None, format="%.3f",
+                            key=f"qc_value_{analyzer}_{target['marker']}_{target['level']}"
+                        )
+                    if value is not None:
+                        results[(target['marker'], target['level'])] = value
+                
+                if st.button("✅ Серияни қайд қилиш", key="qc_record", disabled=not results):
+                    run = qc_store.record_run(analyzer, results)
+                    st.session_state.qc_last_run = run
+                
+                run = st.session_state.get('qc_last_run')
+                if run and run['analyzer'] == analyzer:
+                    if run['status'] == 'accepted':
+                        st.success(f"✅ `{run['run_id']}` қабул қилинди")
+                    else:
+                        rejected = ", ".join(QC_MARKERS[marker] for marker in run['rejected_markers'])
+                        st.error(f"❌ `{run['run_id']}` рад этилди ({rejected}) - бу серия бемор натижалари ҳисобланмайди")
+                    for finding in run['violations'] + run['warnings']:
+                        st.caption(f"**{finding['rule']}** · {QC_MARKERS[finding['marker']]} даража "
+                                   f"{', '.join(map(str, finding['levels']))}: {WESTGARD_RULES[finding['rule']]}")
+        
+        with tab_chart:
+            if targets:
+                labels = {f"{QC_MARKERS[target['marker']]} · даража {target['level']}": target for target in targets}
+                label = st.selectbox("Назорат даражаси", list(labels), key="qc_chart_level")
+                target = labels[label]
+                series = qc_store.series(analyzer, target['marker'], target['level'])
+                if series and series['value']:
+                    st.plotly_chart(
+                        build_levey_jennings_figure(series, f"{analyzer} · {label} (лот {series['lot'] or '—'})"),
+                        use_container_width=True
+                    )
+                else:
+                    st.caption("Бу даража учун натижалар ҳали йўқ")
+        
+        with tab_targets:
+            if targets:
+                st.dataframe([
+                    {
+                        'Маркер': QC_MARKERS[target['marker']], 'Даража': target['level'], 'Лот': target['lot'],
+                        'Мақсад': target['target_mean'], 'SD': target['target_sd'], 'n': target['observed_n'],
+                        'Кузатилган x̄': target['observed_mean'], 'Кузатилган SD': target['observed_sd'],
+                        'CV %': target['observed_cv']
+                    }
+                    for target in targets
+                ], use_container_width=True, hide_index=True)
+            
+            with st.form("qc_target_form"):
+                col_t1, col_t2, col_t3 = st.columns(3)
+                with col_t1:
+                    marker_label = st.selectbox("Маркер", list(QC_MARKERS.values()))
+                    level = st.number_input("Даража", min_value=1, max_value=3, value=1)
+                with col_t2:
+                    target_mean = st.number_input("Мақсад (x̄)", min_value=0.0, value=None, format="%.3f")
+                    target_sd = st.number_input("SD", min_value=0.0, value=None, format="%.4f")
+                with col_t3:
+                    lot = st.text_input("Лот")
+                if st.form_submit_button("💾 Сақлаш") and analyzer:
+                    if not target_mean or not target_sd:
+                        st.error("Мақсад ва SD мусбат бўлиши керак")
+                    else:
+                        marker = next(key for key, name in QC_MARKERS.items() if name == marker_label)
+                        qc_store.set_target(analyzer, marker, level, target_mean, target_sd, lot.strip())
+                        st.rerun()
+
+def render_result_view(record):
+    """Натижа саҳифасининг барча бўлимлари"""
+    risks = record['risks']
+    
+    if record.get('linked_first_trimester_id'):
+        params = record['parameters']
+        st.info(
+            f"🔗 **Интеграл скрининг:** биринчи скрининг `{record['linked_first_trimester_id']}` "
+            f"натижалари қўшилди (NT MoM: {params['nt_mom']:.2f}, "
+            f"PAPP-A MoM: {params['papp_a_mom']:.2f}, "
+            f"Free β-hCG MoM: {params['free_beta_hcg_mom']:.2f})"
+        )
+    
+    if record.get('duplicate_of'):
+        from dedup_index import DUPLICATE_KINDS
+        
+        st.warning("⚠️ **Эҳтимолий такрорий ёзув:** " + ", ".join(
+            f"`{duplicate_id}` ({DUPLICATE_KINDS.get(kind, kind)})" for duplicate_id, kind in record['duplicate_of'].items()
+        ))
+    
+    render_patient_header(record)
+    render_syndrome_cards(risks)
+    render_age_multipliers(risks)
+    render_risk_charts(risks, record['age'], record_lab_id(record))
+    render_what_if_panel(record)
+    render_marker_analysis(record)
+    render_recommendations(risks)
+    render_history_panel()
+
+def render_profile_report(report):
+    """Охирги профиль: энг кўп вақт олган функциялар, хотира ва хом файл"""
+    import pandas as pd
+    from rerun_profiler import PROFILE_MODES
+    
+    st.caption(f"{PROFILE_MODES[report['mode']]} · {report['elapsed_s'] * 1000:.0f} мс")
+    functions = pd.DataFrame(report['functions']).rename(columns={
+        'function': "Функция", 'calls': "Чақирув", 'own_s': "Ўзи (с)", 'cumulative_s': "Жами (с)"
+    })
+    st.dataframe(functions, hide_index=True, use_container_width=True)
+    
+    if report['allocations']:
+        st.caption(f"Хотира чўққиси: {report['peak_kb']:.0f} КБ")
+        allocations = pd.DataFrame(report['allocations']).rename(columns={
+            'location': "Қатор", 'size_kb': "КБ", 'count': "Блоклар"
+        })
+        st.dataframe(allocations, hide_index=True, use_container_width=True)
+    
+    if os.path.exists(report['raw_path']):
+        with open(report['raw_path'], 'rb') as raw_file:
+            st.download_button(
+                "⬇️ Хом профиль", data=raw_file.read(), file_name=os.path.basename(report['raw_path']),
+                mime="application/octet-stream", key="profile_download"
+            )
@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ГЕНЕТИК ХАВФ ҲИСОБЛАШ ЯДРОСИ
+Нормалар, MoM ва синдром хавфлари (Streamlit'га боғлиқ эмас)
+"""
+
+import json
+import os
+
+import numpy as np
+
+from gestational_dating import compile_norms_tables, measurement_range, median_for_days
+from weight_correction import expected_mom, load_weight_models
+from maternal_covariates import covariate_factor, covariate_factor_array
+
+# ==================== ЎЗГАРМАСЛАР ВА НОРМАЛАР ====================
+
+# Генетик синдромлар учун асосий хавфлар (1:N)
+BASE_RISKS = {
+    'downs': 1/800,      # Даун синдроми (Трисомия 21)
+    'edwards': 1/3000,   # Эдвардс синдроми (Трисомия 18)
+    'patau': 1/5000,     # Патау синдроми (Трисомия 13)
+    'turner': 1/2500,    # Тернер синдроми (45,X)
+    'ntd': 1/1000        # Нейротубуляр дефект
+}
+
+# Ёш бўйича хавф кўпайтирувчилари
+AGE_RISK_MULTIPLIERS = {
+    20: {'downs': 0.5, 'edwards': 0.3, 'patau': 0.3, 'turner': 0.4},
+    25: {'downs': 0.7, 'edwards': 0.5, 'patau': 0.5, 'turner': 0.6},
+    30: {'downs': 1.0, 'edwards': 1.0, 'patau': 1.0, 'turner': 1.0},
+    35: {'downs': 2.5, 'edwards': 3.0, 'patau': 3.5, 'turner': 2.0},
+    40: {'downs': 5.0, 'edwards': 8.0, 'patau': 10.0, 'turner': 4.0},
+    45: {'downs': 10.0, 'edwards': 15.0, 'patau': 20.0, 'turner': 8.0}
+}
+
+# Маркер қоидалари - calculate_syndrome_risks даги if/elif занжирлари (тартиби билан).
+# Ҳар бир занжирда биринчи бажарилган шарт кўпайтирувчиси олинади, акс ҳолда 1.0.
+# Массив ҳисоблаш учун decision_table бу қоидаларни бинлар жадвалига компиляция қилади
+MARKER_RULES = {
+    'downs': {
+        'papp_mom': [('<', 0.3, 3.0), ('<', 0.4, 2.0), ('<', 0.5, 1.5), ('>', 2.5, 1.2)],
+        'hcg_mom': [('<', 0.2, 2.5), ('<', 0.3, 1.8), ('>', 2.5, 2.0), ('>', 3.5, 2.5)],
+        'nt_mom': [('<', 0.6, 0.7), ('<', 0.8, 0.8), ('>', 2.0, 3.0), ('>', 3.0, 5.0)],
+    },
+    'edwards': {
+        'papp_mom': [('<', 0.2, 4.0), ('<', 0.3, 2.5)],
+        'hcg_mom': [('<', 0.1, 3.0), ('<', 0.2, 2.0)],
+        'nt_mom': [('>', 2.5, 4.0)],
+    },
+    'patau': {
+        'papp_mom': [('<', 0.2, 5.0), ('<', 0.3, 3.0)],
+        'hcg_mom': [('<', 0.15, 3.5), ('<', 0.25, 2.5)],
+        'nt_mom': [('>', 2.8, 5.0)],
+    },
+    'turner': {
+        'hcg_mom': [('>', 2.0, 2.0), ('>', 3.0, 3.0)],
+        'nt_mom': [('>', 3.0, 4.0)],
+    },
+}
+
+# НТД: AFP бўйича мутлақ хавф (кўпайтирувчи эмас), акс ҳолда BASE_RISKS['ntd']
+NTD_RULES = [('>', 2.5, 0.01), ('>', 2.0, 0.02), ('<', 0.5, BASE_RISKS['ntd'] * 0.7)]
+
+# Иккиламчи (ва интеграл) скрининг коррекцияси ва унинг синдромлар бўйича вазни
+QUAD_RULES = {
+    'afp_mom': [('<', 0.5, 0.8), ('>', 2.0, 1.3)],
+    'total_hcg_mom': [('<', 0.5, 0.9), ('>', 2.0, 1.8)],
+    'ue3_mom': [('<', 0.5, 1.5)],
+}
+QUAD_WEIGHTS = {'downs': 1.0, 'edwards': 1.2, 'patau': 1.3}
+
+# DELFIA Revvity биринчи триместр нормалари
+DELFIA_FIRST_TRIMESTER_NORMS = {
+    'PAPP_A': {
+        'unit': 'U/L',
+        'median_values': {
+            10: 1.0, 11: 1.2, 12: 1.4, 13: 1.6, 14: 1.8
+        },
+        'MoM_low': 0.4,
+        'MoM_high': 2.5,
+        'weight_correction': True
+    },
+    'FREE_BETA_HCG': {
+        'unit': 'ng/ml',
+        'median_values': {
+            10: 40.0, 11: 60.0, 12: 80.0, 13: 100.0, 14: 120.0
+        },
+        'MoM_low': 0.5,
+        'MoM_high': 2.0,
+        'weight_correction': True
+    },
+    'NT': {
+        'unit': 'мм',
+        'median_values': {
+            10: 1.2, 11: 1.3, 12: 1.4, 13: 1.5, 14: 1.5
+        },
+        'MoM_low': 0.8,
+        'MoM_high': 2.0,
+        'cutoff': 2.5,  # NT катталиги чегараси
+        'weight_correction': False
+    }
+}
+
+# DELFIA Revvity иккинчи триместр нормалари
+DELFIA_SECOND_TRIMESTER_NORMS = {
+    'AFP': {
+        'unit': 'ng/ml',
+        'median_values': {
+            15: 30.0, 16: 35.0, 17: 40.0, 18: 45.0, 19: 50.0, 20: 55.0
+        },
+        'MoM_low': 0.5,
+        'MoM_high': 2.0,
+        'weight_correction': True
+    },
+    'TOTAL_HCG': {
+        'unit': 'IU/L',
+        'median_values': {
+            15: 30000, 16: 28000, 17: 25000, 18: 22000, 19: 20000, 20: 18000
+        },
+        'MoM_low': 0.5,
+        'MoM_high': 2.0,
+        'weight_correction': True
+    },
+    'UE3': {
+        'unit': 'nmol/L',
+        'median_values': {
+            15: 2.5, 16: 3.0, 17: 3.5, 18: 4.0, 19: 4.5, 20: 5.0
+        },
+        'MoM_low': 0.5,
+        'MoM_high': 2.0,
+        'weight_correction': True
+    }
+}
+
+# Ҳисоблаш модули ва нормалар версияси (аудит ва солиштириш учун)
+ENGINE_VERSION = "1.0.0"
+NORMS_VERSION = "DELFIA-builtin-1.0.0"
+
+def load_norms_file(path):
+    """fit_norms.py яратган нормалар файлини ўқиш (версия, биринчи, иккинчи триместр)"""
+    with open(path, encoding='utf-8') as norms_file:
+        document = json.load(norms_file)
+    
+    def convert(norms):
+        # JSON калитлари сатр - ҳафталарни яна int га айлантириш
+        return {
+            parameter: dict(spec, median_values={int(week): float(value) for week, value in spec['median_values'].items()})
+            for parameter, spec in norms.items()
+        }
+    
+    return (
+        document['version'],
+        convert(document['DELFIA_FIRST_TRIMESTER_NORMS']),
+        convert(document['DELFIA_SECOND_TRIMESTER_NORMS'])
+    )
+
+# SCREENING_NORMS_FILE берилса, ўрнатилган нормалар ўрнига шу файл ишлатилади
+if os.environ.get("SCREENING_NORMS_FILE"):
+    NORMS_VERSION, DELFIA_FIRST_TRIMESTER_NORMS, DELFIA_SECOND_TRIMESTER_NORMS = load_norms_file(
+        os.environ["SCREENING_NORMS_FILE"]
+    )
+
+# Кунлик медиана жадваллари (модул юкланганда бир марта тузилади)
+MEDIAN_TABLES = {
+    'first': compile_norms_tables(DELFIA_FIRST_TRIMESTER_NORMS),
+    'second': compile_norms_tables(DELFIA_SECOND_TRIMESTER_NORMS)
+}
+
+# Ёзувдаги хом маркер қийматлари калитлари
+MARKER_RECORD_KEYS = {
+    'NT': 'nt',
+    'PAPP_A': 'papp_a',
+    'FREE_BETA_HCG': 'free_beta_hcg',
+    'AFP': 'afp',
+    'TOTAL_HCG': 'total_hcg',
+    'UE3': 'ue3'
+}
+
+# Вазн коррекцияси моделлари (SCREENING_WEIGHT_MODELS файли ёки стандарт)
+WEIGHT_MODELS = load_weight_models(os.environ.get(
+    "SCREENING_WEIGHT_MODELS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "weight_models.json")
+))
+
+# Лаборатория профили (lab_profiles.LabProfile): ўз нормалари, кунлик жадваллари ва ёш
+# жадвали. lab=None - ўрнатилган (ёки SCREENING_NORMS_FILE) нормалар
+
+def trimester_norms(trimester, lab=None):
+    """Триместр нормалари (лаборатория профили ёки ўрнатилган)"""
+    if lab is not None:
+        return lab.norms(trimester)
+    return DELFIA_FIRST_TRIMESTER_NORMS if trimester == "first" else DELFIA_SECOND_TRIMESTER_NORMS
+
+def _median_tables(lab):
+    return MEDIAN_TABLES if lab is None else lab.median_tables
+
+def gestational_days_range(trimester, lab=None):
+    """Триместрнинг барча маркер жадваллари қамраган кунлар (биринчи, охирги)"""
+    tables = _median_tables(lab)[trimester].values()
+    return max(table['first_day'] for table in tables), min(table['last_day'] for table in tables)
+
+def dating_range_mm(method, trimester, lab=None):
+    """Триместр нормалари қамраган CRL/BPD диапазони (мм)"""
+    return measurement_range(method, *gestational_days_range(trimester, lab))
+
+def _age_risk_table(lab):
+    return AGE_RISK_MULTIPLIERS if lab is None else lab.age_risk_multipliers
+
+def get_weight_model(parameter, trimester, lab=None):
+    """Маркер учун вазн модели (коррекция ўчирилган бўлса None)"""
+    norms = trimester_norms(trimester, lab)
+    if parameter not in norms or not norms[parameter].get('weight_correction', False):
+        return None
+    return WEIGHT_MODELS.get(trimester, {}).get(parameter)
+
+# Синдромлар тавсифи
+SYNDROME_DESCRIPTIONS = {
+    'downs': {
+        'name': 'Даун синдроми',
+        'scientific': 'Трисомия 21',
+        'description': 'Интеллектуал нотўликлик, юрак аномалиялари, мускул гипотонияси',
+        'risk_factors': ['Ҳар иккала ота-онада ёш', 'Оилда борилиги', 'Диабет'],
+        'color': '#ff6b6b',
+        'icon': '👶'
+    },
+    'edwards': {
+        'name': 'Эдвардс синдроми',
+        'scientific': 'Трисомия 18',
+        'description': 'Оғир кўп орган зарарланиши, йўл-йўлақа аномалиялари',
+        'risk_factors': ['Онанинг ёши', 'Қийин вазн орттириш'],
+        'color': '#ff9800',
+        'icon': '⚠️'
+    },
+    'patau': {
+        'name': 'Патау синдроми',
+        'scientific': 'Трисомия 13',
+        'description': 'Неврологик аномалиялар, кўз ва юз аномалиялари',
+        'risk_factors': ['Ота-она ёши', 'Радиацияга мулоқот'],
+        'color': '#ff5722',
+        'icon': '🔬'
+    },
+    'turner': {
+        'name': 'Тернер синдроми',
+        'scientific': '45,X',
+        'description': 'Бўй пастлиги, жинсий руксатсизлик, юрак аномалиялари',
+        'risk_factors': ['Отанинг ёши', 'Модда алмашинуви'],
+        'color': '#9c27b0',
+        'icon': '🧬'
+    },
+    'ntd': {
+        'name': 'Нейротубуляр дефект',
+        'scientific': 'НТД',
+        'description': 'Спина бифида, анэнцефалия, менингоцеле',
+        'risk_factors': ['Фолат етишмовчилиги', 'Диабет', 'Ожирение'],
+        'color': '#4caf50',
+        'icon': '📏'
+    }
+}
+
+# ==================== ФУНКЦИЯЛАР ====================
+
+def calculate_bmi(weight_kg, height_cm):
+    """Body Mass Index (BMI) ҳисоблаш"""
+    if height_cm > 0:
+        height_m = height_cm / 100
+        bmi = weight_kg / (height_m ** 2)
+        return round(bmi, 1)
+    return 22.0
+
+def get_bmi_category(bmi):
+    """BMI категориясини аниқлаш"""
+    if bmi < 18.5:
+        return "Паст вазн", "bmi-low"
+    elif 18.5 <= bmi < 25:
+        return "Нормал", "bmi-normal"
+    elif 25 <= bmi < 30:
+        return "Ортиқча вазн", "bmi-overweight"
+    else:
+        return "Семизлик", "bmi-obese"
+
+def get_median_value(parameter, gestational_week, trimester="first", gestational_days=None, lab=None):
+    """Гестацион ҳафтага (ёки аниқ кунга) кўра медиана қийматини олиш"""
+    # Кун маълум бўлса (CRL/BPD датировкаси) - кунлик жадвалдан
+    if gestational_days is not None:
+        table = _median_tables(lab)[trimester].get(parameter)
+        return median_for_days(table, gestational_days) if table else 1.0
+    
+    norms = trimester_norms(trimester, lab)
+    
+    if parameter in norms:
+        weeks = list(norms[parameter]['median_values'].keys())
+        
+        if gestational_week in norms[parameter]['median_values']:
+            return norms[parameter]['median_values'][gestational_week]
+        
+        # Энг яқин ҳафтани топиш
+        closest_week = min(weeks, key=lambda x: abs(x - gestational_week))
+        return norms[parameter]['median_values'][closest_week]
+    
+    return 1.0
+
+def calculate_mom_value(measured_value, parameter, gestational_week, maternal_weight=None, trimester="first",
+                        gestational_days=None, covariate_code=0, lab=None):
+    """
+    Multiple of Median (MoM) қийматини ҳисоблаш (covariate_code - maternal_covariates коди).
+    gestational_days норма жадвалидан ташқарида бўлса ValueError.
+    """
+    median = get_median_value(parameter, gestational_week, trimester, gestational_days, lab)
+    
+    if median <= 0:
+        return 1.0
+    
+    # Асосий MoM ҳисоблаш
+    mom = measured_value / median
+    
+    # Вазн коррекцияси (агар зарур бўлса) - иккала триместрда, маркер модели бўйича
+    weight_model = get_weight_model(parameter, trimester, lab)
+    if maternal_weight and weight_model:
+        mom = mom / expected_mom(weight_model, maternal_weight)
+    
+    # Эгизаклар, ЭКО, чекиш, диабет ва этник келиб чиқиш коррекцияси
+    if covariate_code:
+        mom = mom / covariate_factor(parameter, trimester, covariate_code)
+    
+    return round(mom, 2)
+
+def calculate_mom_array(measured_values, parameter, gestational_days, maternal_weights=None, trimester="first",
+                        covariate_codes=None, lab=None):
+    """
+    Пакетли MoM ҳисоблаш (NumPy массивлари).
+    calculate_mom_value билан бир хил кунлик жадваллар ва коррекциялардан фойдаланади.
+    """
+    table = _median_tables(lab)[trimester].get(parameter)
+    measured_values = np.asarray(measured_values, dtype=float)
+    if table is None:
+        return np.ones_like(measured_values)
+    
+    mom = measured_values / median_for_days(table, gestational_days)
+    
+    # Вазн коррекцияси (calculate_mom_value билан бир хил модел)
+    weight_model = get_weight_model(parameter, trimester, lab)
+    if maternal_weights is not None and weight_model:
+        mom = mom / expected_mom(weight_model, maternal_weights)
+    
+    if covariate_codes is not None:
+        mom = mom / covariate_factor_array(covariate_codes, parameter, trimester)
+    
+    return np.round(mom, 2)
+
+def get_age_risk_multiplier(age, syndrome, lab=None):
+    """Ёш бўйича хавф кўпайтирувчисини олиш"""
+    age_table = _age_risk_table(lab)
+    ages = sorted(age_table.keys())
+    
+    if age <= ages[0]:
+        return age_table[ages[0]][syndrome]
+    elif age >= ages[-1]:
+        return age_table[ages[-1]][syndrome]
+    
+    # Интерполяция қилиш
+    for i in range(len(ages) - 1):
+        if ages[i] <= age <= ages[i + 1]:
+            age1, age2 = ages[i], ages[i + 1]
+            mult1 = age_table[age1][syndrome]
+            mult2 = age_table[age2][syndrome]
+            
+            # Чизиқли интерполяция
+            interpolation_factor = (age - age1) / (age2 - age1)
+            risk_multiplier = mult1 + interpolation_factor * (mult2 - mult1)
+            return round(risk_multiplier, 2)
+    
+    return 1.0
+
+def calculate_syndrome_risks(patient_age, marker_moms, trimester="first", lab=None):
+    """
+    Барча генетик синдромлар учун хавфларни ҳисоблаш
+    """
+    risks = {}
+    
+    # Маркер MoM қийматлари
+    nt_mom = marker_moms.get('nt_mom', 1.0)
+    papp_mom = marker_moms.get('papp_mom', 1.0)
+    hcg_mom = marker_moms.get('hcg_mom', 1.0)
+    afp_mom = marker_moms.get('afp_mom', 1.0)
+    total_hcg_mom = marker_moms.get('total_hcg_mom', 1.0)
+    ue3_mom = marker_moms.get('ue3_mom', 1.0)
+    
+    # 1. ЁШ ХАВФЛАРИНИ ҲИСОБЛАШ
+    age_risks = {}
+    for syndrome in ['downs', 'edwards', 'patau', 'turner']:
+        age_risks[syndrome] = get_age_risk_multiplier(patient_age, syndrome, lab)
+    
+    # 2. ДАУН СИНДРОМИ ХАВФИ
+    base_down_risk = BASE_RISKS['downs']
+    down_risk = base_down_risk * age_risks['downs']
+    
+    # PAPP-A коррекцияси
+    if papp_mom < 0.3:
+        down_risk *= 3.0
+    elif papp_mom < 0.4:
+        down_risk *= 2.0
+    elif papp_mom < 0.5:
+        down_risk *= 1.5
+    elif papp_mom > 2.5:
+        down_risk *= 1.2
+    
+    # Free β-hCG коррекцияси
+    if hcg_mom < 0.2:
+        down_risk *= 2.5
+    elif hcg_mom < 0.3:
+        down_risk *= 1.8
+    elif hcg_mom > 2.5:
+        down_risk *= 2.0
+    elif hcg_mom > 3.5:
+        down_risk *= 2.5
+    
+    # NT коррекцияси
+    if nt_mom < 0.6:
+        down_risk *= 0.7
+    elif nt_mom < 0.8:
+        down_risk *= 0.8
+    elif nt_mom > 2.0:
+        down_risk *= 3.0
+    elif nt_mom > 3.0:
+        down_risk *= 5.0
+    
+    risks['downs'] = min(down_risk, 0.5)  # Максимум 50% хавф
+    
+    # 3. ЭДВАРДС СИНДРОМИ ХАВФИ
+    edwards_risk = BASE_RISKS['edwards'] * age_risks['edwards']
+    
+    if papp_mom < 0.2:
+        edwards_risk *= 4.0
+    elif papp_mom < 0.3:
+        edwards_risk *= 2.5
+    
+    if hcg_mom < 0.1:
+        edwards_risk *= 3.0
+    elif hcg_mom < 0.2:
+        edwards_risk *= 2.0
+    
+    if nt_mom > 2.5:
+        edwards_risk *= 4.0
+    
+    risks['edwards'] = min(edwards_risk, 0.5)
+    
+    # 4. ПАТАУ СИНДРОМИ ХАВФИ
+    patau_risk = BASE_RISKS['patau'] * age_risks['patau']
+    
+    if papp_mom < 0.2:
+        patau_risk *= 5.0
+    elif papp_mom < 0.3:
+        patau_risk *= 3.0
+    
+    if hcg_mom < 0.15:
+        patau_risk *= 3.5
+    elif hcg_mom < 0.25:
+        patau_risk *= 2.5
+    
+    if nt_mom > 2.8:
+        patau_risk *= 5.0
+    
+    risks['patau'] = min(patau_risk, 0.5)
+    
+    # 5. ТЕРНЕР СИНДРОМИ ХАВФИ
+    turner_risk = BASE_RISKS['turner'] * age_risks['turner']
+    
+    if hcg_mom > 2.0:
+        turner_risk *= 2.0
+    elif hcg_mom > 3.0:
+        turner_risk *= 3.0
+    
+    if nt_mom > 3.0:
+        turner_risk *= 4.0
+    
+    risks['turner'] = min(turner_risk, 0.5)
+    
+    # 6. НТД ХАВФИ
+    ntd_risk = BASE_RISKS['ntd']
+    
+    if afp_mom > 2.5:
+        ntd_risk = 0.01  # 1:100
+    elif afp_mom > 2.0:
+        ntd_risk = 0.02  # 1:50
+    elif afp_mom < 0.5:
+        ntd_risk = ntd_risk * 0.7  # Паст AFP - хавф камайиши
+    
+    risks['ntd'] = min(ntd_risk, 0.5)
+    
+    # 7. ИККИЛАМЧИ (ВА ИНТЕГРАЛ) СКРИНИНГ КОРРЕКЦИЯСИ
+    if trimester in ("second", "integrated") and all([afp_mom, total_hcg_mom, ue3_mom]):
+        quad_correction = 1.0
+        
+        # AFP коррекцияси
+        if afp_mom < 0.5:
+            quad_correction *= 0.8
+        elif afp_mom > 2.0:
+            quad_correction *= 1.3
+        
+        # Total hCG коррекцияси
+        if total_hcg_mom < 0.5:
+            quad_correction *= 0.9
+        elif total_hcg_mom > 2.0:
+            quad_correction *= 1.8
+        
+        # uE3 коррекцияси
+        if ue3_mom < 0.5:
+            quad_correction *= 1.5
+        
+        # Хавфларга коррекция қўллаш
+        risks['downs'] *= quad_correction
+        risks['edwards'] *= quad_correction * 1.2
+        risks['patau'] *= quad_correction * 1.3
+    
+    # 8. ЁШ ХАВФЛАРИНИ САҚЛАШ
+    risks['age_risk'] = age_risks
+    
+    return risks
+
+# ==================== ВЕКТОРЛАШГАН ҲИСОБЛАШ ====================
+
+def get_age_risk_multiplier_array(ages, syndrome, lab=None):
+    """
+    get_age_risk_multiplier нинг массив варианти. Интерполяция скаляр формула билан
+    (np.interp эмас): np.interp бошқа тартибда ҳисоблайди ва 1.675 каби қийматлар
+    яхлитлашда бошқа томонга ўтади
+    """
+    age_table = _age_risk_table(lab)
+    table_ages = np.array(sorted(age_table.keys()), dtype=float)
+    multipliers = np.array([age_table[age][syndrome] for age in table_ages])
+    ages = np.asarray(ages, dtype=float)
+    # Скалярдаги каби ages[i] <= age <= ages[i + 1] шартли биринчи оралиқ
+    index = np.clip(np.searchsorted(table_ages, ages, side='left') - 1, 0, len(table_ages) - 2)
+    age1, age2 = table_ages[index], table_ages[index + 1]
+    mult1, mult2 = multipliers[index], multipliers[index + 1]
+    interpolation_factor = (ages - age1) / (age2 - age1)
+    result = np.round(mult1 + interpolation_factor * (mult2 - mult1), 2)
+    # Жадвал четларида яхлитланмаган четки қиймат
+    result = np.where(ages <= table_ages[0], multipliers[0], result)
+    return np.where(ages >= table_ages[-1], multipliers[-1], result)
+
+def calculate_syndrome_risks_array(patient_ages, marker_moms, trimester="first", lab=None):
+    """
+    calculate_syndrome_risks нинг массив варианти (симуляция ва пакетли ҳисоблаш учун).
+    Қоидалар decision_table да бинлар жадвалига компиляция қилинган: ҳар бир маркер
+    учун searchsorted индекси ва синдром тензоридан битта кўпайтирувчи.
+    """
+    from decision_table import get_decision_table
+    
+    table = get_decision_table() if lab is None else lab.decision_table
+    return table.score(patient_ages, marker_moms, trimester)
+
+def calculate_risk_grid(patient_age, marker_moms, trimester, x_axis, x_values, y_axis, y_values, lab=None):
+    """
+    Икки ўқ бўйича хавфлар тўри (what-if): ўқ - маркер MoM номи ёки 'age'.
+    Бутун тўр битта calculate_syndrome_risks_array чақируви билан ҳисобланади;
+    натижа массивлари шакли (len(y_values), len(x_values)).
+    """
+    x_grid, y_grid = np.meshgrid(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float))
+    grid_moms = dict(marker_moms)
+    ages = np.full(x_grid.shape, float(patient_age))
+    for axis, values in ((x_axis, x_grid), (y_axis, y_grid)):
+        if axis == 'age':
+            ages = values
+        else:
+            grid_moms[axis] = values
+    return calculate_syndrome_risks_array(ages, grid_moms, trimester, lab)
+
+def get_highest_risk(risks):
+    """Энг юқори хавфли синдром ва унинг хавфи"""
+    max_syndrome = 'downs'
+    max_risk = 0
+    
+    for syndrome_key in ['downs', 'edwards', 'patau', 'turner', 'ntd']:
+        risk_val = risks.get(syndrome_key, 0)
+        if risk_val > max_risk:
+            max_risk = risk_val
+            max_syndrome = syndrome_key
+    
+    return max_syndrome, max_risk
+
+def get_risk_category(risk_value):
+    """Хавф қийматига кўра категория аниқлаш"""
+    if risk_value <= 0:
+        return "НОМАЪЛУМ", "risk-unknown", "#9e9e9e"
+    elif risk_value > 0.1:      # 1:10 дан юқори
+        return "КРИТИК", "risk-critical", "#b71c1c"
+    elif risk_value > 0.05:     # 1:20
+        return "ЖУДА ЮҚОРИ", "risk-high", "#e65100"
+    elif risk_value > 0.02:     # 1:50
+        return "ЮҚОРИ", "risk-high", "#f57c00"
+    elif risk_value > 0.01:     # 1:100
+        return "ЎРТАЧА-ЮҚОРИ", "risk-medium", "#f57f17"
+    elif risk_value > 0.005:    # 1:200
+        return "ЎРТАЧА", "risk-medium", "#f9a825"
+    elif risk_value > 0.001:    # 1:1000
+        return "ПАСТ-ЎРТАЧА", "risk-low", "#388e3c"
+    else:                       # 1:1000 дан паст
+        return "ПАСТ", "risk-low", "#1b5e20"
+
+def format_risk_display(risk_value):
+    """Хавф қийматини кўринишли форматда кўрсатиш"""
+    if risk_value <= 0:
+        return "1:∞"
+    
+    try:
+        ratio = int(1 / risk_value)
+        return f"1:{ratio:,}".replace(",", " ")
+    except:
+        return f"1:{int(1/risk_value)}"
+
+# ==================== ИНТЕГРАЛ СКРИНИНГ (ТРИМЕСТРЛАРНИ БОҒЛАШ) ====================
+
+def combine_trimester_moms(second_moms, first_record):
+    """Иккала триместр MoM қийматларини битта тўпламга бирлаштириш"""
+    combined = dict(second_moms)
+    parameters = first_record.get('parameters', {})
+    
+    combined['nt_mom'] = parameters.get('nt_mom', 1.0)
+    combined['papp_mom'] = parameters.get('papp_a_mom', 1.0)
+    combined['hcg_mom'] = parameters.get('free_beta_hcg_mom', 1.0)
+    
+    return combined
+
+def record_marker_moms(record):
+    """Сақланган ёзувдан ҳисоблаш модули MoM қийматлари ва скрининг режими"""
+    parameters = record.get('parameters', {})
+    marker_moms = {key: parameters.get(key, 1.0) for key in ('afp_mom', 'total_hcg_mom', 'ue3_mom')}
+    return combine_trimester_moms(marker_moms, record), record.get('screening_mode', 'first')
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+АНИҚЛАШ ДАРАЖАСИ (DR) / ЁЛҒОН МУСБАТ (FPR) СИМУЛЯТОРИ
+
+Соғлом ва ҳар бир синдром бўйича зарарланган ҳомиладорликларнинг синтетик
+популяцияларини яратиб, calculate_syndrome_risks_array орқали баҳолайди ва
+ҳар бир синдром учун DR/FPR/ROC эгри чизиқларини ҳисоблайди.
+
+Популяциялар бўлакларга бўлиниб, бир нечта жараёнда ҳисобланади; ҳар бир
+бўлакдан фақат хавфлар гистограммаси қайтади, шунинг учун ўн миллионлаб
+ҳомиладорликлар ҳам чекланган хотирада ишлайди.
+
+    python screening_simulator.py --unaffected 20000000 --affected 1000000 --trimester first
+"""
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from risk_engine import AGE_RISK_MULTIPLIERS, SYNDROME_DESCRIPTIONS, calculate_syndrome_risks_array
+
+SYNDROMES = ['downs', 'edwards', 'patau', 'turner', 'ntd']
+
+# Сиёсат чегаралари (get_risk_category: 1:10, 1:20, 1:50, 1:100, 1:200, 1:1000)
+POLICY_CUTOFFS = [0.1, 0.05, 0.02, 0.01, 0.005, 0.001]
+
+# Хавф гистограммаси чегаралари: логарифмик тўр + сиёсат чегаралари аниқ
+RISK_EDGES = np.unique(np.concatenate([np.logspace(-7, 0, 1401), POLICY_CUTOFFS]))
+
+# Маркерлар log10(MoM) тақсимоти: (ўртача, стандарт оғиш)
+UNAFFECTED_MARKERS = {
+    'nt_mom': (0.0, 0.10),
+    'papp_mom': (0.0, 0.23),
+    'hcg_mom': (0.0, 0.27),
+    'afp_mom': (0.0, 0.14),
+    'total_hcg_mom': (0.0, 0.24),
+    'ue3_mom': (0.0, 0.12)
+}
+
+# Зарарланган популяциялардаги силжишлар (кўрсатилмаган маркерлар - соғлом тақсимот)
+AFFECTED_MARKERS = {
+    'downs': {
+        'nt_mom': (0.30, 0.23), 'papp_mom': (-0.40, 0.30), 'hcg_mom': (0.30, 0.28),
+        'afp_mom': (-0.14, 0.16), 'total_hcg_mom': (0.30, 0.26), 'ue3_mom': (-0.12, 0.13)
+    },
+    'edwards': {
+        'nt_mom': (0.40, 0.25), 'papp_mom': (-0.70, 0.30), 'hcg_mom': (-0.70, 0.30),
+        'afp_mom': (-0.20, 0.15), 'total_hcg_mom': (-0.55, 0.25), 'ue3_mom': (-0.40, 0.20)
+    },
+    'patau': {
+        'nt_mom': (0.40, 0.25), 'papp_mom': (-0.60, 0.30), 'hcg_mom': (-0.30, 0.30),
+        'afp_mom': (0.00, 0.15), 'total_hcg_mom': (-0.10, 0.25), 'ue3_mom': (-0.10, 0.15)
+    },
+    'turner': {
+        'nt_mom': (0.60, 0.30), 'papp_mom': (-0.30, 0.30), 'hcg_mom': (0.05, 0.30),
+        'afp_mom': (-0.10, 0.16), 'total_hcg_mom': (0.10, 0.30), 'ue3_mom': (-0.30, 0.18)
+    },
+    'ntd': {
+        'afp_mom': (0.58, 0.20)
+    }
+}
+
+# Ёш тақсимоти (соғлом популяция) ва чегаралари
+MATERNAL_AGE_MEAN, MATERNAL_AGE_SD = 28.0, 5.5
+MATERNAL_AGE_RANGE = (15.0, 50.0)
+
+TRIMESTER_MARKERS = {
+    'first': ['nt_mom', 'papp_mom', 'hcg_mom'],
+    'second': ['afp_mom', 'total_hcg_mom', 'ue3_mom'],
+    'integrated': list(UNAFFECTED_MARKERS)
+}
+
+def sample_maternal_ages(rng, size, syndrome=None):
+    """
+    Она ёшлари. Зарарланган популяцияда ёш бўйича хавф кўпайтирувчисига
+    пропорционал танлаб олинади (рад этиш усули).
+    """
+    def draw(count):
+        return np.clip(rng.normal(MATERNAL_AGE_MEAN, MATERNAL_AGE_SD, count), *MATERNAL_AGE_RANGE)
+
+    if syndrome is None or syndrome not in AGE_RISK_MULTIPLIERS[30]:
+        return draw(size)
+
+    table_ages = sorted(AGE_RISK_MULTIPLIERS)
+    multipliers = np.array([AGE_RISK_MULTIPLIERS[age][syndrome] for age in table_ages])
+    accepted = []
+    remaining = size
+    while remaining > 0:
+        candidates = draw(max(remaining * 4, 1024))
+        weights = np.interp(candidates, table_ages, multipliers) / multipliers.max()
+        keep = candidates[rng.random(len(candidates)) < weights][:remaining]
+        accepted.append(keep)
+        remaining -= len(keep)
+    return np.concatenate(accepted)
+
+def sample_marker_moms(rng, size, trimester, syndrome=None):
+    """Триместр маркерлари MoM қийматлари (қолганлари 1.0)"""
+    profile = AFFECTED_MARKERS.get(syndrome, {})
+    moms = {}
+    for name in TRIMESTER_MARKERS[trimester]:
+        mean, sd = profile.get(name, UNAFFECTED_MARKERS[name])
+        moms[name] = np.power(10.0, rng.normal(mean, sd, size))
+    return moms
+
+def risk_histogram(risk_values):
+    """Хавфлар гистограммаси: i-устун - RISK_EDGES[i-1] < хавф <= RISK_EDGES[i]"""
+    return np.bincount(np.searchsorted(RISK_EDGES, risk_values, side='left'), minlength=len(RISK_EDGES) + 1)
+
+def simulate_chunk(task):
+    """Битта бўлак: популяция яратиш ва ҳар бир синдром хавфи гистограммаси (жараён ишчиси)"""
+    seed, size, trimester, population = task
+    rng = np.random.default_rng(seed)
+    syndrome = None if population == 'unaffected' else population
+
+    ages = sample_maternal_ages(rng, size, syndrome)
+    risks = calculate_syndrome_risks_array(ages, sample_marker_moms(rng, size, trimester, syndrome), trimester)
+    return population, {key: risk_histogram(risks[key]) for key in SYNDROMES}
+
+def _chunks(total, chunk_size):
+    while total > 0:
+        yield min(chunk_size, total)
+        total -= chunk_size
+
+def run_simulation(unaffected=1_000_000, affected=100_000, trimester="first", chunk_size=500_000,
+                   workers=None, seed=2024):
+    """
+    Симуляцияни бажариш.
+
+    Натижа: {'cutoffs', 'n_unaffected', 'n_affected', 'dr': {синдром: массив}, 'fpr': {синдром: массив}}
+    DR ва FPR - хавф cutoffs[k] дан катта бўлган улуш.
+    """
+    populations = [('unaffected', unaffected)] + [(syndrome, affected) for syndrome in SYNDROMES]
+    tasks = [
+        (population, size)
+        for population, total in populations
+        for size in _chunks(total, chunk_size)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    tasks = [(seeds[i], size, trimester, population) for i, (population, size) in enumerate(tasks)]
+
+    histograms = {population: {key: np.zeros(len(RISK_EDGES) + 1, dtype=np.int64) for key in SYNDROMES}
+                  for population, _ in populations}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for population, chunk_histograms in pool.map(simulate_chunk, tasks):
+            for key, histogram in chunk_histograms.items():
+                histograms[population][key] += histogram
+
+    def positive_fraction(histogram):
+        # Хавф > RISK_EDGES[k] бўлганлар: k+1 дан бошлаб устунлар йиғиндиси
+        tail = np.cumsum(histogram[::-1])[::-1]
+        return tail[1:] / max(histogram.sum(), 1)
+
+    return {
+        'trimester': trimester,
+        'cutoffs': RISK_EDGES.copy(),
+        'n_unaffected': unaffected,
+        'n_affected': affected,
+        'dr': {key: positive_fraction(histograms[key][key]) for key in SYNDROMES},
+        'fpr': {key: positive_fraction(histograms['unaffected'][key]) for key in SYNDROMES}
+    }
+
+def policy_table(result, cutoffs=POLICY_CUTOFFS):
+    """Белгиланган чегаралардаги DR/FPR: [(синдром, чегара, dr, fpr)]"""
+    rows = []
+    for key in SYNDROMES:
+        for cutoff in cutoffs:
+            index = int(np.searchsorted(result['cutoffs'], cutoff))
+            rows.append((key, cutoff, float(result['dr'][key][index]), float(result['fpr'][key][index])))
+    return rows
+
+def roc_figure(result):
+    """Ҳар бир синдром учун ROC эгри чизиғи (Plotly)"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for key in SYNDROMES:
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([[1.0], result['fpr'][key], [0.0]]) * 100,
+            y=np.concatenate([[1.0], result['dr'][key], [0.0]]) * 100,
+            mode='lines',
+            name=SYNDROME_DESCRIPTIONS[key]['name'],
+            line=dict(color=SYNDROME_DESCRIPTIONS[key]['color'], width=3)
+        ))
+
+    fig.update_layout(
+        title=f"ROC эгри чизиқлари ({result['trimester']} скрининг)",
+        xaxis_title="Ёлғон мусбат улуши (FPR), %",
+        yaxis_title="Аниқлаш даражаси (DR), %",
+        xaxis_type="log",
+        height=500
+    )
+    return fig
+
+def main():
+    parser = argparse.ArgumentParser(description="Скрининг сиёсати учун DR/FPR симуляцияси")
+    parser.add_argument('--unaffected', type=int, default=10_000_000, help="Соғлом ҳомиладорликлар сони")
+    parser.add_argument('--affected', type=int, default=1_000_000, help="Ҳар бир синдром бўйича зарарланганлар сони")
+    parser.add_argument('--trimester', choices=list(TRIMESTER_MARKERS), default='first')
+    parser.add_argument('--chunk-size', type=int, default=500_000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--html', help="ROC графигини HTML файлга сақлаш")
+    args = parser.parse_args()
+
+    result = run_simulation(args.unaffected, args.affected, args.trimester, args.chunk_size, args.workers, args.seed)
+
+    print(f"{'синдром':<10} {'чегара':>8} {'DR %':>8} {'FPR %':>8}")
+    for key, cutoff, dr, fpr in policy_table(result):
+        print(f"{key:<10} {'1:' + str(round(1 / cutoff)):>8} {dr * 100:8.2f} {fpr * 100:8.3f}")
+
+    if args.html:
+        roc_figure(result).write_html(args.html)
+        print(f"ROC: {args.html}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
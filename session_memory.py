@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+СЕССИЯ ХОТИРАСИНИ ЧЕКЛАШ
+Ҳар бир сессия ҳолати ҳажмини ҳисоблаш, чегарадан ошганда эски тарихни
+дискка (spill) чиқариш ва узоқ вақт фаол бўлмаган сессиялар хотирасини
+бўшатиш. Ҳафталаб очиқ турадиган иш жойида хотира ўсмаслиги учун.
+"""
+
+import os
+import sys
+import threading
+import time
+import weakref
+
+# Сессия ҳолати чегараси (КБ) ва фаолсизлик муддати (дақиқа)
+SESSION_MEMORY_LIMIT = int(os.environ.get("SCREENING_SESSION_MEMORY_KB", "512")) * 1024
+SESSION_IDLE_TTL = int(os.environ.get("SCREENING_SESSION_TTL_MINUTES", "720")) * 60
+
+# Чегарадан ошганда ҳам хотирада қоладиган охирги ёзувлар ва энг устувор иш рўйхати элементлари
+MIN_HISTORY_IN_MEMORY = 5
+MIN_WORKLIST_IN_MEMORY = 50
+
+# Сессияда сақланадиган оммавий вазифалар ID лари сони
+MAX_BULK_JOBS = 10
+
+def deep_sizeof(obj, seen=None):
+    """Объект ва унинг ичидаги луғат/рўйхат/сатрлар ҳажми (байт, тахминий)"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    memory_bytes = getattr(obj, 'memory_bytes', None)
+    if callable(memory_bytes) and not isinstance(obj, type):
+        return memory_bytes(seen)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+def account_session_state(state):
+    """Сессия ҳолати калитлари бўйича ҳажм (байт)"""
+    seen = set()
+    return {key: deep_sizeof(state[key], seen) for key in list(state.keys())}
+
+def enforce_session_limit(state, stores=(), limit=SESSION_MEMORY_LIMIT):
+    """
+    Сессия ҳолатини чегарага келтириш: аввал тарихнинг эски ёзувлари, кейин
+    иш рўйхатининг кам устувор элементлари омборлар файлига (spill)
+    чиқарилади, охирида эски оммавий вазифалар ID лари қисқартирилади.
+    stores - сессиянинг барча омборлари (лабораториялар бўйича), биринчи
+    навбатда бўшатиладиганидан бошлаб.
+    Натижа: (олдинги ҳажм, кейинги ҳажм)
+    """
+    before = sum(account_session_state(state).values())
+    total = before
+    if total <= limit:
+        return before, total
+
+    # Ҳолат бир марта ҳисобланади; кейин омборларнинг жорий ҳажми бўйича камайтирилади
+    stores = [store for store in stores if hasattr(store, 'spill_bytes')]
+    for store in stores:
+        if total <= limit:
+            break
+        total -= store.spill_bytes(total - limit, keep=MIN_HISTORY_IN_MEMORY)
+
+    for store in stores:
+        if total <= limit:
+            break
+        store_bytes = store.memory_bytes()
+        if store.spill_worklist(MIN_WORKLIST_IN_MEMORY):
+            total -= store_bytes - store.memory_bytes()
+
+    if total > limit and len(state.get('bulk_jobs', [])) > MAX_BULK_JOBS:
+        jobs_bytes = deep_sizeof(state['bulk_jobs'])
+        state['bulk_jobs'] = state['bulk_jobs'][:MAX_BULK_JOBS]
+        total -= jobs_bytes - deep_sizeof(state['bulk_jobs'])
+
+    return before, total
+
+class SessionRegistry:
+    """
+    Жараён бўйича сессиялар рўйхати: охирги фаоллик ва омборларга (ҳар бир
+    лаборатория учун биттадан) заиф ҳаволалар. Фаолсизлик муддати ўтган
+    сессиялар омборлари release() орқали бўшатилади; Streamlit сессияни
+    ёпганда ҳаволалар ўзи йўқолади.
+    """
+
+    def __init__(self, idle_ttl=SESSION_IDLE_TTL):
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._sessions = {}   # session_key -> [охирги фаоллик, заиф ҳаволалар, ҳажм]
+
+    def touch(self, session_key, stores, state_bytes=0):
+        """Сессия фаоллигини (барча омборлари билан) қайд қилиш ва муддати ўтганларини бўшатиш"""
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_key] = [now, [weakref.ref(store) for store in stores], state_bytes]
+        return self.evict_stale(now)
+
+    def evict_stale(self, now=None):
+        """Муддати ўтган ва ёпилган сессияларни рўйхатдан чиқариш, бўшатилганлар сони"""
+        now = time.monotonic() if now is None else now
+        stale = []
+        with self._lock:
+            for session_key, (last_seen, store_refs, _) in list(self._sessions.items()):
+                stores = [store for store in (store_ref() for store_ref in store_refs) if store is not None]
+                if not stores:
+                    del self._sessions[session_key]
+                elif now - last_seen > self.idle_ttl:
+                    stale.extend(stores)
+                    del self._sessions[session_key]
+        # Бошқа сессия омборлари - release() омбор қулфи остида (ўша сессия амаллари билан кесишмайди)
+        for store in stale:
+            store.release()
+        return len(stale)
+
+    def summary(self):
+        """Фаол сессиялар сони ва уларнинг охирги ҳисобланган умумий ҳажми"""
+        with self._lock:
+            return len(self._sessions), sum(entry[2] for entry in self._sessions.values())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ЛАБОРАТОРИЯЛАР БЎЙИЧА КЕШ (ТЕНГ УЛУШ)
+Битта умумий LRU кешда бир лабораториянинг оқими (масалан, оммавий
+қайта кўриш) бошқа лабораторияларнинг иссиқ натижаларини сиқиб
+чиқаради. TenantCache ҳар бир лаборатория учун алоҳида LRU рўйхат
+юритади; умумий сиғим тўлганда энг кўп жой эгаллаган лабораториянинг
+энг эски ёзуви чиқарилади. Шунинг учун тенг улушидан (сиғим / фаол
+лабораториялар) кам ишлатаётган лабораториянинг ёзувлари бошқалар
+туфайли ўчирилмайди.
+"""
+
+import copy
+import functools
+import threading
+from collections import OrderedDict
+
+def freeze(value):
+    """Луғат ва рўйхатларни кеш калити учун ўзгармас кортежларга айлантириш"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+class TenantCache:
+    """Лабораториялар бўйича LRU кеш: умумий сиғим, тенг улуш бўйича чиқариш"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._entries = {}   # лаборатория -> OrderedDict(калит -> қиймат)
+        self._size = 0
+        self._stats = {}     # лаборатория -> [топилди, топилмади, чиқарилди]
+
+    def get(self, tenant, key, default=None):
+        with self._lock:
+            entries = self._entries.get(tenant)
+            stats = self._stats.setdefault(tenant, [0, 0, 0])
+            if entries is None or key not in entries:
+                stats[1] += 1
+                return default
+            entries.move_to_end(key)
+            stats[0] += 1
+            return entries[key]
+
+    def put(self, tenant, key, value):
+        with self._lock:
+            entries = self._entries.setdefault(tenant, OrderedDict())
+            if key in entries:
+                entries.move_to_end(key)
+            else:
+                self._size += 1
+            entries[key] = value
+            while self._size > self.capacity:
+                # Энг кўп ёзувли лаборатория - у тенг улушидан ошган
+                victim = max(self._entries, key=lambda name: len(self._entries[name]))
+                self._entries[victim].popitem(last=False)
+                self._size -= 1
+                self._stats.setdefault(victim, [0, 0, 0])[2] += 1
+                if not self._entries[victim]:
+                    del self._entries[victim]
+
+    def clear(self, tenant=None):
+        """Битта (ёки барча) лаборатория ёзувларини ўчириш"""
+        with self._lock:
+            tenants = list(self._entries) if tenant is None else [tenant]
+            for name in tenants:
+                self._size -= len(self._entries.pop(name, ()))
+
+    def fair_share(self):
+        """Фаол лаборатория учун кафолатланган ёзувлар сони"""
+        with self._lock:
+            return self.capacity // max(len(self._entries), 1)
+
+    def summary(self):
+        """Лабораториялар бўйича: ёзувлар, топилди, топилмади, чиқарилди"""
+        with self._lock:
+            tenants = set(self._entries) | set(self._stats)
+            return {
+                tenant: {
+                    'entries': len(self._entries.get(tenant, ())),
+                    'hits': self._stats.get(tenant, [0, 0, 0])[0],
+                    'misses': self._stats.get(tenant, [0, 0, 0])[1],
+                    'evictions': self._stats.get(tenant, [0, 0, 0])[2],
+                }
+                for tenant in sorted(tenants)
+            }
+
+def tenant_cached(get_cache, copy_result=True):
+    """
+    Функция натижаларини лаборатория кешида сақлаш декоратори. Биринчи
+    аргумент - лаборатория ID си; калит - функция номи ва барча аргументлар.
+    copy_result - натижа нусхаси қайтарилади (st.cache_data каби).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(tenant, *args, **kwargs):
+            cache = get_cache()
+            key = (func.__qualname__, freeze(args), freeze(kwargs))
+            missing = object()
+            result = cache.get(tenant, key, missing)
+            if result is missing:
+                result = func(tenant, *args, **kwargs)
+                cache.put(tenant, key, result)
+            return copy.deepcopy(result) if copy_result else result
+        return wrapper
+    return decorator
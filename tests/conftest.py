@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Модуллар репозиторий илдизида (пакет эмас) - тестлар уларни тўғридан-тўғри импорт қилади"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Westgard қоидалари: O(1) ҳолат бўйича баҳолаш тўлиқ тарих бўйича эталон билан солиштирилади"""
+
+import random
+import statistics
+
+import pytest
+
+from assay_qc import SHIFT_RUN_LENGTH, WARNING_RULES, WESTGARD_RULES, QCRejectedError, QCStore
+
+ANALYZER = "DELFIA-TEST"
+TARGETS = {1: (30.0, 2.5), 2: (80.0, 6.0)}
+
+@pytest.fixture
+def store(tmp_path):
+    store = QCStore(str(tmp_path / 'qc.db'))
+    for marker in ('AFP', 'PAPP_A'):
+        for level, (mean, sd) in TARGETS.items():
+            store.set_target(ANALYZER, marker, level, mean, sd, lot="L1")
+    yield store
+    store.close()
+
+def _value(level, z):
+    mean, sd = TARGETS[level]
+    return mean + z * sd
+
+def reference_findings(history, z_values):
+    """Қабул қилинган z лар тарихи бўйича қоидалар (ҳар бир серияда бутун тарих ўқилади)"""
+    findings = set()
+    for level, z in z_values.items():
+        if abs(z) > 3:
+            findings.add(('1-3s', (level,)))
+        elif abs(z) > 2:
+            findings.add(('1-2s', (level,)))
+    for side in (1, -1):
+        beyond = tuple(level for level, z in z_values.items() if side * z > 2)
+        repeated = [level for level in beyond if history[level] and side * history[level][-1] > 2]
+        if len(beyond) >= 2 or repeated:
+            findings.add(('2-2s', beyond))
+    high = tuple(level for level, z in z_values.items() if z > 2)
+    low = tuple(level for level, z in z_values.items() if z < -2)
+    if high and low:
+        findings.add(('R-4s', high + low))
+    for level, z in z_values.items():
+        run = 0
+        for previous in reversed(history[level] + [z]):
+            if previous == 0 or (previous > 0) != (z > 0):
+                break
+            run += 1
+        if run >= SHIFT_RUN_LENGTH:
+            findings.add(('10x', (level,)))
+    return findings
+
+def test_incremental_rules_match_full_history(store):
+    rng = random.Random(11)
+    history = {level: [] for level in TARGETS}
+    accepted_values = {level: [] for level in TARGETS}
+    seen = set()
+    for index in range(600):
+        # Силжиш даврлари (10x учун), даражалар қарама-қарши томонда (R-4s учун) ва катта четланишлар
+        if index % 20 == 0:
+            bias = rng.choice([0.0, 1.2, -1.2])
+        spread = rng.choice([0.0, 0.0, 0.0, 2.0])
+        z_values = {level: round(rng.gauss(bias + (spread if level == 1 else -spread), 1.0), 1)
+                    for level in TARGETS if rng.random() < 0.9}
+        if not z_values:
+            continue
+        result = store.record_run(ANALYZER, {('AFP', level): _value(level, z) for level, z in z_values.items()},
+                                  run_id=f"RUN-{index}")
+
+        expected = reference_findings(history, z_values)
+        actual = {(finding['rule'], tuple(finding['levels'])) for finding in result['violations'] + result['warnings']}
+        assert actual == expected, z_values
+        seen.update(rule for rule, _ in expected)
+        accepted = not any(rule not in WARNING_RULES for rule, _ in expected)
+        assert result['status'] == ('accepted' if accepted else 'rejected')
+        if accepted:
+            for level, z in z_values.items():
+                history[level].append(z)
+                accepted_values[level].append(_value(level, z))
+
+    assert seen == set(WESTGARD_RULES)
+
+    # Welford статистикаси фақат қабул қилинган натижалар бўйича
+    for state in store.targets(ANALYZER):
+        if state['marker'] != 'AFP':
+            continue
+        values = accepted_values[state['level']]
+        assert state['observed_n'] == len(values)
+        assert state['observed_mean'] == pytest.approx(statistics.fmean(values))
+        assert state['observed_sd'] == pytest.approx(statistics.stdev(values))
+
+def test_shift_rejects_tenth_run_on_one_side(store):
+    for index in range(1, SHIFT_RUN_LENGTH + 1):
+        result = store.record_run(ANALYZER, {('AFP', 1): _value(1, 0.5)})
+        assert result['status'] == ('rejected' if index == SHIFT_RUN_LENGTH else 'accepted')
+    assert [finding['rule'] for finding in result['violations']] == ['10x']
+
+def test_rejected_run_does_not_advance_state(store):
+    store.record_run(ANALYZER, {('AFP', 1): _value(1, 2.5)})
+    rejected = store.record_run(ANALYZER, {('AFP', 1): _value(1, 3.5)})
+    assert rejected['rejected_markers'] == ['AFP']
+    # Олдинги қабул қилинган натижа +2.5: яна +2.5 - 2-2s
+    repeated = store.record_run(ANALYZER, {('AFP', 1): _value(1, 2.5)})
+    assert [finding['rule'] for finding in repeated['violations']] == ['2-2s']
+
+def test_rejected_marker_blocks_patient_results(store):
+    run = store.record_run(ANALYZER, {('AFP', 1): _value(1, 2.4), ('AFP', 2): _value(2, -2.4),
+                                      ('PAPP_A', 1): _value(1, 0.3)})
+    assert {finding['rule'] for finding in run['violations']} == {'R-4s'}
+    with pytest.raises(QCRejectedError):
+        store.require_accepted(run['run_id'], ['AFP'])
+    with pytest.raises(QCRejectedError):
+        store.require_accepted(run['run_id'], ['FREE_BETA_HCG'])
+    assert store.require_accepted(run['run_id'], ['PAPP_A'])['run_id'] == run['run_id']
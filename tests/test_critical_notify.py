@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Хабарлар навбати: хатолик йўллари маҳаллий webhook сервери билан"""
+
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+import critical_notify
+from critical_notify import NotificationDispatcher, critical_item
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+def _record(number, clinician):
+    return {'patient_id': f"CHECK-{number}", 'name': "Текширув", 'age': 30, 'gestational_age': 12,
+            'screening_type': "first", 'clinician': clinician, 'risks': {'downs': 0.2}}
+
+class FlakyDispatcher(NotificationDispatcher):
+    """Биринчи юбориш кутилмаган хато беради, биринчи навбат айланиши ҳам"""
+    send_failures = 1
+    loop_failures = 1
+
+    def _send(self, recipient, clinician, items):
+        if self.send_failures:
+            self.send_failures -= 1
+            raise KeyError('smtp')
+        super()._send(recipient, clinician, items)
+
+    def send_due(self, limit=critical_notify.MAX_BATCH):
+        if self.loop_failures:
+            self.loop_failures -= 1
+            raise RuntimeError("кутилмаган хато")
+        return super().send_due(limit)
+
+@pytest.fixture
+def webhook():
+    """Маҳаллий webhook: қабул қилинган хабарлар рўйхати ва манзил"""
+    received = []
+
+    class WebhookHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            self.send_response(204)
+            self.send_header('Content-Length', "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), WebhookHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield received, f"webhook:http://127.0.0.1:{server.server_address[1]}/hook"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def dispatcher(tmp_path, webhook, monkeypatch):
+    monkeypatch.setattr(critical_notify, 'BASE_BACKOFF', 0.2)
+    dispatcher = FlakyDispatcher(str(tmp_path / "notify.db"), {'default': webhook[1]}, coalesce_window=0,
+                                 poll_interval=0.2)
+    yield dispatcher
+    dispatcher.close()
+
+def test_email_without_smtp_falls_back_to_default(dispatcher, webhook):
+    assert dispatcher.enqueue_record(_record(1, "aliyeva@clinic.uz")) == webhook[1]
+
+def test_thread_survives_unexpected_errors(dispatcher, webhook):
+    received, _ = webhook
+    dispatcher.enqueue_record(_record(1, "aliyeva@clinic.uz"))
+    # SMTP йўқ пайтда навбатга тушган эски email ёзуви
+    dispatcher.outbox.enqueue([("CHECK-legacy", "email:old@clinic.uz", "", critical_item(_record(2, "")))])
+    dispatcher.trigger()
+
+    assert _wait_for(lambda: dispatcher.outbox.stats().get('sent', 0) >= 1)
+    assert dispatcher.loop_failures == 0 and dispatcher.send_failures == 0
+    assert dispatcher._thread.is_alive()
+    # email ёзуви қайта навбатда ('sending' да қолмайди)
+    assert not dispatcher.outbox.stats().get('sending')
+    assert dispatcher.outbox.stats().get('pending', 0) + dispatcher.outbox.stats().get('failed', 0) >= 1
+
+    dispatcher.enqueue_record(_record(3, "tuman-3"))
+    assert _wait_for(lambda: dispatcher.outbox.stats().get('sent', 0) >= 2)
+    assert len(received) >= 2
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Қарор жадвали асл calculate_syndrome_risks билан қисқартирилган тўрда солиштирилади"""
+
+import numpy as np
+import pytest
+
+from decision_table import MARKERS, SYNDROMES, DecisionTable, verify_against_scalar
+from risk_engine import calculate_syndrome_risks
+
+TRIMESTERS = ("first", "second", "integrated")
+
+@pytest.fixture(scope='module')
+def table():
+    return DecisionTable()
+
+@pytest.mark.parametrize('ages', [np.arange(15.0, 51.0, 1.0), np.arange(15.25, 51.0, 0.5)],
+                         ids=['бутун ёшлар', 'каср ёшлар'])
+def test_sampled_grid_matches_scalar(table, ages):
+    report = verify_against_scalar(table, ages=ages, sample=2000, seed=7)
+    for trimester in TRIMESTERS:
+        cases, worst, mismatches = report[trimester]
+        assert cases == 2000
+        assert mismatches == 0, (trimester, worst)
+
+@pytest.mark.parametrize('marker', MARKERS)
+def test_every_bin_of_each_marker(table, marker):
+    """Бир маркер барча бин вакиллари бўйича (чегаралар ва NaN билан), қолганлари 1.0"""
+    values = np.array(table.representatives[marker])
+    ages = np.full(len(values), 35.0)
+    moms = {name: (values if name == marker else np.ones(len(values))) for name in MARKERS}
+    for trimester in TRIMESTERS:
+        compiled = table.score(ages, moms, trimester)
+        for row, value in enumerate(values):
+            expected = calculate_syndrome_risks(35.0, {**dict.fromkeys(MARKERS, 1.0), marker: float(value)},
+                                                trimester)
+            for syndrome in (*SYNDROMES, 'ntd'):
+                assert compiled[syndrome][row] == expected[syndrome], (trimester, syndrome, value)
+
+def test_broken_table_is_detected():
+    broken = DecisionTable()
+    broken.factors['downs'][0] = broken.factors['downs'][0] * 1.5
+    report = verify_against_scalar(broken, trimesters=("first",), sample=500, seed=1)
+    assert report["first"][2] > 0
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Такрорий намуна/бемор калитлари: исм вариантлари, бошқа аёллар ва омбор индекси"""
+
+import pandas as pd
+import pytest
+
+from dedup_index import BLOCK_SIZE, DedupIndex, flag_duplicates, name_skeleton, record_dedup_keys, row_dedup_keys
+from patient_store import SQLitePatientStore
+
+MARKERS = {'nt': 1.8, 'papp_a': 2.41, 'free_beta_hcg': 52.3}
+
+def _record(name, patient_id="P-1", age=29, week=12, **markers):
+    return {'patient_id': patient_id, 'name': name, 'age': age, 'gestational_age': week, 'screening_type': "first",
+            'parameters': {**MARKERS, **markers}}
+
+def _kinds(index, record):
+    return dict(index.check_record(record))
+
+@pytest.mark.parametrize('variant', ["Алиева Дилноза", "Aliyeva Dilnoza", "dilnoza  ALIEVA", "Аллиева Дильноза"])
+def test_name_skeleton_ignores_script_order_and_spelling(variant):
+    assert name_skeleton(variant) == name_skeleton("Алиева Дилноза")
+
+def test_name_skeleton_keeps_different_names_apart():
+    assert name_skeleton("Алиева Дилноза") != name_skeleton("Каримова Дилноза")
+    assert name_skeleton("Алиева 2") != name_skeleton("Алиева 3")
+
+def test_exact_sample_and_patient_matches():
+    index = DedupIndex()
+    index.add_record(_record("Алиева Дилноза", "P-1"))
+
+    assert _kinds(index, _record("алиева  дилноза", "P-2")) == {"P-1": 'exact'}
+    # Кирилл/лотин ёзуви - скелет ва маркерлар бир хил
+    assert _kinds(index, _record("Aliyeva Dilnoza", "P-2")) == {"P-1": 'exact'}
+    # Қисқартирилган исм - бош ҳарфлар ва маркерлар бир хил
+    assert _kinds(index, _record("Алиева Д.", "P-2")) == {"P-1": 'sample'}
+    # Шу бемор бошқа маркерлар билан
+    assert _kinds(index, _record("Алиева Дилноза", "P-2", nt=2.1)) == {"P-1": 'patient'}
+
+def test_other_women_with_same_markers_are_not_linked():
+    index = DedupIndex()
+    index.add_record(_record("Алиева Дилноза", "P-1"))
+    assert _kinds(index, _record("Каримова Нодира", "P-2")) == {}
+    assert _kinds(index, _record("Алиева Дилноза", "P-2", age=34)) == {}
+    assert _kinds(index, _record("Алиева Дилноза", "P-2", week=13)) == {}
+
+def test_missing_markers_have_no_sample_key():
+    keys = record_dedup_keys(_record("Алиева Дилноза", papp_a=None))
+    assert keys[0] is None and keys[1] is None
+    index = DedupIndex()
+    index.add(keys, "P-1")
+    assert index.check(keys) == [("P-1", 'patient')]
+
+def test_row_and_record_keys_agree():
+    record = _record("Алиева Дилноза", week=None)
+    record['gestational_days'] = 88
+    row = {'name': "Алиева Дилноза", 'age': "29", 'gestational_age': "12", **{key: str(value) for key, value in MARKERS.items()}}
+    assert row_dedup_keys(row) == record_dedup_keys(record)
+
+def test_block_is_bounded_and_len_counts_records():
+    index = DedupIndex()
+    for number in range(BLOCK_SIZE + 5):
+        index.add_record(_record("Алиева Дилноза", f"P-{number}", nt=1.0 + number / 100))
+    assert len(index) == BLOCK_SIZE + 5
+    assert len(index.blocks) == 1
+    matches = _kinds(index, _record("Алиева Дилноза", "P-new", nt=3.0))
+    assert set(matches) == {f"P-{number}" for number in range(5, BLOCK_SIZE + 5)}
+
+def test_refresh_from_db_adds_only_new_records(tmp_path):
+    db_path = str(tmp_path / 'screening.db')
+    store = SQLitePatientStore(db_path)
+    first = _record("Алиева Дилноза")
+    store.save_record(first)
+
+    index = DedupIndex()
+    assert index.refresh_from_db(db_path) == 1
+    store.save_record(_record("Каримова Нодира", nt=1.2))
+    assert index.refresh_from_db(db_path) == 1
+    assert index.refresh_from_db(db_path) == 0
+    assert len(index) == 2
+    assert _kinds(index, _record("Aliyeva Dilnoza", "P-x")) == {first['patient_id']: 'exact'}
+
+def test_flag_duplicates_checks_reference_and_earlier_rows():
+    reference = DedupIndex()
+    reference.add_record(_record("Алиева Дилноза", "P-1"))
+    frame = pd.DataFrame([
+        {'name': "Aliyeva Dilnoza", 'age': 29, 'gestational_age': 12, **MARKERS},
+        {'name': "Каримова Нодира", 'age': 31, 'gestational_age': 12, **MARKERS},
+        {'name': "Каримова Нодира", 'age': 31, 'gestational_age': 12, **MARKERS},
+    ])
+    flagged = flag_duplicates(frame, reference)
+    assert flagged['duplicate_of'].tolist() == ["P-1", "", "қатор 2"]
+    assert flagged['duplicate_kind'].tolist() == ['exact', "", 'exact']
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Версиялар солиштируви: категориялар, фарқ йиғиш ва check_report кичик когортада"""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from engine_diff import CATEGORY_NAMES, REPO_DIR, DiffAccumulator, check_report, compare_engines, risk_categories
+from risk_engine import get_risk_category
+
+CASES = 3000
+
+def test_categories_match_get_risk_category():
+    edges = [0.0, 0.001, 0.005, 0.01, 0.02, 0.05, 0.1]
+    risks = np.array([-1.0, 0.0, 0.0005, 0.3] + edges + [np.nextafter(edge, 1.0) for edge in edges])
+    for risk, index in zip(risks, risk_categories(risks)):
+        assert CATEGORY_NAMES[index] == get_risk_category(risk)[0], risk
+
+def test_accumulator_records_worst_case_and_flips():
+    cohort = {'age': np.array([30.0, 40.0, 35.0])}
+    baseline = {syndrome: np.array([0.004, 0.03, np.nan]) for syndrome in DiffAccumulator(0.0).stats}
+    candidate = {syndrome: np.array([0.004, 0.06, 0.2]) for syndrome in baseline}
+    accumulator = DiffAccumulator(0.0)
+    accumulator.update(baseline, candidate, cohort, offset=100)
+    stats = accumulator.report()['syndromes']['downs']
+
+    assert stats['changed'] == 1 and stats['flips'] == 1
+    assert stats['max_abs'] == pytest.approx(0.03) and stats['max_rel'] == pytest.approx(1.0)
+    assert stats['worst']['case'] == 101 and stats['worst']['inputs'] == {'age': 40.0}
+    assert stats['transitions'] == [{'from': "ЮҚОРИ", 'to': "ЖУДА ЮҚОРИ", 'count': 1}]
+
+def test_check_report_thresholds():
+    report = {'syndromes': {'downs': {'max_abs': 0.002, 'max_rel': 0.1, 'flips': 3}}}
+    assert check_report(report, max_abs=0.01, max_rel=0.5, allow_flips=3) == []
+    failures = check_report(report, max_abs=0.001, max_rel=0.05, allow_flips=2)
+    assert len(failures) == 3 and all(failure.startswith("downs:") for failure in failures)
+
+@pytest.fixture(scope='module')
+def changed_tree(tmp_path_factory):
+    """Жорий дарахт нусхаси, Даун синдроми базавий хавфи икки баравар"""
+    root = tmp_path_factory.mktemp('candidate')
+    for name in os.listdir(REPO_DIR):
+        if name.endswith('.py'):
+            shutil.copy(os.path.join(REPO_DIR, name), root)
+    engine = (root / 'risk_engine.py').read_text(encoding='utf-8')
+    assert "'downs': 1/800," in engine
+    (root / 'risk_engine.py').write_text(engine.replace("'downs': 1/800,", "'downs': 1/400,", 1), encoding='utf-8')
+    return str(root)
+
+def test_same_tree_has_no_differences():
+    report = compare_engines(cases=CASES, chunk_size=1000, workers=1)
+    assert report['cases'] == CASES
+    assert check_report(report) == []
+
+def test_changed_engine_is_reported(changed_tree):
+    report = compare_engines(candidate=changed_tree, cases=CASES, chunk_size=1000, workers=1)
+    failures = check_report(report)
+    assert any(failure.startswith("downs:") for failure in failures)
+    assert not any(failure.startswith("edwards:") for failure in failures)
+    assert report['syndromes']['downs']['flips'] > 0
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Иш рўйхати уюми тасодифий амаллардан кейин тўлиқ саралаш билан солиштирилади"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from worklist import TIMESTAMP_FORMAT, IndexedPriorityQueue, Worklist, build_worklist_entry
+
+def _check_heap(queue):
+    """Уюм шарти ва калит -> индекс жадвали"""
+    heap = queue._heap
+    for index in range(1, len(heap)):
+        assert heap[(index - 1) // 2][0] <= heap[index][0]
+    assert queue._position == {entry[1]: index for index, entry in enumerate(heap)}
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_operations_match_full_sort(seed):
+    rng = random.Random(seed)
+    queue, model = IndexedPriorityQueue(), {}
+    for _ in range(1500):
+        key = f"P{rng.randrange(300)}"
+        if rng.random() < 0.3:
+            assert queue.remove(key) == model.pop(key, (None, None))[1]
+        else:
+            # Устуворликлар такрорланиши мумкин - тартиб фақат устуворлик бўйича текширилади
+            priority = (rng.randrange(50), -rng.randrange(5))
+            item = {'key': key, 'priority': priority}
+            queue.push(key, priority, item)
+            model[key] = (priority, item)
+        _check_heap(queue)
+
+        expected = sorted(priority for priority, _ in model.values())
+        assert len(queue) == len(model)
+        assert [item['priority'] for item in queue.items()] == expected
+        limit = rng.randrange(1, 30)
+        top = queue.items(limit)
+        assert [item['priority'] for item in top] == expected[:limit]
+        assert all(model[item['key']][1] is item for item in top)
+        if model:
+            assert queue.peek()['priority'] == expected[0]
+        bound = (rng.randrange(50), 0)
+        assert queue.count_below(bound) == sum(priority < bound for priority in expected)
+        assert (key in queue) == (key in model)
+
+def _record(patient_id, risk, timestamp):
+    return {'patient_id': patient_id, 'name': "Текширув", 'age': 30, 'screening_type': "first",
+            'timestamp': timestamp.strftime(TIMESTAMP_FORMAT), 'risks': {'downs': risk, 'edwards': 0.0001}}
+
+def test_worklist_orders_by_deadline_then_risk():
+    start = datetime(2025, 1, 1, 9, 0, 0)
+    assert build_worklist_entry(_record("LOW", 0.004, start)) is None
+
+    entries = [
+        build_worklist_entry(_record("PRIORITY-OLD", 0.03, start)),               # 72 соат
+        build_worklist_entry(_record("URGENT-NEW", 0.2, start + timedelta(hours=40))),   # 24 соат
+        build_worklist_entry(_record("URGENT-HIGH", 0.3, start + timedelta(hours=1))),
+        build_worklist_entry(_record("URGENT-LOW", 0.06, start + timedelta(hours=1))),
+    ]
+    worklist = Worklist(entries)
+    assert [entry['patient_id'] for entry in worklist.entries()] == [
+        "URGENT-HIGH", "URGENT-LOW", "URGENT-NEW", "PRIORITY-OLD"
+    ]
+    assert [entry['patient_id'] for entry in worklist.entries(2)] == ["URGENT-HIGH", "URGENT-LOW"]
+    assert worklist.overdue_count((start + timedelta(hours=30)).strftime(TIMESTAMP_FORMAT)) == 2
+
+    # Хавф пасайган янги натижа - бемор навбатда қайта жойлашади
+    worklist.add(build_worklist_entry(_record("URGENT-HIGH", 0.03, start + timedelta(hours=1))))
+    assert [entry['patient_id'] for entry in worklist.entries()] == [
+        "URGENT-LOW", "URGENT-NEW", "PRIORITY-OLD", "URGENT-HIGH"
+    ]
+    assert worklist.resolve("URGENT-LOW")['patient_id'] == "URGENT-LOW"
+    assert worklist.resolve("URGENT-LOW") is None
+    assert len(worklist) == 3
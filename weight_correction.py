@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ОНА ВАЗНИ БЎЙИЧА MoM КОРРЕКЦИЯСИ
+
+Ҳар бир маркер ва триместр учун моделлар:
+  - sqrt               - эски қоида: кутилган MoM = sqrt(вазн / 65)
+  - log_linear         - log10(кутилган MoM) = a + b * вазн
+  - reciprocal_linear  - кутилган MoM = a + b / вазн
+
+Тузатилган MoM = MoM / кутилган MoM. Коэффициентлар JSON файлидан юкланади
+ва сақланган скрининглар бўйича оқимли регрессия орқали қайта баҳоланади:
+
+    python weight_correction.py --db data/screening.db --out weight_models.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+REFERENCE_WEIGHT = 65.0
+
+# Регрессия учун энг кам кузатувлар сони
+MIN_FIT_SAMPLES = 30
+
+MODEL_TYPES = ('sqrt', 'log_linear', 'reciprocal_linear')
+
+# Стандарт моделлар: биринчи триместр - эски қоида (натижалар ўзгармайди),
+# иккинчи триместр - 65 кг да 1.0 га тенг бўлган reciprocal-linear
+DEFAULT_WEIGHT_MODELS = {
+    'first': {
+        'PAPP_A': {'model': 'sqrt'},
+        'FREE_BETA_HCG': {'model': 'sqrt'}
+    },
+    'second': {
+        'AFP': {'model': 'reciprocal_linear', 'intercept': 0.4, 'slope': 39.0},
+        'TOTAL_HCG': {'model': 'reciprocal_linear', 'intercept': 0.5, 'slope': 32.5},
+        'UE3': {'model': 'reciprocal_linear', 'intercept': 0.7, 'slope': 19.5}
+    }
+}
+
+def load_weight_models(path=None):
+    """Стандарт моделлар устига JSON файлидаги моделларни қўшиш"""
+    models = {trimester: dict(markers) for trimester, markers in DEFAULT_WEIGHT_MODELS.items()}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as config_file:
+            configured = json.load(config_file)
+        for trimester, markers in configured.get('models', configured).items():
+            models.setdefault(trimester, {}).update(markers)
+
+    for trimester, markers in models.items():
+        for parameter, spec in markers.items():
+            if spec.get('model') not in MODEL_TYPES:
+                raise ValueError(f"Номаълум вазн модели: {trimester}/{parameter}: {spec.get('model')}")
+
+    return models
+
+def expected_mom(spec, weights):
+    """Модел бўйича кутилган MoM (скаляр ёки массив)"""
+    weights = np.asarray(weights, dtype=float)
+    model = spec['model']
+
+    if model == 'sqrt':
+        expected = np.sqrt(weights / REFERENCE_WEIGHT)
+    elif model == 'log_linear':
+        expected = np.power(10.0, spec['intercept'] + spec['slope'] * weights)
+    else:
+        expected = spec['intercept'] + spec['slope'] / weights
+
+    return float(expected) if np.ndim(expected) == 0 else expected
+
+# ==================== ОҚИМЛИ РЕГРЕССИЯ ====================
+
+class StreamingLinearRegression:
+    """
+    y = a + b * x учун оқимли энг кичик квадратлар.
+    Фақат йиғиндилар сақланади (O(1) хотира), қисмлар бирлаштирилиши мумкин.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+        self.sum_yy = 0.0
+
+    def update(self, x, y):
+        """Битта қиймат ёки массивларни қўшиш"""
+        if np.ndim(x) == 0:
+            x, y = float(x), float(y)
+            self.n += 1
+            self.sum_x += x
+            self.sum_y += y
+            self.sum_xx += x * x
+            self.sum_xy += x * y
+            self.sum_yy += y * y
+            return
+
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        y = np.atleast_1d(np.asarray(y, dtype=float))
+        self.n += len(x)
+        self.sum_x += float(x.sum())
+        self.sum_y += float(y.sum())
+        self.sum_xx += float(np.dot(x, x))
+        self.sum_xy += float(np.dot(x, y))
+        self.sum_yy += float(np.dot(y, y))
+
+    def merge(self, other):
+        for field in ('n', 'sum_x', 'sum_y', 'sum_xx', 'sum_xy', 'sum_yy'):
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        return self
+
+    def fit(self):
+        """(intercept, slope, rmse) ёки маълумот етарли бўлмаса None"""
+        if self.n < 2:
+            return None
+        denominator = self.n * self.sum_xx - self.sum_x ** 2
+        if denominator <= 0:
+            return None
+
+        slope = (self.n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        intercept = (self.sum_y - slope * self.sum_x) / self.n
+        residual = (self.sum_yy - intercept * self.sum_y - slope * self.sum_xy) / self.n
+        return intercept, slope, math.sqrt(max(residual, 0.0))
+
+def regression_variables(model, weights, raw_moms):
+    """Модел учун (x, y) ўзгарувчилари"""
+    weights = np.asarray(weights, dtype=float)
+    raw_moms = np.asarray(raw_moms, dtype=float)
+    if model == 'log_linear':
+        return weights, np.log10(raw_moms)
+    return 1.0 / weights, raw_moms
+
+def fit_weight_models(records, models=None, model_override=None):
+    """
+    Сақланган ёзувлардан вазн моделларини оқимли баҳолаш.
+    Ёзувлар бир марта ўқилади; хотирада фақат йиғиндилар сақланади.
+    """
+    from risk_engine import MARKER_RECORD_KEYS, get_median_value
+
+    models = models or load_weight_models()
+    fit_types = {}
+    accumulators = {}
+    for trimester, markers in models.items():
+        for parameter, spec in markers.items():
+            model = model_override or spec['model']
+            fit_types[(trimester, parameter)] = 'log_linear' if model == 'sqrt' else model
+            accumulators[(trimester, parameter)] = StreamingLinearRegression()
+
+    for record in records:
+        weight = record.get('weight')
+        trimester = record.get('screening_type')
+        if not weight or weight <= 0 or trimester not in models:
+            continue
+
+        for parameter in models[trimester]:
+            raw_value = record.get('parameters', {}).get(MARKER_RECORD_KEYS[parameter])
+            if not raw_value or raw_value <= 0:
+                continue
+            try:
+                median = get_median_value(parameter, record.get('gestational_age'), trimester,
+                                          record.get('gestational_days'))
+            except ValueError:
+                # Муддати норма жадвалидан ташқари ёзув моделга қўшилмайди
+                continue
+            x, y = regression_variables(fit_types[(trimester, parameter)], weight, raw_value / median)
+            accumulators[(trimester, parameter)].update(x, y)
+
+    fitted = {trimester: dict(markers) for trimester, markers in models.items()}
+    report = {}
+    for (trimester, parameter), accumulator in accumulators.items():
+        result = accumulator.fit() if accumulator.n >= MIN_FIT_SAMPLES else None
+        report[f"{trimester}/{parameter}"] = {'n': accumulator.n, 'fitted': result is not None}
+        if result is None:
+            continue
+
+        intercept, slope, rmse = result
+        fitted[trimester][parameter] = {
+            'model': fit_types[(trimester, parameter)],
+            'intercept': round(intercept, 6),
+            'slope': round(slope, 6),
+            'n': accumulator.n,
+            'rmse': round(rmse, 6)
+        }
+        report[f"{trimester}/{parameter}"].update(fitted[trimester][parameter])
+
+    return fitted, report
+
+def main():
+    parser = argparse.ArgumentParser(description="Вазн коррекцияси моделларини сақланган маълумотлардан баҳолаш")
+    parser.add_argument('--db', required=True, help="SQLite омбори (SCREENING_DB_PATH)")
+    parser.add_argument('--out', required=True, help="Натижа JSON файли")
+    parser.add_argument('--model', choices=['log_linear', 'reciprocal_linear'], help="Барча маркерлар учун модел тури")
+    parser.add_argument('--models', help="Жорий моделлар JSON файли")
+    args = parser.parse_args()
+
+    from patient_store import iter_store_records
+
+    fitted, report = fit_weight_models(iter_store_records(args.db), load_weight_models(args.models), args.model)
+    with open(args.out, 'w', encoding='utf-8') as out_file:
+        json.dump({'reference_weight': REFERENCE_WEIGHT, 'models': fitted}, out_file, ensure_ascii=False, indent=2)
+
+    for key, item in report.items():
+        status = f"{item['model']} a={item['intercept']} b={item['slope']} rmse={item['rmse']}" if item['fitted'] else "ўзгаришсиз"
+        print(f"{key:<22} n={item['n']:<8} {status}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
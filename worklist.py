@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+СКРИНИНГ-МУСБАТ БЕМОРЛАР ИШ РЎЙХАТИ
+Хавф ва муддат бўйича тартибланган индексли навбат (O(log n) янгилаш)
+"""
+
+import heapq
+from datetime import datetime, timedelta
+
+from risk_engine import SYNDROME_DESCRIPTIONS, get_risk_category, get_highest_risk
+
+# Иш рўйхатига тушадиган категориялар (get_risk_category бўйича ЮҚОРИ ва ундан юқори)
+WORKLIST_CATEGORIES = ("КРИТИК", "ЖУДА ЮҚОРИ", "ЮҚОРИ")
+
+# Тавсиялардаги чоралар муддати
+URGENT_RISK_THRESHOLD = 0.05   # 1:20 дан юқори - 24 соат ичида
+URGENT_ACTION = ("24 соат ичида", timedelta(hours=24))
+PRIORITY_ACTION = ("72 соат ичида", timedelta(hours=72))
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Иш рўйхати панелида бир саҳифадаги беморлар
+WORKLIST_PAGE_SIZE = 20
+
+def build_worklist_entry(record):
+    """Ёзувдан иш рўйхати элементини тузиш (мезонга тушмаса None)"""
+    syndrome_key, max_risk = get_highest_risk(record.get('risks', {}))
+    category, _, color = get_risk_category(max_risk)
+    if category not in WORKLIST_CATEGORIES:
+        return None
+
+    action, window = URGENT_ACTION if max_risk > URGENT_RISK_THRESHOLD else PRIORITY_ACTION
+    created = datetime.strptime(record['timestamp'], TIMESTAMP_FORMAT)
+
+    return {
+        'patient_id': record['patient_id'],
+        'name': record.get('name', 'Номаълум'),
+        'age': record.get('age'),
+        'screening_type': record.get('screening_type', 'first'),
+        'timestamp': record['timestamp'],
+        'syndrome': syndrome_key,
+        'syndrome_name': SYNDROME_DESCRIPTIONS[syndrome_key]['name'],
+        'max_risk': max_risk,
+        'category': category,
+        'color': color,
+        'action': action,
+        'deadline': (created + window).strftime(TIMESTAMP_FORMAT)
+    }
+
+def worklist_priority(entry):
+    """Навбат устуворлиги: аввал яқин муддат, кейин юқори хавф"""
+    return (entry['deadline'], -entry['max_risk'], entry['timestamp'])
+
+class IndexedPriorityQueue:
+    """
+    Калит бўйича индексланган бинар уюм (heap).
+
+    Қўшиш, устуворликни янгилаш ва исталган элементни ўчириш O(log n),
+    энг устувор элементни кўриш O(1), биринчи k тасини олиш O(n log k).
+    """
+
+    def __init__(self):
+        self._heap = []      # [priority, key, item]
+        self._position = {}  # key -> уюмдаги индекс
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, key):
+        return key in self._position
+
+    def push(self, key, priority, item):
+        """Элемент қўшиш ёки мавжудини янгилаш"""
+        if key in self._position:
+            index = self._position[key]
+            old_priority = self._heap[index][0]
+            self._heap[index] = [priority, key, item]
+            if priority < old_priority:
+                self._sift_up(index)
+            else:
+                self._sift_down(index)
+            return
+
+        self._heap.append([priority, key, item])
+        self._position[key] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def remove(self, key):
+        """Калит бўйича элементни ўчириш (бўлмаса None)"""
+        index = self._position.pop(key, None)
+        if index is None:
+            return None
+
+        removed = self._heap[index]
+        last = self._heap.pop()
+        if index < len(self._heap):
+            self._heap[index] = last
+            self._position[last[1]] = index
+            self._sift_up(index)
+            self._sift_down(self._position[last[1]])
+
+        return removed[2]
+
+    def peek(self):
+        """Энг устувор элемент"""
+        return self._heap[0][2] if self._heap else None
+
+    def items(self, limit=None):
+        """Элементлар устуворлик тартибида (limit берилса - фақат биринчи limit таси)"""
+        if limit is None:
+            ordered = sorted(self._heap, key=lambda entry: entry[0])
+        else:
+            ordered = heapq.nsmallest(limit, self._heap, key=lambda entry: entry[0])
+        return [entry[2] for entry in ordered]
+
+    def count_below(self, priority):
+        """Устуворлиги priority дан кичик элементлар сони (уюм тартиби бўйича кесиб ўтиш)"""
+        count = 0
+        stack = [0] if self._heap else []
+        while stack:
+            index = stack.pop()
+            if self._heap[index][0] >= priority:
+                continue
+            count += 1
+            stack.extend(child for child in (2 * index + 1, 2 * index + 2) if child < len(self._heap))
+        return count
+
+    def _swap(self, i, j):
+        self._heap[i], self._heap[j] = self._heap[j], self._heap[i]
+        self._position[self._heap[i][1]] = i
+        self._position[self._heap[j][1]] = j
+
+    def _sift_up(self, index):
+        while index > 0:
+            parent = (index - 1) // 2
+            if self._heap[index][0] >= self._heap[parent][0]:
+                break
+            self._swap(index, parent)
+            index = parent
+
+    def _sift_down(self, index):
+        size = len(self._heap)
+        while True:
+            smallest = index
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size and self._heap[child][0] < self._heap[smallest][0]:
+                    smallest = child
+            if smallest == index:
+                break
+            self._swap(index, smallest)
+            index = smallest
+
+class Worklist:
+    """Скрининг-мусбат беморлар навбати"""
+
+    def __init__(self, entries=()):
+        self._queue = IndexedPriorityQueue()
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self):
+        return len(self._queue)
+
+    def add(self, entry):
+        self._queue.push(entry['patient_id'], worklist_priority(entry), entry)
+
+    def resolve(self, patient_id):
+        """Бемор билан боғланилди - навбатдан чиқариш"""
+        return self._queue.remove(patient_id)
+
+    def entries(self, limit=None):
+        return self._queue.items(limit)
+
+    def overdue_count(self, now):
+        """Муддати now (TIMESTAMP_FORMAT сатри) дан олдин бўлган беморлар сони"""
+        return self._queue.count_below((now,))